@@ -1,300 +1,1224 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, send_file
+from flask import Blueprint, Flask, Request, Response, current_app, request, jsonify, render_template, redirect, url_for, session, send_file, g
 import os
 import json
+import hashlib
+import time
 import logging
 import datetime
-import requests
+import math
+import mimetypes
 import signal
+import contextlib
 import sys
+import threading
+import zlib
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from dotenv import load_dotenv
 from logging.handlers import RotatingFileHandler
-from werkzeug.utils import secure_filename
-from wetterdaten import main
+from werkzeug.datastructures import ETags
+from werkzeug.exceptions import NotFound
+from werkzeug.http import parse_etags
+from werkzeug.security import safe_join
+from werkzeug.utils import cached_property, secure_filename
+from wetterdaten import main, read_auto_update_status, configured_locations, location_slug, weather_files, weather_history
+from snapshot_cache import snapshot_cache
+from events import event_broker
+import pdf_upload
+from slot_manifest import DEFAULT_GROUP, SlotManifest, parse_screen_groups
+from ticker_store import SEPARATOR, TickerStore, is_active, parse_time
+from weather_history import WeatherHistory, choose_bucket
+from scheduler import RefreshScheduler
+from shared_state import FileLock, configure_shared_store, limiter_storage_uri
+from metrics import metrics
+from log_pipeline import AccessSampler, JsonFormatter, log_pipeline
+from file_delivery import FileDelivery
+from compression import ResponseCompressor, base_etags
+from profiling import RequestProfiler, span
+from icon_assets import get_icon_registry
 from flask_wtf.csrf import CSRFProtect, generate_csrf
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
-# Umgebung laden (Development hat Vorrang für lokales Testen)
-flask_env = 'development'
-if os.path.exists('.env') and not os.path.exists('.env.production'):
-    # Nur .env vorhanden -> Development
-    load_dotenv('.env')
-    flask_env = os.getenv('FLASK_ENV', 'development')
-elif os.path.exists('.env.production') and not os.path.exists('.env'):
-    # Nur .env.production vorhanden -> Production  
-    load_dotenv('.env.production')
-    flask_env = 'production'
-elif os.path.exists('.env') and os.path.exists('.env.production'):
-    # Beide vorhanden -> Prüfe ENV Variable oder nutze .env für Development
-    env_override = os.getenv('FORCE_PRODUCTION', 'false').lower()
-    if env_override == 'true':
+# Schwere Abhängigkeiten (requests/weather_client, PyMuPDF über pdf_render)
+# werden erst beim ersten Bedarf oder in warm_up() geladen, siehe create_app()
+
+def load_environment() -> str:
+    """Lädt .env bzw. .env.production und liefert die Umgebung (Development hat Vorrang für lokales Testen)"""
+    flask_env = 'development'
+    if os.path.exists('.env') and not os.path.exists('.env.production'):
+        # Nur .env vorhanden -> Development
+        load_dotenv('.env')
+        flask_env = os.getenv('FLASK_ENV', 'development')
+    elif os.path.exists('.env.production') and not os.path.exists('.env'):
+        # Nur .env.production vorhanden -> Production  
         load_dotenv('.env.production')
         flask_env = 'production'
+    elif os.path.exists('.env') and os.path.exists('.env.production'):
+        # Beide vorhanden -> Prüfe ENV Variable oder nutze .env für Development
+        env_override = os.getenv('FORCE_PRODUCTION', 'false').lower()
+        if env_override == 'true':
+            load_dotenv('.env.production')
+            flask_env = 'production'
+        else:
+            load_dotenv('.env')  # Development hat Vorrang
+            flask_env = os.getenv('FLASK_ENV', 'development')
     else:
-        load_dotenv('.env')  # Development hat Vorrang
+        # Fallback
+        load_dotenv()
         flask_env = os.getenv('FLASK_ENV', 'development')
-else:
-    # Fallback
-    load_dotenv()
-    flask_env = os.getenv('FLASK_ENV', 'development')
+    return flask_env
+
+def default_config(flask_env: str) -> Dict[str, Any]:
+    """Konfiguration aus den Umgebungsvariablen; create_app(config) überschreibt einzelne Schlüssel"""
+    return {
+        'FLASK_ENV': flask_env,
+        'SECRET_KEY': os.getenv('FLASK_SECRET_KEY', 'fallback_secret_key_for_development_only'),
+        'WTF_CSRF_TIME_LIMIT': 3600,
+        'SESSION_COOKIE_SECURE': flask_env != 'development',
+        'SESSION_COOKIE_HTTPONLY': True,
+        'SESSION_COOKIE_SAMESITE': 'Lax',
+        'PERMANENT_SESSION_LIFETIME': int(os.getenv('SESSION_TIMEOUT', 3600)),
+        'DEBUG': flask_env != 'production',
+        'TESTING': False,
+        'TARGET_DIR': os.getenv('zielverzeichnis', '/opt/feuerwehr_dashboard'),
+        'DASHBOARD_PASSWORD': os.getenv('DASHBOARD_PASSWORD', 'feuerwehr2024!'),
+        # Anzahl der PDF-Slots und Bildschirmgruppen (z.B. "halle:1-3;wache:4-6")
+        'SLOT_COUNT': int(os.getenv('SLOT_COUNT', 6)),
+        'SCREEN_GROUPS': os.getenv('SCREEN_GROUPS', ''),
+        # Upload-Größe begrenzen (MB); Werkzeug lehnt zu große Requests vor dem Einlesen ab
+        'MAX_UPLOAD_BYTES': int(float(os.getenv('MAX_UPLOAD_SIZE', 10)) * 1024 * 1024),
+        # Sammel-Upload: Gesamtgröße (0 = MAX_UPLOAD_SIZE je Slot) und parallel geprüfte Dateien
+        'MAX_BULK_UPLOAD_BYTES': int(float(os.getenv('MAX_BULK_UPLOAD_SIZE', 0)) * 1024 * 1024),
+        'BULK_UPLOAD_WORKERS': int(os.getenv('BULK_UPLOAD_WORKERS', 4)),
+        # Gemeinsamer Zustand aller Worker (Standard: <TARGET_DIR>/output/shared_state.db)
+        'SHARED_STATE_BACKEND': os.getenv('SHARED_STATE_BACKEND', 'sqlite'),
+        'SHARED_STATE_PATH': os.getenv('SHARED_STATE_PATH'),
+        # Zähler in der gemeinsamen SQLite-Datenbank, damit Limits für alle Worker zusammen gelten;
+        # ohne Angabe setzt create_app() den Pfad passend zu TARGET_DIR
+        'RATELIMIT_STORAGE_URI': os.getenv('RATELIMIT_STORAGE_URI'),
+        'RATE_LIMIT_LOGIN': os.getenv('RATE_LIMIT_LOGIN', '5 per minute'),
+        # Auslieferung der PDFs/Seiten: sendfile, python, x-accel-redirect oder x-sendfile
+        'FILE_DELIVERY_MODE': os.getenv('FILE_DELIVERY_MODE', 'sendfile'),
+        'FILE_DELIVERY_ACCEL_PREFIX': os.getenv('FILE_DELIVERY_ACCEL_PREFIX', '/protected'),
+        # gzip/Brotli für Text-Antworten, Varianten je Inhalts-Version im Speicher
+        'COMPRESS_RESPONSES': os.getenv('COMPRESS_RESPONSES', 'true').lower() == 'true',
+        'COMPRESS_MIN_BYTES': int(os.getenv('COMPRESS_MIN_BYTES', 512)),
+        'COMPRESS_CACHE_MB': float(os.getenv('COMPRESS_CACHE_MB', 32)),
+        'PDF_RENDER_WIDTHS': [int(w) for w in os.getenv('PDF_RENDER_WIDTHS', '1280').split(',') if w.strip()],
+        'PDF_RENDER_FORMAT': os.getenv('PDF_RENDER_FORMAT', 'webp'),
+        'PDF_RENDER_WORKERS': int(os.getenv('PDF_RENDER_WORKERS', 1)),
+        # Nachbearbeitung der Uploads (0 Worker = aus), Zielauflösung für Bilder
+        'PDF_OPTIMIZE_WORKERS': int(os.getenv('PDF_OPTIMIZE_WORKERS', 1)),
+        'PDF_OPTIMIZE_DPI': int(os.getenv('PDF_OPTIMIZE_DPI', 150)),
+        'PDF_OPTIMIZE_QUALITY': int(os.getenv('PDF_OPTIMIZE_QUALITY', 80)),
+        'PDF_OPTIMIZE_MIN_SAVINGS': float(os.getenv('PDF_OPTIMIZE_MIN_SAVINGS', 0.05)),
+        # Lauftext-Nachrichten: gelöschte/abgelaufene nach so vielen Tagen entfernen
+        'TICKER_RETENTION_DAYS': float(os.getenv('TICKER_RETENTION_DAYS', 30)),
+        'WEATHER_UPDATE_INTERVAL': int(os.getenv('WEATHER_UPDATE_INTERVAL', 3600)),
+        'WEATHER_SCHEDULER': os.getenv('WEATHER_SCHEDULER', 'true').lower() == 'true',
+        'METRICS_FLUSH_SECONDS': float(os.getenv('METRICS_FLUSH_SECONDS', 5)),
+        'METRICS_TOKEN': os.getenv('METRICS_TOKEN'),
+        # Anteil der erfolgreichen GET-Anfragen im Zugriffs-Log (Kiosk-Polling)
+        'LOG_ACCESS_SAMPLE': float(os.getenv('LOG_ACCESS_SAMPLE', 0.01)),
+        # Request-Profiling (aus = 0); zur Laufzeit über /profiling änderbar
+        'PROFILING_SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+        'PROFILING_ROUTE': os.getenv('PROFILING_ROUTE', ''),
+        'PROFILING_MODE': os.getenv('PROFILING_MODE', 'spans'),
+        'PROFILING_KEEP': int(os.getenv('PROFILING_KEEP', 200)),
+        'PROFILING_SAMPLE_INTERVAL_MS': float(os.getenv('PROFILING_SAMPLE_INTERVAL_MS', 5)),
+        # False z.B. in Benchmarks: keine Datei-Handler, app.log bleibt unangetastet
+        'LOG_TO_FILE': True
+    }
+
+def bulk_upload_limit(config: Dict[str, Any]) -> int:
+    return config['MAX_BULK_UPLOAD_BYTES'] or config['MAX_UPLOAD_BYTES'] * config['SLOT_COUNT']
+
+class DashboardRequest(Request):
+    """
+    Request mit eigener Größengrenze für den Sammel-Upload (mehrere PDFs in einem
+    Request); If-None-Match passt auch mit dem ETag einer komprimierten Variante
+    """
+
+    @property
+    def max_content_length(self) -> Optional[int]:
+        if self.endpoint == 'views.upload_bulk':
+            return bulk_upload_limit(current_app.config) + 64 * 1024
+        return super().max_content_length
+
+    @cached_property
+    def if_none_match(self) -> ETags:
+        return base_etags(parse_etags(self.headers.get('If-None-Match')))
+
+class DashboardFlask(Flask):
+    """Flask, dessen static/-Route denselben FILE_DELIVERY_MODE nutzt wie PDFs und Seiten"""
+
+    def send_static_file(self, filename: str) -> Response:
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        return self.extensions['dashboard'].file_delivery.send(path, mimetype)
+
+class DashboardServices:
+    """
+    Subsysteme einer App-Instanz (app.extensions['dashboard']).
+    Render-Pipeline und Wetter-Scheduler entstehen erst beim ersten Zugriff.
+    """
+
+    def __init__(self, config: Dict[str, Any], static_folder: Optional[str] = None) -> None:
+        self.config = config
+        self.target_dir = config['TARGET_DIR']
+        self.output_dir = f'{self.target_dir}/output'
+        # Rate-Limits, Wetter-Cache und Scheduler-Status für alle Worker
+        self.shared_store = configure_shared_store(
+            self.target_dir, backend=config['SHARED_STATE_BACKEND'], path=config['SHARED_STATE_PATH']
+        )
+        # Zielverzeichnisse basierend auf der Nummer
+        self.target_dirs = {number: f'{self.target_dir}/pdfs' for number in range(1, config['SLOT_COUNT'] + 1)}
+        self.slot_manifest = SlotManifest(
+            f'{self.target_dir}/pdfs',
+            slot_count=config['SLOT_COUNT'],
+            groups=parse_screen_groups(config['SCREEN_GROUPS'], config['SLOT_COUNT'])
+        )
+        self.file_delivery = FileDelivery(
+            config['FILE_DELIVERY_MODE'],
+            root=self.target_dir,
+            accel_prefix=config['FILE_DELIVERY_ACCEL_PREFIX']
+        )
+        self.access_sampler = AccessSampler(config['LOG_ACCESS_SAMPLE'])
+        self.compressor = ResponseCompressor(
+            static_folder,
+            min_size=config['COMPRESS_MIN_BYTES'],
+            cache_bytes=int(config['COMPRESS_CACHE_MB'] * 1024 * 1024),
+            enabled=config['COMPRESS_RESPONSES']
+        )
+        self.profiler = RequestProfiler(
+            f'{self.output_dir}/profiles',
+            f'{self.output_dir}/profiling.json',
+            defaults={
+                'sample_rate': config['PROFILING_SAMPLE_RATE'],
+                'route': config['PROFILING_ROUTE'],
+                'mode': config['PROFILING_MODE']
+            },
+            keep=config['PROFILING_KEEP'],
+            sample_interval=config['PROFILING_SAMPLE_INTERVAL_MS'] / 1000
+        )
+        self.profiler.on_profile = lambda profile: metrics.inc('dashboard_profiles_total', mode=profile.mode)
+        # Zuletzt gebauter Gesamt-Snapshot: (Schlüssel der Einzelversionen, Version, Bytes)
+        self.dashboard_snapshot: tuple = (None, None, b'')
+        self._lock = threading.RLock()
+        self._render_pipeline = None
+        self._pdf_optimizer = None
+        self._ticker: Optional[TickerStore] = None
+        self._weather_scheduler: Optional[RefreshScheduler] = None
+        self._scheduler_pid: Optional[int] = None
 
-app = Flask(__name__, template_folder='templates', static_folder='static')
+    @property
+    def render_pipeline(self):
+        """Vorab-Rasterung der PDF-Seiten (optional, siehe pdf_render.py); lädt PyMuPDF/Pillow"""
+        if self._render_pipeline is None:
+            with self._lock:
+                if self._render_pipeline is None:
+                    from pdf_render import RenderPipeline
+                    self._render_pipeline = RenderPipeline(
+                        f'{self.target_dir}/renders',
+                        widths=self.config['PDF_RENDER_WIDTHS'],
+                        fmt=self.config['PDF_RENDER_FORMAT'],
+                        max_workers=self.config['PDF_RENDER_WORKERS'],
+                        on_rendered=lambda slot, manifest: event_broker.publish('slots', {'slot': slot, 'rendered': True})
+                    )
+        return self._render_pipeline
 
-# Konfiguration basierend auf Umgebung
-app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'fallback_secret_key_for_development_only')
-app.config['WTF_CSRF_TIME_LIMIT'] = 3600
-app.config['SESSION_COOKIE_SECURE'] = False if flask_env == 'development' else True
-app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
-app.config['PERMANENT_SESSION_LIFETIME'] = int(os.getenv('SESSION_TIMEOUT', 3600))
+    @property
+    def pdf_optimizer(self):
+        """Nachbearbeitung der Uploads (siehe pdf_optimize.py); lädt PyMuPDF"""
+        if self._pdf_optimizer is None:
+            with self._lock:
+                if self._pdf_optimizer is None:
+                    from pdf_optimize import PdfOptimizer
+                    self._pdf_optimizer = PdfOptimizer(
+                        f'{self.target_dir}/pdfs',
+                        dpi=self.config['PDF_OPTIMIZE_DPI'],
+                        quality=self.config['PDF_OPTIMIZE_QUALITY'],
+                        max_workers=self.config['PDF_OPTIMIZE_WORKERS'],
+                        min_savings=self.config['PDF_OPTIMIZE_MIN_SAVINGS'],
+                        render_width=max(self.config['PDF_RENDER_WIDTHS'], default=1280),
+                        on_finished=self.pdf_optimized
+                    )
+        return self._pdf_optimizer
 
-if flask_env == 'production':
-    app.config['DEBUG'] = False
-    app.config['TESTING'] = False
-else:
-    app.config['DEBUG'] = True
+    def pdf_optimized(self, slot: int, report: Dict[str, Any]) -> None:
+        """Nach der Optimierung: Manifest nachführen, Bildschirme informieren und die aktuelle Fassung rastern"""
+        if report['outcome'] == 'optimized':
+            with pdf_upload.slot_lock(self.target_dirs[slot], slot):
+                self.slot_manifest.update(slot)
+            event_broker.publish('slots', {'slot': slot, 'optimized': True})
+        self.render_pipeline.submit(slot, f'{self.target_dirs[slot]}/{slot}.pdf', report['version'])
 
-TARGET_DIR = os.getenv('zielverzeichnis', '/opt/feuerwehr_dashboard')
+    @property
+    def ticker(self) -> TickerStore:
+        """Nachrichten für den Lauftext (siehe ticker_store.py)"""
+        if self._ticker is None:
+            with self._lock:
+                if self._ticker is None:
+                    ticker = TickerStore(f'{self.output_dir}/ticker.db',
+                                         retention_days=self.config['TICKER_RETENTION_DAYS'])
+                    ticker.import_legacy(f'{self.output_dir}/infos.json')
+                    self._ticker = ticker
+        return self._ticker
+
+    @property
+    def weather_history(self) -> WeatherHistory:
+        """Verlauf von Wetter und Vorhersage (siehe weather_history.py), befüllt von wetterdaten.main()"""
+        return weather_history(self.output_dir)
+
+    @property
+    def weather_scheduler(self) -> RefreshScheduler:
+        """Wetter-Aktualisierung im Hintergrund (ersetzt den separaten wetterdaten.py-Prozess)"""
+        if self._weather_scheduler is None:
+            with self._lock:
+                if self._weather_scheduler is None:
+                    self._weather_scheduler = RefreshScheduler(
+                        lambda: main(self.target_dir),
+                        interval=self.config['WEATHER_UPDATE_INTERVAL'],
+                        is_enabled=lambda: read_auto_update_status(self.target_dir),
+                        store=self.shared_store,
+                        # Nur der Worker mit der Leader-Sperre aktualisiert nach Zeitplan
+                        leader=FileLock(f'{self.output_dir}/weather_scheduler.leader'),
+                        run_lock=FileLock(f'{self.output_dir}/weather_refresh.lock')
+                    )
+        return self._weather_scheduler
+
+    def start_scheduler(self) -> bool:
+        """
+        Startet den Scheduler einmal pro Prozess. Threads überleben keinen Fork,
+        daher startet ein per --preload geforkter Worker ihn beim ersten Request neu.
+        """
+        if not self.config['WEATHER_SCHEDULER'] or self._scheduler_pid == os.getpid():
+            return False
+        with self._lock:
+            if self._scheduler_pid == os.getpid():
+                return False
+            self._scheduler_pid = os.getpid()
+            self.weather_scheduler.start()
+        return True
+
+def services() -> DashboardServices:
+    return current_app.extensions['dashboard']
+
+views = Blueprint('views', __name__)
 
 # CSRF Schutz - VOLLSTÄNDIG AKTIVIERT für volle Sicherheit
-csrf = CSRFProtect(app)
-app.logger.info("🛡️ CSRF Protection vollständig aktiviert (Volle Sicherheit)")
+csrf = CSRFProtect()
+# Rate Limiting - VOLLSTÄNDIG AKTIVIERT
+limiter = Limiter(key_func=get_remote_address)
+
+metrics.register_collector(lambda: iter([('dashboard_sse_subscribers', {}, event_broker.subscribers)]))
+metrics.register_collector(log_pipeline.collect)
+# Zugriffs-Log (gesampelt, siehe log_pipeline.AccessSampler)
+access_logger = logging.getLogger('dashboard.access')
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Baut die Flask-App. ``config`` überschreibt einzelne Schlüssel aus
+    default_config(), z.B. ``create_app({'TARGET_DIR': tmp, 'LOG_TO_FILE': False})``.
+    Der Import dieses Moduls selbst hat keine Seiteneffekte mehr.
+    """
+    flask_env = load_environment()
+    settings = default_config(flask_env)
+    settings.update(config or {})
+    if not settings['RATELIMIT_STORAGE_URI']:
+        settings['RATELIMIT_STORAGE_URI'] = limiter_storage_uri(
+            settings['TARGET_DIR'], backend=settings['SHARED_STATE_BACKEND'], path=settings['SHARED_STATE_PATH']
+        )
+
+    app = DashboardFlask(__name__, template_folder='templates', static_folder='static')
+    app.request_class = DashboardRequest
+    app.config.update(settings)
+    app.config['MAX_CONTENT_LENGTH'] = settings['MAX_UPLOAD_BYTES'] + 64 * 1024  # Reserve für Multipart-Overhead
+
+    dashboard_services = DashboardServices(app.config, app.static_folder)
+    app.extensions['dashboard'] = dashboard_services
+    app.config['USE_X_SENDFILE'] = dashboard_services.file_delivery.mode == 'x-sendfile'
+
+    create_directories(dashboard_services.target_dir, flask_env)
+    # Slot-Index mit pdfs/ abgleichen (hasht nur geänderte Dateien)
+    dashboard_services.slot_manifest.rebuild()
+    event_broker.configure(dashboard_services.output_dir)
+    # Metriken pro Worker in output/metrics/, /metrics summiert über alle Worker
+    metrics.configure(f'{dashboard_services.output_dir}/metrics', settings['METRICS_FLUSH_SECONDS'])
+
+    if settings['LOG_TO_FILE']:
+        setup_logging(app)
+
+    csrf.init_app(app)
+    app.logger.info("🛡️ CSRF Protection vollständig aktiviert (Volle Sicherheit)")
+    limiter.init_app(app)
+    app.logger.info("🛡️ Rate Limiting aktiviert")
+
+    app.register_blueprint(views)
+    # Nach allen Hooks: CSRF, Limiter, Blueprint-Hooks und Views werden als Spans erfasst
+    dashboard_services.profiler.instrument(app)
+    return app
+
+def warm_up(app: Flask) -> None:
+    """
+    Lädt, was sonst erst beim ersten Request anfällt: OpenWeatherMap-Client
+    (requests), PyMuPDF/Pillow, Icons und Templates. Mit ``gunicorn --preload``
+    passiert das einmal im Master, die Worker teilen die Seiten per Copy-on-Write.
+    """
+    import weather_client  # noqa: F401  (zieht requests nach)
+
+    dashboard_services = app.extensions['dashboard']
+    dashboard_services.render_pipeline
+    dashboard_services.pdf_optimizer
+    dashboard_services.weather_scheduler
+    get_icon_registry()  # Icons einmalig einlesen und hashen
+    dashboard_services.compressor.precompress_static()
+    for template in ('login.html', 'index.html'):
+        app.jinja_env.get_template(template)
+
+_app: Optional[Flask] = None
+
+def get_app() -> Flask:
+    """Standard-App aus den Umgebungsvariablen (einmal pro Prozess)"""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+def __getattr__(name: str) -> Any:
+    # Kompatibilität: ``from API_backend import app`` baut die Standard-App beim ersten Zugriff
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def start_scheduler(app: Optional[Flask] = None) -> None:
+    """Startet den Scheduler im bedienenden Prozess (nicht beim bloßen Import)"""
+    app = app or get_app()
+    dashboard_services = app.extensions['dashboard']
+    if dashboard_services.start_scheduler():
+        app.logger.info(f"⏱️ Wetter-Scheduler gestartet (Intervall {dashboard_services.weather_scheduler.interval}s)")
+
+@views.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Per --preload geforkter Worker: Metriken und Log-Listener erst im bedienenden Prozess
+    metrics.resume()
+    log_pipeline.resume()
+    start_scheduler(current_app)
+
+@views.after_app_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        duration = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe('dashboard_http_request_duration_seconds', duration, endpoint=endpoint)
+        metrics.inc('dashboard_http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+        if request.content_length:
+            metrics.inc('dashboard_http_request_bytes_total', request.content_length, endpoint=endpoint)
+        if response.content_length:
+            metrics.inc('dashboard_http_response_bytes_total', response.content_length, endpoint=endpoint)
+        sampler = services().access_sampler
+        if sampler.sample(request.method, response.status_code):
+            access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'bytes': response.content_length,
+                'remote_addr': request.remote_addr,
+                'sample_rate': sampler.rate if request.method == 'GET' and response.status_code < 400 else 1.0
+            })
+    return response
+
+@views.after_app_request
+def compress_response(response):
+    # Läuft vor record_request_metrics (umgekehrte Reihenfolge), gezählt werden die gesendeten Bytes
+    return services().compressor.process(response)
 
 # CSRF-Token für Templates verfügbar machen
-@app.context_processor
+@views.app_context_processor
 def inject_csrf_token():
     return dict(csrf_token=generate_csrf())
 
-# Rate Limiting - VOLLSTÄNDIG AKTIVIERT
-limiter = Limiter(key_func=get_remote_address)
-limiter.init_app(app)
-default_rate_limit = os.getenv('RATE_LIMIT_DEFAULT', '100 per hour')
-login_rate_limit = os.getenv('RATE_LIMIT_LOGIN', '5 per minute')
-app.logger.info("🛡️ Rate Limiting aktiviert")
-
-# Passwort aus Umgebungsvariable
-DASHBOARD_PASSWORD = os.getenv('DASHBOARD_PASSWORD', 'feuerwehr2024!')
-
-# Zielverzeichnisse basierend auf der Nummer
-TARGET_DIRS = {
-    1: f'{TARGET_DIR}/pdfs',
-    2: f'{TARGET_DIR}/pdfs',
-    3: f'{TARGET_DIR}/pdfs',
-    4: f'{TARGET_DIR}/pdfs',
-    5: f'{TARGET_DIR}/pdfs',
-    6: f'{TARGET_DIR}/pdfs'
-}
-
-# Sicherstellen, dass das Zielverzeichnis existiert
-os.makedirs(f'{TARGET_DIR}/pdfs', exist_ok=True)
-
-# Zielverzeichnisse basierend auf der Nummer
-TARGET_DIRS = {
-    1: f'{TARGET_DIR}/pdfs',
-    2: f'{TARGET_DIR}/pdfs',
-    3: f'{TARGET_DIR}/pdfs',
-    4: f'{TARGET_DIR}/pdfs',
-    5: f'{TARGET_DIR}/pdfs',
-    6: f'{TARGET_DIR}/pdfs'
-}
+@views.app_errorhandler(413)
+def request_entity_too_large(e):
+    if request.endpoint == 'views.upload_bulk':
+        return jsonify({'error': f"Upload too large (max {bulk_upload_limit(current_app.config) // (1024 * 1024)} MB in total)"}), 413
+    return jsonify({'error': f"File too large (max {current_app.config['MAX_UPLOAD_BYTES'] // (1024 * 1024)} MB)"}), 413
 
 # Authentifizierung prüfen
 def login_required(f):
     def decorated_function(*args, **kwargs):
-        if not session.get('authenticated'):
-            app.logger.warning(f"Unbefugter Zugriff auf {request.endpoint} von {request.remote_addr}")
-            return redirect(url_for('login'))
+        with span('middleware', 'login_required'):
+            authenticated = session.get('authenticated')
+        if not authenticated:
+            current_app.logger.warning(f"Unbefugter Zugriff auf {request.endpoint} von {request.remote_addr}")
+            return redirect(url_for('.login'))
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
 
 # Login Route - SAUBER UND SICHER
-@app.route("/", methods=['GET', 'POST'])
-@limiter.limit(login_rate_limit)
+@views.route("/", methods=['GET', 'POST'])
+@limiter.limit(lambda: current_app.config['RATE_LIMIT_LOGIN'])
 def login():
     user_ip = request.remote_addr
     
     if request.method == 'POST':
         entered_password = request.form.get('password', '')
-        app.logger.info(f"🔐 Login-Versuch von IP: {user_ip}")
+        current_app.logger.info(f"🔐 Login-Versuch von IP: {user_ip}")
         
-        if entered_password == DASHBOARD_PASSWORD:
+        if entered_password == current_app.config['DASHBOARD_PASSWORD']:
             session['authenticated'] = True
             session.permanent = True
-            app.logger.info(f"✅ Erfolgreicher Login von IP: {user_ip}")
-            return redirect(url_for('dashboard'))
+            current_app.logger.info(f"✅ Erfolgreicher Login von IP: {user_ip}")
+            return redirect(url_for('.dashboard'))
         else:
-            app.logger.warning(f"❌ Fehlgeschlagener Login von IP: {user_ip}")
+            current_app.logger.warning(f"❌ Fehlgeschlagener Login von IP: {user_ip}")
             return render_template("login.html", error="Falsches Passwort!")
     
     # GET - Login-Seite anzeigen
     return render_template("login.html")
 
 # Dashboard Route - SICHER
-@app.route("/dashboard")
+@views.route("/dashboard")
 @login_required
 def dashboard():
-    return render_template("index.html")
+    return render_template("index.html", slot_count=services().slot_manifest.slot_count)
 
 # Logout Route - SICHER
-@app.route('/logout', methods=['POST'])
+@views.route('/logout', methods=['POST'])
 @login_required
 def logout():
     session.pop('authenticated', None)
-    app.logger.info(f"🚪 Benutzer abgemeldet von IP: {request.remote_addr}")
-    return redirect(url_for('login'))
+    current_app.logger.info(f"🚪 Benutzer abgemeldet von IP: {request.remote_addr}")
+    return redirect(url_for('.login'))
+
+def unchanged_versions(svc: DashboardServices, number: int, current) -> list:
+    """Versionen, bei denen ein Upload für den Slot als unverändert gilt"""
+    if current is None:
+        return []
+    # Erneuter Upload des Originals eines schon optimierten Slots zählt als unverändert
+    return [current.etag, svc.pdf_optimizer.original_version(number, current.etag)]
 
-@app.route('/upload', methods=['POST', 'GET'])
+def process_upload(svc: DashboardServices, number: int, file_path: str, version: str) -> bool:
+    """Optimierung bzw. Rasterung eines neuen Slot-Inhalts anstoßen; True, wenn optimiert wird"""
+    # Gerastert wird nach der Optimierung (siehe DashboardServices.pdf_optimized)
+    optimizing = svc.pdf_optimizer.submit(number, version)
+    if not optimizing:
+        svc.render_pipeline.submit(number, file_path, version)
+    return optimizing
+
+@views.route('/upload', methods=['POST', 'GET'])
 def upload_file():
+    svc = services()
     if 'file' not in request.files or 'number' not in request.form:
-        app.logger.error("Fehler: Keine Datei oder Nummer angegeben.")
+        current_app.logger.error("Fehler: Keine Datei oder Nummer angegeben.")
         return jsonify({'error': 'No file or number provided'}), 400
 
     file = request.files['file']
     number = int(request.form['number'])
 
-    if number not in TARGET_DIRS:
-        app.logger.error(f"Ungültige Nummer angegeben: {number}")
+    if number not in svc.target_dirs:
+        current_app.logger.error(f"Ungültige Nummer angegeben: {number}")
         return jsonify({'error': 'Invalid number provided'}), 400
 
     if file.filename is None or file.filename == '':
-        app.logger.error("Kein Dateiname angegeben.")
+        current_app.logger.error("Kein Dateiname angegeben.")
         return jsonify({'error': 'No filename provided'}), 400
 
     filename = secure_filename(file.filename)
     if not filename.lower().endswith('.pdf'):
-        app.logger.error("Ungültiger Dateityp. Nur PDFs sind erlaubt.")
+        current_app.logger.error("Ungültiger Dateityp. Nur PDFs sind erlaubt.")
         return jsonify({'error': 'Invalid file type, only PDFs are allowed'}), 400
 
-    target_dir = TARGET_DIRS[number]
+    target_dir = svc.target_dirs[number]
     file_path = os.path.join(target_dir, f'{number}.pdf')
 
     try:
-        file.save(file_path)
-        app.logger.info(f"Datei erfolgreich hochgeladen: {filename} in Slot {number}.")
-        return jsonify({'message': 'File uploaded successfully'}), 200
+        current = snapshot_cache.file_version(file_path)
+        staged = pdf_upload.stage_pdf(file.stream, target_dir, current_app.config['MAX_UPLOAD_BYTES'],
+                                      unchanged_versions(svc, number, current))
+        if staged is None:
+            current_app.logger.info(f"Datei unverändert, Slot {number} bleibt bestehen: {filename}.")
+            metrics.inc('dashboard_uploads_total', outcome='unchanged')
+            return jsonify({'message': 'File unchanged', 'version': current.etag}), 200
+
+        with pdf_upload.slot_lock(target_dir, number):
+            pdf_upload.commit(staged, file_path)
+            svc.slot_manifest.update(number, version=staged.version, filename=filename)
+        current_app.logger.info(f"Datei erfolgreich hochgeladen: {filename} in Slot {number} ({staged.size} Bytes).")
+        metrics.observe('dashboard_upload_size_bytes', staged.size)
+        metrics.inc('dashboard_uploads_total', outcome='stored')
+        event_broker.publish('slots', {'slot': number})
+        optimizing = process_upload(svc, number, file_path, staged.version)
+        return jsonify({'message': 'File uploaded successfully', 'version': staged.version, 'optimizing': optimizing}), 200
+    except pdf_upload.UploadRejected as e:
+        current_app.logger.error(f"Upload für Slot {number} abgelehnt: {e.message}")
+        metrics.inc('dashboard_uploads_total', outcome='rejected')
+        return jsonify({'error': e.message}), e.status
     except Exception as e:
-        app.logger.error(f"Fehler beim Hochladen der Datei: {str(e)}")
+        current_app.logger.error(f"Fehler beim Hochladen der Datei: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/delete', methods=['POST'])
+def bulk_sources(svc: DashboardServices, archives: list) -> Dict[int, tuple]:
+    """
+    Dateien eines Sammel-Uploads je Slot: {Slot: (Dateiname, Öffner des Streams)}.
+    Geöffnete ZIP-Archive landen in ``archives``.
+    """
+    sources: Dict[int, tuple] = {}
+    for field, file in request.files.items(multi=True):
+        name = file.filename or ''
+        if field.startswith('file_'):
+            items = [(int(field[5:]) if field[5:].isdigit() else None, name, lambda f=file: f.stream)]
+        elif field == 'files' and name.lower().endswith('.zip'):
+            archive, members = pdf_upload.archive_members(file.stream, len(svc.target_dirs))
+            archives.append(archive)
+            items = [(pdf_upload.slot_from_filename(member.filename), member.filename,
+                      lambda a=archive, m=member: a.open(m)) for member in members]
+        elif field == 'files':
+            items = [(pdf_upload.slot_from_filename(name), name, lambda f=file: f.stream)]
+        else:
+            raise pdf_upload.UploadRejected(f'Unexpected field: {field}')
+        for number, name, open_stream in items:
+            filename = secure_filename(os.path.basename(name))
+            if number not in svc.target_dirs:
+                raise pdf_upload.UploadRejected(f'No valid slot for file: {name}')
+            if not filename.lower().endswith('.pdf'):
+                raise pdf_upload.UploadRejected(f'Invalid file type, only PDFs are allowed: {name}')
+            if number in sources:
+                raise pdf_upload.UploadRejected(f'More than one file for slot {number}')
+            sources[number] = (filename, open_stream)
+    return sources
+
+@views.route('/upload/bulk', methods=['POST'])
+@login_required
+def upload_bulk():
+    """
+    Mehrere PDFs in einem Request: Felder file_<Slot> und/oder files (PDFs oder
+    ZIP-Archive, Slot aus dem Dateinamen wie 3.pdf oder 3_Wachplan.pdf). Die
+    Dateien werden parallel geprüft und gemeinsam mit einem Manifest-Schreibvorgang
+    veröffentlicht. Ist eine ungültig, bleiben alle Slots unverändert, außer mit
+    partial=true.
+    """
+    svc = services()
+    partial = request.form.get('partial', 'false').lower() == 'true'
+    archives: list = []
+    try:
+        try:
+            sources = bulk_sources(svc, archives)
+        except pdf_upload.UploadRejected as e:
+            current_app.logger.error(f"Sammel-Upload abgelehnt: {e.message}")
+            return jsonify({'error': e.message}), e.status
+        if not sources:
+            return jsonify({'error': 'No files provided'}), 400
+
+        paths = {number: os.path.join(svc.target_dirs[number], f'{number}.pdf') for number in sources}
+        jobs = {
+            number: (open_stream, svc.target_dirs[number],
+                     unchanged_versions(svc, number, snapshot_cache.file_version(paths[number])))
+            for number, (_, open_stream) in sources.items()
+        }
+        results = pdf_upload.stage_many(jobs, current_app.config['MAX_UPLOAD_BYTES'],
+                                        current_app.config['BULK_UPLOAD_WORKERS'])
+    finally:
+        for archive in archives:
+            archive.close()
+
+    staged = {number: result for number, result in results.items() if isinstance(result, pdf_upload.StagedPdf)}
+    rejected = {number: result for number, result in results.items() if isinstance(result, pdf_upload.UploadRejected)}
+    failed = {number: result for number, result in results.items()
+              if isinstance(result, Exception) and number not in rejected}
+    publish = not failed and (partial or not rejected)
+    if not publish:
+        for item in staged.values():
+            pdf_upload.discard(item)
+    if failed:
+        number, error = next(iter(failed.items()))
+        current_app.logger.error(f"Fehler beim Sammel-Upload (Slot {number}): {error}")
+        metrics.inc('dashboard_bulk_uploads_total', outcome='failed')
+        return jsonify({'error': str(error)}), 500
+
+    if publish and staged:
+        try:
+            # Sperren in fester Reihenfolge, dann alle Dateien und ein Manifest-Schreibvorgang
+            with contextlib.ExitStack() as locks:
+                for number in sorted(staged):
+                    locks.enter_context(pdf_upload.slot_lock(svc.target_dirs[number], number))
+                pdf_upload.commit_many({paths[number]: staged[number] for number in staged})
+                svc.slot_manifest.update_many({number: (item.version, sources[number][0])
+                                               for number, item in staged.items()})
+        except Exception as e:
+            for item in staged.values():
+                pdf_upload.discard(item)
+            current_app.logger.error(f"Fehler beim Sammel-Upload: {str(e)}")
+            metrics.inc('dashboard_bulk_uploads_total', outcome='failed')
+            return jsonify({'error': str(e)}), 500
+        event_broker.publish('slots', {'slots': sorted(staged)})
+
+    report = []
+    for number in sorted(results):
+        result = results[number]
+        entry = {'slot': number, 'filename': sources[number][0]}
+        if number in rejected:
+            entry.update(status='rejected', error=result.message)
+            metrics.inc('dashboard_uploads_total', outcome='rejected')
+        elif result is None:
+            entry.update(status='unchanged', version=jobs[number][2][0])
+            metrics.inc('dashboard_uploads_total', outcome='unchanged')
+        elif not publish:
+            entry.update(status='skipped')
+        else:
+            entry.update(status='stored', version=result.version, size=result.size,
+                         optimizing=process_upload(svc, number, paths[number], result.version))
+            metrics.observe('dashboard_upload_size_bytes', result.size)
+            metrics.inc('dashboard_uploads_total', outcome='stored')
+        report.append(entry)
+
+    stored = [entry['slot'] for entry in report if entry['status'] == 'stored']
+    if not publish:
+        current_app.logger.error(f"Sammel-Upload abgelehnt, keine Änderung: ungültig {sorted(rejected)}")
+        metrics.inc('dashboard_bulk_uploads_total', outcome='rejected')
+        return jsonify({'error': 'Invalid files, no slot was changed', 'results': report}), 400
+    current_app.logger.info(f"Sammel-Upload: Slots {stored} gespeichert, "
+                            f"{len(report) - len(stored) - len(rejected)} unverändert, {len(rejected)} abgelehnt.")
+    metrics.inc('dashboard_bulk_uploads_total', outcome='partial' if rejected else 'published')
+    return jsonify({'message': 'Files uploaded successfully', 'published': stored, 'results': report}), 200
+
+@views.route('/delete', methods=['POST'])
 def delete_file():
+    svc = services()
     if 'number' not in request.form:
-        app.logger.error("Fehler: Keine Nummer angegeben.")
+        current_app.logger.error("Fehler: Keine Nummer angegeben.")
         return jsonify({'error': 'No number provided'}), 400
 
     number = int(request.form['number'])
 
-    if number not in TARGET_DIRS:
-        app.logger.error(f"Ungültige Nummer angegeben: {number}")
+    if number not in svc.target_dirs:
+        current_app.logger.error(f"Ungültige Nummer angegeben: {number}")
         return jsonify({'error': 'Invalid number provided'}), 400
 
-    target_dir = TARGET_DIRS[number]
+    target_dir = svc.target_dirs[number]
     file_path = os.path.join(target_dir, f'{number}.pdf')
 
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            app.logger.info(f"Datei erfolgreich gelöscht: Slot {number}.")
+        with pdf_upload.slot_lock(target_dir, number):
+            removed = os.path.exists(file_path)
+            if removed:
+                os.remove(file_path)
+                svc.slot_manifest.update(number)
+        if removed:
+            svc.render_pipeline.discard(number)
+            svc.pdf_optimizer.discard(number)
+            current_app.logger.info(f"Datei erfolgreich gelöscht: Slot {number}.")
+            event_broker.publish('slots', {'slot': number})
             return jsonify({'message': 'File deleted successfully'}), 200
         else:
-            app.logger.warning(f"Datei nicht gefunden: Slot {number}.")
+            current_app.logger.warning(f"Datei nicht gefunden: Slot {number}.")
             return jsonify({'error': 'File not found'}), 404
     except Exception as e:
-        app.logger.error(f"Fehler beim Löschen der Datei: {str(e)}")
+        current_app.logger.error(f"Fehler beim Löschen der Datei: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/update_infos', methods=['POST'])
+@views.route('/pdf_optimize', methods=['POST'])
+@login_required
+def pdf_optimize():
+    """Slot erneut ab dem aufbewahrten Original optimieren (z.B. nach Änderung von PDF_OPTIMIZE_DPI)"""
+    svc = services()
+    number = request.form.get('number', type=int)
+    if number not in svc.target_dirs:
+        return jsonify({'error': 'Invalid number provided'}), 400
+    if not svc.pdf_optimizer.enabled:
+        return jsonify({'error': 'PDF optimization not available'}), 503
+    if not svc.pdf_optimizer.reprocess(number):
+        return jsonify({'error': 'No original to reprocess or optimization already running'}), 409
+    status_url = url_for('.pdf_optimize_status')
+    return jsonify({'message': 'Optimierung gestartet', 'status_url': status_url}), 202, {'Location': status_url}
+
+@views.route('/pdf_optimize/status', methods=['GET'])
+@login_required
+def pdf_optimize_status():
+    """Bericht je Slot: Größe und Renderzeit der ersten Seite vor/nach der Optimierung"""
+    svc = services()
+    optimizer = svc.pdf_optimizer
+    return jsonify({
+        'enabled': optimizer.enabled,
+        'backend': optimizer.backend,
+        'linearizer': optimizer.linearizer,
+        'dpi': optimizer.dpi,
+        'slots': {
+            number: dict(optimizer.report(number) or {}, pending=optimizer.is_pending(number))
+            for number in svc.target_dirs
+        }
+    }), 200
+
+@views.route('/update_infos', methods=['POST'])
 def update_infos():
     if not request.json:
         return jsonify({'error': 'No JSON data provided'}), 400
     infos = request.json['info']
-    print(infos)
+    current_app.logger.info(f"Lauftext aktualisiert ({len(str(infos))} Zeichen)")
     
     try:
-        with open(f'{TARGET_DIR}/output/infos.json', 'w', encoding='utf-8') as f:
-            json.dump({'infos': infos}, f, ensure_ascii=False, indent=4)
+        # Dauerhafte Nachricht "lauftext" im Nachrichten-Store (leer = entfernen)
+        services().ticker.set_text(infos)
+        event_broker.publish('info')
         return jsonify({'message': 'Infos updated successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/wetter_update', methods=['GET'])
+MESSAGE_FIELDS = ('text', 'priority', 'starts_at', 'ends_at')
+
+@views.route('/messages', methods=['GET', 'POST'])
+@login_required
+def ticker_messages():
+    """Lauftext-Nachrichten auflisten bzw. anlegen (text, priority, starts_at, ends_at)"""
+    ticker = services().ticker
+    if request.method == 'GET':
+        version, messages = ticker.messages()
+        now = time.time()
+        return jsonify({'version': version, 'messages': [dict(m, active=is_active(m, now)) for m in messages]}), 200
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'text' not in data:
+        return jsonify({'error': 'No message text provided'}), 400
+    try:
+        message = ticker.create(**{key: data[key] for key in MESSAGE_FIELDS if key in data})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    current_app.logger.info(f"Lauftext-Nachricht {message['id']} angelegt (Priorität {message['priority']})")
+    event_broker.publish('info', {'version': message['version']})
+    return jsonify(message), 201
+
+@views.route('/messages/<int:message_id>', methods=['PATCH', 'DELETE'])
+@login_required
+def ticker_message(message_id):
+    """Nachricht ändern (nur übergebene Felder) oder löschen"""
+    ticker = services().ticker
+    if request.method == 'DELETE':
+        if not ticker.delete(message_id):
+            return jsonify({'error': 'Message not found'}), 404
+        current_app.logger.info(f"Lauftext-Nachricht {message_id} gelöscht")
+        event_broker.publish('info', {'version': ticker.version})
+        return jsonify({'message': 'Message deleted successfully'}), 200
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No JSON data provided'}), 400
+    try:
+        message = ticker.update(message_id, **{key: data[key] for key in MESSAGE_FIELDS if key in data})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    if message is None:
+        return jsonify({'error': 'Message not found'}), 404
+    event_broker.publish('info', {'version': message['version']})
+    return jsonify(message), 200
+
+@views.route('/messages/history', methods=['GET'])
+@login_required
+def ticker_history():
+    """Letzte Änderungen an den Nachrichten (neueste zuerst)"""
+    limit = min(request.args.get('limit', 100, type=int), 1000)
+    return jsonify({'history': services().ticker.history(limit)}), 200
+
+@views.route('/wetter_update', methods=['GET'])
 def wetter_update():
-    main()
-    return jsonify({'message': 'Wetterdaten wurden aktualisiert'}), 200
+    job = services().weather_scheduler.trigger('manual')
+    status_url = url_for('.wetter_update_status', job_id=job.id)
+    return jsonify({
+        'message': 'Wetter-Aktualisierung gestartet',
+        'job_id': job.id,
+        'status_url': status_url
+    }), 202, {'Location': status_url}
+
+@views.route('/wetter_update/status', methods=['GET'])
+def wetter_update_status():
+    """Status des Schedulers bzw. eines einzelnen Jobs (?job_id=...)"""
+    job_id = request.args.get('job_id')
+    if job_id:
+        job = services().weather_scheduler.get_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job id'}), 404
+        return jsonify(job.to_dict()), 200
+    return jsonify(services().weather_scheduler.status()), 200
+
+@views.route('/get_auto_update_status', methods=['GET'])
+def get_auto_update_status():
+    return jsonify({'auto_update': read_auto_update_status(services().target_dir)}), 200
 
 # ===== ÖFFENTLICHE API ENDPOINTS FÜR FRONTEND =====
-@app.route('/api/public/pdf_status', methods=['GET'])
+@views.route('/api/public/pdf_status', methods=['GET'])
 def public_pdf_status():
-    """Liefert belegte PDF-Slots für das Dashboard-Grid"""
-    occupied = []
-    for number, target_dir in TARGET_DIRS.items():
-        file_path = os.path.join(target_dir, f'{number}.pdf')
-        if os.path.exists(file_path):
-            occupied.append(number)
-    return jsonify({'occupied': occupied}), 200
-
-@app.route('/api/public/weather', methods=['GET'])
+    """
+    Belegte PDF-Slots samt Version und Metadaten je Slot (aus dem Slot-Manifest,
+    ohne Dateizugriff). ?group= beschränkt auf eine Bildschirmgruppe.
+    """
+    svc = services()
+    status = svc.slot_manifest.status(request.args.get('group', DEFAULT_GROUP))
+    if status is None:
+        return jsonify({'error': 'Unknown group', 'groups': list(svc.slot_manifest.groups)}), 404
+    version, _, body = status
+
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(version)
+    response.cache_control.no_cache = True
+    return response
+
+@views.route('/api/public/screens', methods=['GET'])
+def public_screens():
+    """Konfigurierte Bildschirmgruppen (Werte für ?group=) und ihre Slots"""
+    manifest = services().slot_manifest
+    return jsonify({'slot_count': manifest.slot_count, 'groups': manifest.groups}), 200
+
+DEFAULT_INFO = 'Willkommen beim Feuerwehr Dashboard Glienicke/Nordbahn'
+
+def snapshot_response(snapshot) -> Response:
+    """Antwort aus vorserialisierten Snapshot-Bytes (ohne json.load/jsonify)"""
+    return Response(snapshot.body, status=200, mimetype='application/json')
+
+def location_snapshot(kind: int):
+    """
+    Snapshot für ?location= (Name oder Slug eines konfigurierten Ortes).
+    Liefert immer nur den zuletzt gespeicherten Stand, nie einen Live-Abruf.
+    """
+    locations = configured_locations()
+    requested = request.args.get('location')
+    if requested:
+        slug = location_slug(requested)
+        location = next((l for l in locations if location_slug(l) == slug), None)
+        if location is None:
+            return None, jsonify({'error': 'Unknown location'}), 404
+    else:
+        location = locations[0]
+    path = weather_files(services().output_dir, location, locations[0])[kind]
+    return snapshot_cache.get(path), None, None
+
+@views.route('/api/public/weather', methods=['GET'])
 def public_weather():
     """Öffentlicher Wetter-Endpoint für Frontend"""
     try:
-        weather_file = os.path.join(TARGET_DIR, 'output', 'wetterdaten.json')
-        if os.path.exists(weather_file):
-            with open(weather_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return jsonify(data), 200
+        snapshot, error, status = location_snapshot(0)
+        if error is not None:
+            return error, status
+        if snapshot is not None:
+            return snapshot_response(snapshot)
         else:
             return jsonify({'error': 'Weather data not available'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/public/forecast', methods=['GET'])
+@views.route('/api/public/forecast', methods=['GET'])
 def public_forecast():
     """Öffentlicher Vorhersage-Endpoint für Frontend"""
     try:
-        forecast_file = os.path.join(TARGET_DIR, 'output', 'wettervorhersage.json')
-        if os.path.exists(forecast_file):
-            with open(forecast_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return jsonify(data), 200
+        snapshot, error, status = location_snapshot(1)
+        if error is not None:
+            return error, status
+        if snapshot is not None:
+            return snapshot_response(snapshot)
         else:
             return jsonify({'error': 'Forecast data not available'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/public/info', methods=['GET'])
-def public_info():
-    """Öffentlicher Info-Endpoint für Lauftext"""
+@views.route('/api/public/locations', methods=['GET'])
+def public_locations():
+    """Konfigurierte Wetter-Orte (Werte für ?location=)"""
+    locations = configured_locations()
+    return jsonify([
+        {'location': l, 'slug': location_slug(l), 'default': i == 0}
+        for i, l in enumerate(locations)
+    ]), 200
+
+@views.route('/api/public/weather/history', methods=['GET'])
+def public_weather_history():
+    """
+    Wetterverlauf eines Ortes in Buckets (min/max/avg je Bucket als Spalten-Arrays).
+    ?source=observed|forecast|compare, start/end (Unix-Zeit oder ISO, sonst die
+    letzten ``days`` Tage), bucket in Sekunden oder points (Anzahl Buckets),
+    metrics kommagetrennt, lead = Vorlauf der Vorhersage in Stunden.
+    """
+    locations = configured_locations()
+    slug = location_slug(request.args.get('location') or locations[0])
+    source = request.args.get('source', 'observed')
+    fields = [m.strip() for m in request.args.get('metrics', 'temperature,precipitation').split(',') if m.strip()]
+    if source not in ('observed', 'forecast', 'compare'):
+        return jsonify({'error': 'source must be one of observed, forecast, compare'}), 400
     try:
-        info_file = os.path.join(TARGET_DIR, 'output', 'infos.json')
-        if os.path.exists(info_file):
-            with open(info_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return jsonify(data), 200
+        # Offenes Ende auf die nächste volle Stunde: gleiche URL, gleicher ETag bis zum nächsten Abruf
+        end = parse_time(request.args.get('end')) or math.ceil(time.time() / 3600) * 3600
+        start = parse_time(request.args.get('start'))
+        if start is None:
+            start = end - request.args.get('days', 7, type=float) * 86400
+        points = min(max(request.args.get('points', 300, type=int), 1), 2000)
+        bucket = request.args.get('bucket', type=int) or choose_bucket(end - start, points)
+        if bucket <= 0 or (end - start) / bucket > 2000:
+            raise ValueError('bucket must be positive and yield at most 2000 points')
+        lead = request.args.get('lead', 0, type=float) * 3600
+
+        history = services().weather_history
+        query = f'{slug}|{source}|{int(start)}|{int(end)}|{bucket}|{",".join(fields)}|{int(lead)}'
+        version = f'wh{history.version}-{zlib.crc32(query.encode()):08x}'
+        if request.if_none_match.contains(version):
+            data = None
+        elif source == 'compare':
+            data = history.compare(slug, start, end, bucket, fields, lead)
         else:
-            return jsonify({'infos': 'Willkommen beim Feuerwehr Dashboard Glienicke/Nordbahn'}), 200
+            data = history.series(slug, start, end, bucket, fields, source, lead)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    elif data is None:
+        return jsonify({'error': 'Unknown location'}), 404
+    else:
+        response = jsonify(data)
+    response.set_etag(version)
+    response.cache_control.no_cache = True
+    return response
+
+def ticker_text(messages: list) -> str:
+    """Aktive Nachrichten als ein Lauftext (höchste Priorität zuerst)"""
+    return SEPARATOR.join(m['text'] for m in messages) or DEFAULT_INFO
+
+@views.route('/api/public/info', methods=['GET'])
+def public_info():
+    """
+    Öffentlicher Info-Endpoint für Lauftext: aktive Nachrichten, Store-Version und
+    next_change_at (nächster geplanter Start/Ende, mit server_time zum Abgleich der Uhr)
+    """
+    try:
+        now = time.time()
+        active = services().ticker.active(now)
+        return jsonify({
+            'infos': ticker_text(active['messages']),
+            'version': active['version'],
+            'messages': [public_message(m) for m in active['messages']],
+            'next_change_at': active['next_change_at'],
+            'server_time': now
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def public_message(message: dict) -> dict:
+    if message['deleted']:
+        return {'id': message['id'], 'version': message['version'], 'deleted': True}
+    return {key: message[key] for key in ('id', 'text', 'priority', 'starts_at', 'ends_at', 'version')}
+
+@views.route('/api/public/messages', methods=['GET'])
+@limiter.exempt
+def public_messages():
+    """
+    Alle nicht abgelaufenen Nachrichten inkl. geplanter; mit ?since=<version> nur
+    die Änderungen danach (gelöschte mit deleted=true, bei resync=true alles neu)
+    """
+    ticker = services().ticker
+    now = time.time()
+    since = request.args.get('since', type=int)
+    if since is not None:
+        result = ticker.changes(since)
+    else:
+        version, messages = ticker.messages()
+        result = {'version': version, 'messages': messages}
+    for key in ('changes', 'messages'):
+        if key in result:
+            result[key] = [public_message(m) for m in result[key]
+                           if m['deleted'] or m['ends_at'] is None or m['ends_at'] > now]
+    result['next_change_at'] = ticker.active(now)['next_change_at']
+    result['server_time'] = now
+    return jsonify(result), 200
+
+def dashboard_snapshot() -> tuple:
+    """Gesamtzustand des Dashboards als (Version, vorserialisierte Bytes)"""
+    svc = services()
+    output_dir = svc.output_dir
+    weather = snapshot_cache.get(os.path.join(output_dir, 'wetterdaten.json'))
+    forecast = snapshot_cache.get(os.path.join(output_dir, 'wettervorhersage.json'))
+    ticker = svc.ticker.active()
+    auto_update = snapshot_cache.get(os.path.join(output_dir, 'auto_update_status.json'))
+    slots_version, slots, _ = svc.slot_manifest.status()
+
+    parts = [weather, forecast, auto_update]
+    key = tuple(part.etag if part is not None else '' for part in parts) + (slots_version, ticker['version']) + \
+        tuple(m['id'] for m in ticker['messages'])
+    cached_key, version, body = svc.dashboard_snapshot
+    if cached_key == key:
+        return version, body
+
+    version = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+    body = json.dumps({
+        'version': version,
+        'weather': weather.data if weather is not None else None,
+        'forecast': forecast.data if forecast is not None else None,
+        'infos': ticker_text(ticker['messages']),
+        'infos_next_change_at': ticker['next_change_at'],
+        'slots': slots,
+        'auto_update': bool(auto_update.data.get('auto_update')) if auto_update is not None else False
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    svc.dashboard_snapshot = (key, version, body)
+    return version, body
+
+@views.route('/api/public/snapshot', methods=['GET'])
+@limiter.exempt
+def public_snapshot():
+    """Kompletter Dashboard-Zustand in einer Antwort, mit ETag/304 über die Gesamtversion"""
+    try:
+        version, body = dashboard_snapshot()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/public/pdfs/<int:number>.pdf', methods=['GET'])
+    if request.if_none_match.contains(version):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(version)
+    response.cache_control.no_cache = True
+    return response
+
+@views.route('/api/public/events', methods=['GET'])
+@limiter.exempt
+def public_events():
+    """Server-Sent Events: typisierte Änderungs-Events (slots, info, auto_update, weather)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_id = None
+    return Response(
+        event_broker.stream(last_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@views.route('/api/public/events/poll', methods=['GET'])
+@limiter.exempt
+def public_events_poll():
+    """Long-Poll-Fallback für Clients ohne EventSource"""
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'events': [], 'last_id': event_broker.last_id}), 200
+
+    timeout = min(request.args.get('timeout', 25, type=float), 55)
+    events = event_broker.wait(since, timeout)
+    if events is None:
+        return jsonify({'events': [], 'last_id': event_broker.last_id, 'resync': True}), 200
+    return jsonify({'events': events, 'last_id': events[-1]['id'] if events else since}), 200
+
+@views.route('/api/public/pdfs/<int:number>.pdf', methods=['GET'])
 def public_pdf(number):
-    """Öffentlicher PDF-Endpoint für Frontend"""
-    if number not in TARGET_DIRS:
+    """Öffentlicher PDF-Endpoint für Frontend (ETag, Last-Modified, 304, Range)"""
+    svc = services()
+    if number not in svc.target_dirs:
         return "PDF not found", 404
     
-    target_dir = TARGET_DIRS[number]
+    target_dir = svc.target_dirs[number]
     file_path = os.path.join(target_dir, f'{number}.pdf')
     
-    if os.path.exists(file_path):
-        return send_file(file_path, mimetype='application/pdf')
-    else:
+    version = snapshot_cache.file_version(file_path)
+    if version is None:
         # Leere PDF senden wenn keine vorhanden
         return send_file('static/empty.pdf', mimetype='application/pdf') if os.path.exists('static/empty.pdf') else ("PDF not found", 404)
 
-@app.route('/toggle_auto_update', methods=['POST'])
+    with metrics.timer('dashboard_file_io_duration_seconds', op='pdf_open'), span('io', 'pdf_open'):
+        response = svc.file_delivery.send(file_path, 'application/pdf', etag=version.etag, last_modified=version.mtime)
+    # pdf.js entscheidet anhand dieses Headers, ob es Range-Requests nutzt
+    response.headers['Accept-Ranges'] = 'bytes'
+    if request.args.get('v') == version.etag:
+        # Versionierte URL: Inhalt ändert sich unter dieser URL nie mehr
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        # Unversionierte URL: immer revalidieren (günstige 304-Antwort)
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = None
+    return response
+
+@views.route('/api/public/pdfs/<int:number>/pages', methods=['GET'])
+def public_pdf_pages(number):
+    """Seitenzahl und Bild-URLs der vorab gerasterten Seiten eines Slots"""
+    svc = services()
+    if number not in svc.target_dirs:
+        return jsonify({'error': 'Invalid number provided'}), 404
+
+    file_path = os.path.join(svc.target_dirs[number], f'{number}.pdf')
+    version = snapshot_cache.file_version(file_path)
+    if version is None:
+        return jsonify({'error': 'PDF not found'}), 404
+    if not svc.render_pipeline.enabled:
+        return jsonify({'slot': number, 'version': version.etag, 'status': 'unavailable'}), 200
+
+    manifest = snapshot_cache.get(os.path.join(svc.render_pipeline.version_dir(number, version.etag), 'manifest.json'))
+    if manifest is None:
+        # z.B. PDFs aus der Zeit vor der Rasterung: jetzt nachholen
+        svc.render_pipeline.submit(number, file_path, version.etag)
+        return jsonify({'slot': number, 'version': version.etag, 'status': 'pending'}), 200
+
+    data = manifest.data
+    urls = {
+        width: [f"/api/public/pdfs/{number}/pages/{version.etag}/{width}/{page}.{data['format']}" for page in range(1, data['pages'] + 1)]
+        for width in data['widths']
+    }
+    return jsonify({
+        'slot': number,
+        'version': version.etag,
+        'status': 'ready',
+        'pages': data['pages'],
+        'widths': data['widths'],
+        'format': data['format'],
+        'urls': urls
+    }), 200
+
+@views.route('/api/public/pdfs/<int:number>/pages/<version>/<int:width>/<int:page>.<ext>', methods=['GET'])
+def public_pdf_page_image(number, version, width, page, ext):
+    """Gerasterte Seite; die URL enthält die Version und ist daher unveränderlich"""
+    svc = services()
+    if number not in svc.target_dirs or ext not in ('webp', 'png'):
+        return "Page not found", 404
+    image_path = os.path.join(svc.render_pipeline.version_dir(number, secure_filename(version)), str(width), f'{page}.{ext}')
+    if not os.path.exists(image_path):
+        return "Page not found", 404
+    response = svc.file_delivery.send(image_path, f'image/{ext}')
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
+
+@views.route('/assets/icons/<filename>', methods=['GET'])
+def icon_asset(filename):
+    """Wetter-Icons unter inhaltsgehashter URL, dürfen unbegrenzt gecacht werden"""
+    asset, current = get_icon_registry().lookup(filename)
+    if asset is None:
+        return "Icon not found", 404
+    if not current:
+        # Veralteter Hash (z.B. alte wetterdaten.json): auf die aktuelle URL umleiten
+        return redirect(asset.url, code=301)
+
+    if request.if_none_match.contains(asset.digest):
+        response = Response(status=304)
+    else:
+        response = Response(asset.data, status=200, mimetype='image/png')
+    response.set_etag(asset.digest)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
+
+@views.route('/toggle_auto_update', methods=['POST'])
 def toggle_auto_update():
+    svc = services()
     if not request.json or 'auto_update' not in request.json:
         return jsonify({'error': 'No auto_update status provided'}), 400
     auto_update = request.json['auto_update']
@@ -303,34 +1227,91 @@ def toggle_auto_update():
         return jsonify({'error': 'auto_update should be a boolean'}), 400
 
     try:
-        with open(f'{TARGET_DIR}/output/auto_update_status.json', 'w', encoding='utf-8') as f:
-            json.dump({'auto_update': auto_update}, f, ensure_ascii=False, indent=4)
+        snapshot_cache.write_json(f'{svc.output_dir}/auto_update_status.json', {'auto_update': auto_update}, ensure_ascii=False)
+        event_broker.publish('auto_update', {'auto_update': auto_update})
+        svc.weather_scheduler.wake()
         return jsonify({'message': 'Auto-update status toggled successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route("/pdf_belegt", methods=['GET'])
+@views.route("/pdf_belegt", methods=['GET'])
 def pdf_belegt():
-    pdf_files = []
-    target_dir = f'{TARGET_DIR}/pdfs'
-    if os.path.exists(target_dir):
-        for file in os.listdir(target_dir):
-            if file.endswith('.pdf'):
-                pdf_files.append(file)
-    print(pdf_files)
+    pdf_files = [f'{number}.pdf' for number in services().slot_manifest.current()['slots']]
+    current_app.logger.debug(f"Belegte PDFs: {pdf_files}")
 
     return jsonify({'pdf_files': pdf_files}), 200
-@app.route('/debug_info')
+
+@views.route('/metrics', methods=['GET'])
+@limiter.exempt
+def prometheus_metrics():
+    """Metriken im Prometheus-Textformat (optional mit METRICS_TOKEN geschützt)"""
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@views.route('/cache_stats', methods=['GET'])
+@login_required
+def cache_stats():
+    """Trefferquote des Snapshot-Caches (Dateisystem raus aus dem Hot-Path?)"""
+    stats = snapshot_cache.stats()
+    stats['compression'] = services().compressor.cache.stats()
+    stats['weather_history'] = services().weather_history.stats()
+    store = services().shared_store
+    stats['shared_state'] = {
+        'backend': store.backend,
+        'path': store.path,
+        'limiter_storage': current_app.config['RATELIMIT_STORAGE_URI'].split('://', 1)[0],
+        'scheduler_leader': services().weather_scheduler.status()['leader'],
+        'pid': os.getpid()
+    }
+    return jsonify(stats), 200
+
+@views.route('/profiling', methods=['GET', 'POST'])
+@login_required
+def profiling_settings():
+    """
+    Request-Profiling: Einstellung und neueste Profile (GET) bzw. umschalten (POST,
+    sample_rate 0..1, route z.B. /api/public/pdfs/*, mode spans|cprofile|sampling,
+    duration in Sekunden). sample_rate 0 schaltet aus.
+    """
+    profiler = services().profiler
+    if request.method == 'GET':
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify({'settings': profiler.settings(), 'profiles': profiler.recent(limit)}), 200
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No JSON data provided'}), 400
+    try:
+        settings = profiler.configure(**{key: data[key] for key in ('sample_rate', 'route', 'mode', 'duration') if key in data})
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    current_app.logger.info(f"Profiling: Anteil {settings['sample_rate']}, Route {settings['route'] or 'alle'}, Modus {settings['mode']}")
+    return jsonify({'settings': settings}), 200
+
+@views.route('/profiling/<name>', methods=['GET'])
+@login_required
+def profiling_file(name):
+    """Ein Profil (<id>.json) oder sein Dump (<id>.prof, <id>.stacks.txt) herunterladen"""
+    path = services().profiler.file_path(name)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if name.endswith('.json'):
+        return send_file(path, mimetype='application/json', max_age=0)
+    return send_file(path, as_attachment=True, download_name=name, max_age=0)
+
+@views.route('/debug_info')
 def debug_info():
     """Debug-Informationen (nur in Development)"""
-    if flask_env != 'development':
+    if current_app.config['FLASK_ENV'] != 'development':
         return "Debug-Informationen nur in Development verfügbar", 403
     
     info = {
-        'flask_env': flask_env,
-        'password_configured': DASHBOARD_PASSWORD,
+        'flask_env': current_app.config['FLASK_ENV'],
+        'password_configured': current_app.config['DASHBOARD_PASSWORD'],
         'csrf_enabled': True,
-        'target_dir': TARGET_DIR,
+        'target_dir': services().target_dir,
         'session_authenticated': session.get('authenticated', False),
         'remote_addr': request.remote_addr
     }
@@ -342,8 +1323,10 @@ def debug_info():
     <p><a href="/simple_login">Einfaches Login</a></p>
     """
 
-@app.route('/error', methods=['GET'])
+@views.route('/error', methods=['GET'])
 def log_error():
+    import requests  # nur für diesen Test-Endpoint, nicht beim Start laden
+
     url = "http://100.104.101.101:5000/error"
     headers = {
         "Content-Type": "application/json",
@@ -352,11 +1335,18 @@ def log_error():
     data = {"error": "Das ist ein Testfehler"}
 
     response = requests.post(url, json=data, headers=headers)
-    print(response.json())
+    current_app.logger.info(f"Testfehler gemeldet: {response.json()}")
     return jsonify({'message': 'Error logged successfully'}), 200
 
-def setup_logging():
-    """Konfiguriert das Logging für Produktion und Development"""
+def setup_logging(app: Flask):
+    """
+    Konfiguriert das Logging für Produktion und Development. Datei und Konsole
+    hängen am Listener-Thread von log_pipeline; Request-Threads legen Einträge
+    nur in die Queue (bei voller Queue wird verworfen, nie blockiert).
+    """
+    if log_pipeline.handler is not None:
+        return  # prozessweit, bei weiteren create_app() nicht doppelt anhängen
+    flask_env = app.config['FLASK_ENV']
     log_level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper())
     
     # Log-Verzeichnis erstellen
@@ -373,7 +1363,7 @@ def setup_logging():
         except (PermissionError, OSError):
             pass  # Ignoriere Fehler beim Löschen
     
-    # Rotating File Handler
+    # Rotating File Handler (rotiert im Listener-Thread, nicht im Request)
     max_bytes = int(os.getenv('MAX_LOG_SIZE', 10485760))  # 10MB
     backup_count = int(os.getenv('LOG_BACKUP_COUNT', 5))
     
@@ -393,31 +1383,29 @@ def setup_logging():
         formatter = logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         )
-    handler.setFormatter(formatter)
-    
-    # App Logger
-    app.logger.addHandler(handler)
-    app.logger.setLevel(log_level)
+    # Datei standardmäßig als JSON-Zeilen (LOG_FORMAT=text für das alte Format)
+    handler.setFormatter(JsonFormatter() if os.getenv('LOG_FORMAT', 'json') == 'json' else formatter)
+    handlers = [handler]
     
     # Console Handler nur in Development
     if flask_env != 'production':
         console_handler = logging.StreamHandler()
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
-        app.logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
-    # Werkzeug Logger
-    werkzeug_logger = logging.getLogger('werkzeug')
-    werkzeug_logger.setLevel(log_level)
-    werkzeug_logger.addHandler(handler)
+    # Root-Logger: App, Werkzeug, Zugriffs-Log und Module (wetterdaten, weather_client, ...)
+    log_pipeline.configure(handlers, queue_size=int(os.getenv('LOG_QUEUE_SIZE', 10000)), level=log_level)
+    app.logger.setLevel(log_level)
+    logging.getLogger('werkzeug').setLevel(log_level)
     
     app.logger.info(f"Logging konfiguriert - Umgebung: {flask_env}")
 
-def create_directories():
+def create_directories(target_dir: str, flask_env: str):
     """Erstellt erforderliche Verzeichnisse"""
     directories = [
-        f'{TARGET_DIR}/pdfs',
-        f'{TARGET_DIR}/output'
+        f'{target_dir}/pdfs',
+        f'{target_dir}/output'
     ]
     
     for directory in directories:
@@ -426,16 +1414,15 @@ def create_directories():
     if flask_env == 'production':
         os.makedirs('/var/log/feuerwehr_dashboard', exist_ok=True)
 
-# Initialisierung
-create_directories()
-setup_logging()
+if __name__ == '__main__':
+    app = create_app()
+    flask_env = app.config['FLASK_ENV']
 
-def graceful_shutdown(signum: int, frame: Any) -> None:
-    """Graceful shutdown handler für Produktion"""
-    app.logger.info("Graceful shutdown initiiert")
-    sys.exit(0)
+    def graceful_shutdown(signum: int, frame: Any) -> None:
+        """Graceful shutdown handler für Produktion"""
+        app.logger.info("Graceful shutdown initiiert")
+        sys.exit(0)
 
-if __name__ == '__main__':
     # Signal Handler für graceful shutdown
     if flask_env == 'production':
         signal.signal(signal.SIGTERM, graceful_shutdown)
@@ -447,6 +1434,10 @@ if __name__ == '__main__':
     debug = flask_env != 'production'
     
     app.logger.info(f"Starte Feuerwehr Dashboard - Umgebung: {flask_env}")
+
+    # Beim Reloader nur im eigentlichen Server-Prozess starten
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_scheduler(app)
     
     try:
         if flask_env == 'production':
@@ -464,9 +1455,10 @@ if __name__ == '__main__':
         error_url = os.getenv('ERROR_REPORTING_URL')
         if error_url:
             try:
+                import requests
                 requests.post(error_url, json={"error": str(e)}, timeout=5)
                 app.logger.info("Fehler wurde an Monitoring-System gesendet")
             except Exception:
                 app.logger.warning("Fehler-Reporting fehlgeschlagen")
         
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Alle sechs Slots tauschen (Schichtwechsel): bisheriger Ablauf mit sechs
+aufeinanderfolgenden POST /upload gegen einen POST /upload/bulk (einzelne
+PDFs bzw. ein ZIP). Gemessen wird die Zeit bis zur letzten Antwort und wie
+viele Manifest-Stände die Bildschirme dabei sehen können (sequentiell ist
+jeder Zwischenstand ein Gemisch aus alter und neuer Schicht).
+
+Die Anfragen laufen über HTTP gegen einen werkzeug-Server im selben Prozess.
+``--rtt-ms`` und ``--mbit`` bilden das Netz zwischen Admin-Rechner und
+Anzeige-Rechner nach (Wartezeit vor jedem Request bzw. je übertragenem Byte).
+
+    python benchmarks/bench_bulk_upload.py --rounds 5
+    python benchmarks/bench_bulk_upload.py --rtt-ms 40 --mbit 50 --scan-dpi 200
+"""
+
+import argparse
+import io
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Any, Dict, List
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_fixtures import make_scan_pdf  # noqa: E402
+
+SLOTS = 6
+
+
+class Network:
+    """Wartezeit je Request (RTT) plus Übertragungsdauer der hochgeladenen Bytes."""
+
+    def __init__(self, rtt_ms: float, mbit: float) -> None:
+        self.rtt = rtt_ms / 1000
+        self.bytes_per_second = mbit * 1e6 / 8 if mbit > 0 else 0
+
+    def send(self, size: int) -> None:
+        delay = self.rtt + (size / self.bytes_per_second if self.bytes_per_second else 0)
+        if delay:
+            time.sleep(delay)
+
+
+def sequential(session: requests.Session, url: str, files: Dict[int, bytes], network: Network) -> None:
+    for number, data in files.items():
+        network.send(len(data))
+        response = session.post(f'{url}/upload', data={'number': number},
+                                files={'file': (f'{number}.pdf', data, 'application/pdf')})
+        response.raise_for_status()
+
+
+def bulk(session: requests.Session, url: str, files: Dict[int, bytes], network: Network) -> None:
+    network.send(sum(len(data) for data in files.values()))
+    response = session.post(f'{url}/upload/bulk', files=[
+        (f'file_{number}', (f'{number}.pdf', data, 'application/pdf')) for number, data in files.items()
+    ])
+    response.raise_for_status()
+
+
+def bulk_zip(session: requests.Session, url: str, archive: bytes, network: Network) -> None:
+    network.send(len(archive))
+    response = session.post(f'{url}/upload/bulk', files={'files': ('schicht.zip', archive, 'application/zip')})
+    response.raise_for_status()
+
+
+def make_zip(files: Dict[int, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for number, data in files.items():
+            archive.writestr(f'{number}_Aushang.pdf', data)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5, help='Schichtwechsel je Variante')
+    parser.add_argument('--scan-dpi', type=int, default=150, help='Auflösung der Test-Scans (Dateigröße)')
+    parser.add_argument('--rtt-ms', type=float, default=0.0)
+    parser.add_argument('--mbit', type=float, default=0.0, help='Upload-Bandbreite, 0 = unbegrenzt')
+    parser.add_argument('--workers', type=int, default=4, help='BULK_UPLOAD_WORKERS')
+    args = parser.parse_args()
+
+    import API_backend
+    from werkzeug.serving import make_server
+
+    target_dir = tempfile.mkdtemp(prefix='ff_bulk_')
+    try:
+        app = API_backend.create_app({
+            'TARGET_DIR': target_dir, 'LOG_TO_FILE': False, 'WEATHER_SCHEDULER': False,
+            'PDF_OPTIMIZE_WORKERS': 0, 'PDF_RENDER_WIDTHS': [], 'SLOT_COUNT': SLOTS,
+            'WTF_CSRF_ENABLED': False, 'RATELIMIT_ENABLED': False, 'BULK_UPLOAD_WORKERS': args.workers
+        })
+        manifest = app.extensions['dashboard'].slot_manifest
+        writes = [0]
+        write = manifest._write
+
+        def counted_write(slots: Dict[str, Any]) -> Dict[str, Any]:
+            writes[0] += 1
+            return write(slots)
+        manifest._write = counted_write
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        url = f'http://127.0.0.1:{server.server_port}'
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        session = requests.Session()
+        session.post(url + '/', data={'password': app.config['DASHBOARD_PASSWORD']}).raise_for_status()
+        network = Network(args.rtt_ms, args.mbit)
+
+        # Zwei Schichten im Wechsel, damit jede Runde alle Slots ändert
+        shifts = [{number: make_scan_pdf(f'Schicht {shift} Slot {number}', dpi=args.scan_dpi)
+                   for number in range(1, SLOTS + 1)} for shift in ('A', 'B')]
+        archives = [make_zip(files) for files in shifts]
+        variants = {
+            'sequentiell (6x /upload)': lambda i: sequential(session, url, shifts[i % 2], network),
+            'bulk, multipart': lambda i: bulk(session, url, shifts[i % 2], network),
+            'bulk, ZIP': lambda i: bulk_zip(session, url, archives[i % 2], network)
+        }
+        results: List[Dict[str, Any]] = []
+        round_index = 0
+        for label, run in variants.items():
+            durations = []
+            writes[0] = 0
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                run(round_index)
+                durations.append(time.perf_counter() - started)
+                round_index += 1
+            results.append({
+                'label': label,
+                'median_ms': statistics.median(durations) * 1000,
+                'min_ms': min(durations) * 1000,
+                'manifest_writes': writes[0] / args.rounds
+            })
+        server.shutdown()
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    size = sum(len(data) for data in shifts[0].values())
+    print(f"{SLOTS} Slots, zusammen {size / 1e6:.1f} MB, {args.rounds} Runden, RTT {args.rtt_ms:g} ms, "
+          f"{'unbegrenzt' if not args.mbit else f'{args.mbit:g} Mbit/s'}, {args.workers} Worker")
+    print(f"{'Variante':<26} {'Median ms':>10} {'Min ms':>8} {'Manifest-Stände':>16}")
+    for r in results:
+        print(f"{r['label']:<26} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} {r['manifest_writes']:>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
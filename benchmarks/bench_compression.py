@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Bytes und Server-CPU pro Kiosk-Aktualisierung mit und ohne Komprimierung
+(compression.py).
+
+Ein Zyklus entspricht dem, was ein Bildschirm lädt: die Seite
+(static/index.html, script.js, styles.css) und die Daten (snapshot, weather,
+forecast, info, pdf_status). Die Wetterdaten stammen aus dem
+OpenWeatherMap-Stub (benchmarks/owm_stub.py). Verglichen werden:
+
+- identity: ohne Accept-Encoding (bisheriges Verhalten)
+- gzip / br: mit Cache der Varianten (br nur mit installiertem brotli)
+- gzip ohne Cache: jede Antwort neu komprimiert (zeigt, was der Cache spart)
+
+Die CPU-Zeit ist die des ganzen Requests im Prozess (Flask-Testclient).
+
+    python benchmarks/bench_compression.py --cycles 200
+    python benchmarks/bench_compression.py --data-only      # nur die Daten-Endpoints
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from owm_stub import current_payload, forecast_payload  # noqa: E402
+
+PAGE = ('/static/index.html', '/static/js/script.js', '/static/css/styles.css')
+DATA = ('/api/public/snapshot', '/api/public/weather', '/api/public/forecast', '/api/public/info',
+        '/api/public/pdf_status')
+
+
+def build_app(target_dir: str, cache_mb: float):
+    import API_backend
+    import wetterdaten
+
+    output_dir = os.path.join(target_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    wetterdaten.save_weather_data(current_payload('Glienicke/Nordbahn'), os.path.join(output_dir, 'wetterdaten.json'))
+    wetterdaten.save_weather_forecast(forecast_payload('Glienicke/Nordbahn'), os.path.join(output_dir, 'wettervorhersage.json'))
+    return API_backend.create_app({
+        'TARGET_DIR': target_dir, 'LOG_TO_FILE': False, 'WEATHER_SCHEDULER': False,
+        'PDF_OPTIMIZE_WORKERS': 0, 'COMPRESS_CACHE_MB': cache_mb
+    })
+
+
+def run(app, encoding: str, paths: Tuple[str, ...], cycles: int) -> Dict[str, Any]:
+    client = app.test_client()
+    headers = {'Accept-Encoding': encoding} if encoding != 'identity' else {}
+    for path in paths:
+        client.get(path, headers=headers)  # Caches füllen wie nach warm_up()
+
+    transferred = 0
+    started = time.process_time()
+    for _ in range(cycles):
+        for path in paths:
+            response = client.get(path, headers=headers)
+            transferred += len(response.data)
+    cpu = time.process_time() - started
+    return {'bytes': transferred / cycles, 'cpu_ms': cpu / cycles * 1000}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--data-only', action='store_true', help='ohne Seite/JS/CSS (Bildschirm läuft schon)')
+    args = parser.parse_args()
+
+    from compression import available_encodings
+
+    paths = DATA if args.data_only else PAGE + DATA
+    target_dir = tempfile.mkdtemp(prefix='ff_compress_')
+    cwd = os.getcwd()
+    os.chdir(target_dir)  # app.log o.ä. nicht im Projekt anlegen
+    try:
+        cached = build_app(target_dir, cache_mb=32)
+        uncached = build_app(target_dir, cache_mb=0)
+        variants: List[Tuple[str, Any, str]] = [('identity', cached, 'identity')]
+        for encoding in reversed(available_encodings()):
+            variants.append((encoding, cached, encoding))
+        variants.append(('gzip ohne Cache', uncached, 'gzip'))
+        results = [(label, run(app, encoding, paths, args.cycles)) for label, app, encoding in variants]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    baseline = results[0][1]
+    print(f"{len(paths)} Anfragen pro Zyklus, {args.cycles} Zyklen; Kodierungen: {', '.join(available_encodings())}")
+    print(f"{'Variante':<16} {'Bytes/Zyklus':>13} {'gespart':>8} {'CPU ms/Zyklus':>14}")
+    for label, r in results:
+        saved = 1 - r['bytes'] / baseline['bytes']
+        print(f"{label:<16} {r['bytes']:>13.0f} {saved:>7.1%} {r['cpu_ms']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
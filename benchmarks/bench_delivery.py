@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Vergleich der Auslieferungs-Modi (FILE_DELIVERY_MODE) für das Nachladen
+aller sechs PDF-Slots, wie es static/js/script.js nach einer Änderung macht.
+
+Pro Modus wird Gunicorn (Standard: sync-Worker) gegen ein temporäres
+Zielverzeichnis gestartet. In jeder Runde laden alle Bildschirme gleichzeitig
+die sechs Slot-PDFs (bis zu sechs parallele Verbindungen pro Bildschirm wie
+im Browser). Gemessen werden Durchsatz, Latenz und die Belegung der Worker
+(CPU-Zeit der Worker-Prozesse pro Anfrage und Anteil an der Laufzeit).
+
+x-accel-redirect läuft über nginx, falls installiert (sonst direkt: dann
+misst der Benchmark nur den Python-Anteil, die Bytes würde der Webserver
+senden). x-sendfile wird immer direkt gemessen.
+
+    python benchmarks/bench_delivery.py --screens 10 --rounds 5 --pdf-kb 2048
+    python benchmarks/bench_delivery.py --modes python sendfile --worker-class gthread
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from pdf_fixtures import make_pdf  # noqa: E402
+
+SLOTS = range(1, 7)
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+NGINX_CONF = """
+worker_processes 1;
+daemon off;
+pid {dir}/nginx.pid;
+error_log {dir}/nginx-error.log;
+events {{ worker_connections 1024; }}
+http {{
+    access_log off;
+    sendfile on;
+    client_body_temp_path {dir}/nginx-body;
+    proxy_temp_path {dir}/nginx-proxy;
+    server {{
+        listen 127.0.0.1:{port};
+        location /protected/ {{
+            internal;
+            alias {target}/;
+        }}
+        location / {{
+            proxy_pass http://127.0.0.1:{upstream};
+        }}
+    }}
+}}
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/public/info')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server auf Port {port} nicht erreichbar')
+
+
+def children(pid: int) -> List[int]:
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def cpu_seconds(pids: List[int]) -> float:
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+        except OSError:
+            pass
+    return total / CLOCK_TICKS
+
+
+def fetch(port: int, slot: int) -> Tuple[float, int, int]:
+    started = time.perf_counter()
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', f'/api/public/pdfs/{slot}.pdf')
+        response = conn.getresponse()
+        size = len(response.read())
+        return time.perf_counter() - started, response.status, size
+    except (OSError, http.client.HTTPException):
+        return time.perf_counter() - started, 0, 0
+    finally:
+        conn.close()
+
+
+def run_mode(mode: str, args: argparse.Namespace, target_dir: str, nginx: Optional[str]) -> Dict[str, Any]:
+    port = free_port()
+    env = dict(os.environ, zielverzeichnis=target_dir, FILE_DELIVERY_MODE=mode,
+               WEATHER_SCHEDULER='false', PDF_RENDER_WORKERS='0', METRICS_FLUSH_SECONDS='60')
+    command = [
+        sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+        '--worker-class', args.worker_class, '--workers', str(args.workers), '--threads', str(args.threads),
+        '--pythonpath', PROJECT_DIR, '--log-level', 'warning', 'wsgi:app'
+    ]
+    gunicorn = subprocess.Popen(command, cwd=target_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    front = None
+    client_port = port
+    try:
+        wait_ready(port)
+        if mode == 'x-accel-redirect' and nginx:
+            client_port = free_port()
+            conf_dir = tempfile.mkdtemp(prefix='ff_nginx_')
+            with open(os.path.join(conf_dir, 'nginx.conf'), 'w') as f:
+                f.write(NGINX_CONF.format(dir=conf_dir, port=client_port, target=target_dir, upstream=port))
+            front = subprocess.Popen([nginx, '-c', os.path.join(conf_dir, 'nginx.conf'), '-p', conf_dir],
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            wait_ready(client_port)
+
+        workers = children(gunicorn.pid)
+        for slot in SLOTS:  # Aufwärmen (Hash-Cache, Imports)
+            fetch(client_port, slot)
+        cpu_before = cpu_seconds(workers)
+        latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        total_bytes = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.screens * 6) as pool:
+            for _ in range(args.rounds):
+                burst = [pool.submit(fetch, client_port, slot) for _ in range(args.screens) for slot in SLOTS]
+                for future in burst:
+                    seconds, status, size = future.result()
+                    latencies.append(seconds)
+                    statuses[status] = statuses.get(status, 0) + 1
+                    total_bytes += size
+        elapsed = time.perf_counter() - started
+        worker_cpu = cpu_seconds(workers) - cpu_before
+    finally:
+        if front is not None:
+            front.terminate()
+            front.wait()
+        gunicorn.terminate()
+        gunicorn.wait()
+
+    latencies.sort()
+    requests_total = len(latencies)
+    return {
+        'mode': mode,
+        'front': 'nginx' if front is not None else 'direkt',
+        'requests': requests_total,
+        'status': {str(k): v for k, v in sorted(statuses.items())},
+        'rps': round(requests_total / elapsed, 1),
+        'mb_per_s': round(total_bytes / elapsed / 1e6, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        'worker_cpu_ms_per_request': round(worker_cpu / requests_total * 1000, 3),
+        'worker_busy_share': round(worker_cpu / (elapsed * args.workers), 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['python', 'sendfile', 'x-accel-redirect', 'x-sendfile'])
+    parser.add_argument('--screens', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--pdf-kb', type=int, default=1024)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    nginx = shutil.which('nginx')
+    target_dir = tempfile.mkdtemp(prefix='ff_delivery_')
+    os.makedirs(os.path.join(target_dir, 'pdfs'))
+    os.makedirs(os.path.join(target_dir, 'output'))
+    for slot in SLOTS:
+        with open(os.path.join(target_dir, 'pdfs', f'{slot}.pdf'), 'wb') as f:
+            f.write(make_pdf(f'Slot {slot}', pad_kb=args.pdf_kb))
+
+    try:
+        results = [run_mode(mode, args, target_dir, nginx) for mode in args.modes]
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({'screens': args.screens, 'rounds': args.rounds, 'pdf_kb': args.pdf_kb,
+                          'workers': args.workers, 'worker_class': args.worker_class, 'results': results}, indent=2))
+        return
+    print(f"{args.screens} Bildschirme × 6 Slots × {args.rounds} Runden, {args.pdf_kb} kB pro PDF, "
+          f"{args.workers} {args.worker_class}-Worker")
+    print(f"{'Modus':<18} {'Front':<7} {'req/s':>8} {'MB/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'CPU ms/req':>11} {'belegt':>7}")
+    for r in results:
+        print(f"{r['mode']:<18} {r['front']:<7} {r['rps']:>8} {r['mb_per_s']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['worker_cpu_ms_per_request']:>11} {r['worker_busy_share'] * 100:>6.1f}%")
+    if not nginx and 'x-accel-redirect' in args.modes:
+        print("nginx nicht gefunden: x-accel-redirect direkt gemessen (nur Python-Anteil, ohne Datei-Bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Aufwand eines Anzeige-Bildschirms pro Stunde, ohne Browser.
+
+benchmarks/display_harness.js führt den Anzeige-Client (static/js/script.js)
+unter Node mit virtueller Uhr gegen einen echten Testserver aus. DOM, Canvas,
+pdf.js und createImageBitmap sind Attrappen, die die Arbeit des Browsers
+zählen: PDFs parsen, Seiten rastern, Bilder dekodieren, zeichnen. Während der
+Stunde werden Slots ausgetauscht (--changes) und einmal die Fenstergröße
+geändert (--resizes). Die Beispiel-PDFs sind eingescannte Aushänge in der
+Auflösung nach der PDF-Optimierung (--fixture scan, --dpi 150).
+
+Die CPU-Zeit pro Stunde setzt sich zusammen aus der gemessenen JS-Zeit des
+Clients (inkl. HTTP) und den gezählten Operationen, bepreist mit hier
+gemessenen Kosten gleichwertiger Arbeit: PyMuPDF für Parsen und Rastern,
+Pillow für Dekodieren, skaliertes Zeichnen und 1:1-Kopien. Browser-Engines (pdf.js,
+GPU-Canvas) liegen absolut anders, das Verhältnis der Varianten bleibt
+aussagekräftig.
+
+    python benchmarks/bench_display.py                       # gerasterte Seiten (webp)
+    python benchmarks/bench_display.py --mode pdfjs          # ohne Rasterung: pdf.js im Browser
+    git show <rev>:static/js/script.js > /tmp/alt.js
+    python benchmarks/bench_display.py --script /tmp/alt.js --script static/js/script.js
+
+Benötigt node im PATH; PyMuPDF und Pillow für die Rasterung und die Kostenschätzung.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from owm_stub import current_payload, forecast_payload  # noqa: E402
+from pdf_fixtures import make_pdf, make_scan_pdf  # noqa: E402
+
+HARNESS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'display_harness.js')
+RENDER_WIDTHS = [640, 1280]
+
+
+def fixture_pdf(label: str, pages: int, args: argparse.Namespace) -> bytes:
+    if args.fixture == 'scan':
+        return make_scan_pdf(label, pages=pages, dpi=args.dpi)
+    return make_pdf(label, pad_kb=args.pad_kb, pages=pages)
+
+
+class BenchServer:
+    """App mit Beispiel-Slots und Wetterdaten hinter einem werkzeug-Server in einem Thread."""
+
+    def __init__(self, target_dir: str, pages: List[int], args: argparse.Namespace) -> None:
+        import API_backend
+        import wetterdaten
+        from werkzeug.serving import make_server
+
+        self.mode = args.mode
+        self.args = args
+        self.changes = 0
+        output_dir = os.path.join(target_dir, 'output')
+        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(os.path.join(target_dir, 'pdfs'), exist_ok=True)
+        wetterdaten.save_weather_data(current_payload('Glienicke/Nordbahn'), os.path.join(output_dir, 'wetterdaten.json'))
+        wetterdaten.save_weather_forecast(forecast_payload('Glienicke/Nordbahn'), os.path.join(output_dir, 'wettervorhersage.json'))
+        for number, count in enumerate(pages, 1):
+            with open(os.path.join(target_dir, 'pdfs', f'{number}.pdf'), 'wb') as f:
+                f.write(fixture_pdf(f'Slot {number}', count, args))
+
+        self.app = API_backend.create_app({
+            'TARGET_DIR': target_dir, 'LOG_TO_FILE': False, 'WEATHER_SCHEDULER': False,
+            'PDF_OPTIMIZE_WORKERS': 0, 'SLOT_COUNT': len(pages),
+            'PDF_RENDER_WIDTHS': RENDER_WIDTHS if self.mode == 'images' else []
+        })
+        self.services = self.app.extensions['dashboard']
+        for number in range(1, len(pages) + 1):
+            self.render(number)
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        self.server = make_server('127.0.0.1', 0, self.app, threaded=True)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def render(self, number: int) -> bool:
+        """Seiten synchron rastern (sonst erledigt das der Worker-Pool nach dem Upload)."""
+        if self.mode != 'images':
+            return False
+        from pdf_render import render_pdf
+
+        pipeline = self.services.render_pipeline
+        entry = self.services.slot_manifest.entry(number)
+        out_dir = pipeline.version_dir(number, entry['version'])
+        os.makedirs(os.path.dirname(out_dir), exist_ok=True)
+        return render_pdf(self.services.slot_manifest.slot_path(number), entry['version'], out_dir,
+                          pipeline.widths, pipeline.format) is not None
+
+    def replace(self, number: int) -> bool:
+        """Neues PDF in einen Slot, wie nach einem Upload."""
+        from snapshot_cache import snapshot_cache
+
+        self.changes += 1
+        path = self.services.slot_manifest.slot_path(number)
+        with open(path, 'wb') as f:
+            f.write(fixture_pdf(f'Slot {number} / Stand {self.changes}', 2, self.args))
+        snapshot_cache.invalidate(path)
+        self.services.slot_manifest.update(number, filename=f'aushang-{self.changes}.pdf')
+        return self.render(number)
+
+    def close(self) -> None:
+        self.server.shutdown()
+
+
+def run_display(script: str, live: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    pages = [int(p) for p in args.pages.split(',')]
+    target_dir = tempfile.mkdtemp(prefix='ff_display_')
+    cwd = os.getcwd()
+    os.chdir(target_dir)  # app.log o.ä. nicht im Projekt anlegen
+    server = None
+    try:
+        server = BenchServer(target_dir, pages, args)
+        options = {
+            'base': server.url, 'script': os.path.abspath(os.path.join(cwd, script)),
+            'seconds': args.hours * 3600, 'live': live, 'group': None,
+            'canvases': len(pages), 'width': args.width, 'height': args.height,
+            'changes': [[float(at), int(slot)] for at, slot in (c.split(':') for c in args.changes.split(',') if c)],
+            'resizes': [float(at) for at in args.resizes.split(',') if at]
+        }
+        process = subprocess.Popen([args.node, HARNESS, json.dumps(options)], stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, text=True, bufsize=1)
+        server_cpu = time.process_time()
+        change_cpu = 0.0
+        result = None
+        for line in process.stdout:
+            command, _, value = line.strip().partition(' ')
+            if command == 'change':
+                started = time.process_time()
+                rendered = server.replace(int(value))
+                change_cpu += time.process_time() - started
+                process.stdin.write('ok rendered\n' if rendered else 'ok\n')
+                process.stdin.flush()
+            elif command == 'result':
+                result = json.loads(value)
+        process.wait()
+        if result is None:
+            raise RuntimeError(f'display_harness.js beendet mit Code {process.returncode}')
+        # Server-CPU ohne das Austauschen/Rastern der Slots (das fällt bei jedem Client gleich an)
+        result['server_cpu_ms'] = (time.process_time() - server_cpu - change_cpu) * 1000
+        return result
+    finally:
+        if server is not None:
+            server.close()
+        os.chdir(cwd)
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+
+def _best(call, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        call()
+        timings.append(time.process_time() - started)
+    return min(timings)
+
+
+def unit_costs(args: argparse.Namespace) -> Optional[Dict[str, float]]:
+    """CPU-Sekunden je PDF-Parsen und je Megapixel Rastern/Dekodieren/Skalieren/Kopieren."""
+    try:
+        import fitz  # PyMuPDF
+        from PIL import Image
+    except ImportError:
+        return None
+
+    data = fixture_pdf('Aushang', 1, args)
+
+    def parse() -> None:
+        with fitz.open(stream=data, filetype='pdf') as doc:
+            for page in doc:
+                page.bound()
+
+    with fitz.open(stream=data, filetype='pdf') as doc:
+        page = doc[0]
+        scale = min(args.width / page.rect.width, args.height / page.rect.height)
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
+        raster = _best(lambda: page.get_pixmap(matrix=fitz.Matrix(scale, scale))) / (pixmap.width * pixmap.height / 1e6)
+
+        large = page.get_pixmap(matrix=fitz.Matrix(RENDER_WIDTHS[-1] / page.rect.width, RENDER_WIDTHS[-1] / page.rect.width))
+        image = Image.frombytes('RGB', (large.width, large.height), large.samples)
+    encoded = io.BytesIO()
+    image.save(encoded, 'WEBP', quality=80)
+    webp = encoded.getvalue()
+
+    def decode() -> None:
+        with Image.open(io.BytesIO(webp)) as decoded:
+            decoded.load()
+
+    size = (pixmap.width, pixmap.height)
+    return {
+        'parse': _best(parse),
+        'raster': raster,
+        'decode': _best(decode) / (image.width * image.height / 1e6),
+        'scale': _best(lambda: image.resize(size, Image.BILINEAR)) / (size[0] * size[1] / 1e6),
+        'copy': _best(lambda: image.copy()) / (image.width * image.height / 1e6)
+    }
+
+
+def estimate(result: Dict[str, Any], costs: Optional[Dict[str, float]]) -> Optional[float]:
+    """Geschätzte CPU-Sekunden des Bildschirms: JS-Zeit plus bepreiste Browser-Arbeit."""
+    if costs is None:
+        return None
+    return (result['cpu_ms'] / 1000 + result['pdf_parses'] * costs['parse']
+            + result['raster_pixels'] / 1e6 * costs['raster'] + result['decode_pixels'] / 1e6 * costs['decode']
+            + result['scale_pixels'] / 1e6 * costs['scale'] + result['copy_pixels'] / 1e6 * costs['copy'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', action='append', help='Client-Skript (mehrfach zum Vergleich)')
+    parser.add_argument('--mode', choices=('images', 'pdfjs'), default='images',
+                        help='images: vom Server gerasterte Seiten; pdfjs: PDF_RENDER_WIDTHS leer')
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--pages', default='1,2,3,1,2,3', help='Seiten je Slot (Anzahl = Slots)')
+    parser.add_argument('--fixture', choices=('scan', 'text'), default='scan', help='Art der Beispiel-PDFs')
+    parser.add_argument('--dpi', type=int, default=150, help='Auflösung der eingescannten Beispiel-PDFs')
+    parser.add_argument('--pad-kb', type=int, default=512, help='Dateigröße der Text-PDFs (--fixture text)')
+    parser.add_argument('--changes', default='1200:2,2400:5', help='Slot-Wechsel als Sekunde:Slot')
+    parser.add_argument('--resizes', default='1800', help='Größenänderungen (Sekunden)')
+    parser.add_argument('--width', type=int, default=890, help='Größe eines PDF-Containers (styles.css)')
+    parser.add_argument('--height', type=int, default=1284)
+    parser.add_argument('--transport', choices=('both', 'live', 'polling'), default='both')
+    parser.add_argument('--node', default=shutil.which('node') or 'node')
+    args = parser.parse_args()
+
+    scripts = args.script or [os.path.join(ROOT, 'static', 'js', 'script.js')]
+    transports = {'both': (True, False), 'live': (True,), 'polling': (False,)}[args.transport]
+    costs = unit_costs(args)
+
+    rows: List[Tuple[str, Dict[str, Any]]] = []
+    for script in scripts:
+        for live in transports:
+            label = f"{os.path.basename(script)} {'SSE' if live else 'Polling'}"
+            rows.append((label, run_display(script, live, args)))
+
+    print(f"{args.hours:g} h, {len(args.pages.split(','))} Slots (Seiten {args.pages}, {args.fixture}), Modus {args.mode}, "
+          f"Wechsel {args.changes or '-'}, Größenänderung {args.resizes or '-'}")
+    if costs is not None:
+        print(f"Kosten: Parsen {costs['parse'] * 1000:.2f} ms/PDF, Rastern {costs['raster'] * 1000:.1f} ms/MP, "
+              f"Dekodieren {costs['decode'] * 1000:.1f} ms/MP, Skalieren {costs['scale'] * 1000:.1f} ms/MP, "
+              f"Kopieren {costs['copy'] * 1000:.1f} ms/MP")
+    scale = 1 / args.hours
+    print(f"{'Variante':<22} {'Anfr.':>6} {'KB':>8} {'Parsen':>7} {'Raster':>7} {'Dekod.':>7} {'Zeichn.':>8} "
+          f"{'Timer':>6} {'JS ms':>8} {'Server ms':>10} {'CPU s/h':>8}")
+    for label, r in rows:
+        total = estimate(r, costs)
+        print(f"{label:<22} {r['requests'] * scale:>6.0f} {r['bytes'] / 1024 * scale:>8.0f} "
+              f"{r['pdf_parses'] * scale:>7.0f} {r['rasters'] * scale:>7.0f} {r['decodes'] * scale:>7.0f} "
+              f"{r['draws'] * scale:>8.0f} {r['timer_runs'] * scale:>6.0f} {r['cpu_ms'] * scale:>8.0f} "
+              f"{r['server_cpu_ms'] * scale:>10.0f} {total * scale if total is not None else float('nan'):>8.2f}")
+        if r['errors']:
+            print(f"  {r['errors']} Fehler im Client (console.error)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Vorhersage-Aggregation (wetterdaten.aggregate_forecast).
+
+Spielt /forecast-Antworten ab und vergleicht die neue Ein-Pass-Aggregation
+mit dem bisherigen Verfahren (Liste pro Eintrag neu aufgebaut, datetime.now()
+pro Eintrag; Datei-Kopien hier ausgeklammert).
+
+Eingaben:
+- ohne Argumente: generierte Antworten im OWM-Format (benchmarks/owm_stub.py)
+  für --cities Städte, als Mehr-Städte-Sammelantwort
+- --payload DATEI...: aufgezeichnete Antworten; eine Datei darf eine einzelne
+  /forecast-Antwort oder eine Liste davon (Sammelantwort) enthalten
+- --record STADT...: Antworten mit OPENWEATHER_API_KEY aufzeichnen und als
+  JSON-Datei (--out) speichern, um sie später mit --payload abzuspielen
+
+    python benchmarks/bench_forecast.py --cities 50 --repeat 20
+    python benchmarks/bench_forecast.py --record Berlin Glienicke --out recorded.json
+    python benchmarks/bench_forecast.py --payload recorded.json
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from owm_stub import forecast_payload  # noqa: E402
+from wetterdaten import aggregate_forecast  # noqa: E402
+
+
+def legacy_aggregate(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Bisheriges save_weather_forecast ohne Datei-I/O, zum Vergleich."""
+    forecast_data = {}
+    day_conter = 0
+    daily_forecast = []
+    for entry in data['list']:
+        date, time_txt = entry['dt_txt'].split(' ')
+        if date == dt.datetime.now().strftime('%Y-%m-%d'):
+            continue
+        if date not in forecast_data:
+            forecast_data[date] = {
+                'min_temperature': entry['main']['temp_min'],
+                'max_temperature': entry['main']['temp_max'],
+                'weather': entry['weather'][0]['description'],
+                'icon': entry['weather'][0]['icon']
+            }
+        else:
+            forecast_data[date]['min_temperature'] = min(forecast_data[date]['min_temperature'], entry['main']['temp_min'])
+            forecast_data[date]['max_temperature'] = max(forecast_data[date]['max_temperature'], entry['main']['temp_max'])
+            if time_txt == '12:00:00':
+                forecast_data[date]['weather'] = entry['weather'][0]['description']
+                forecast_data[date]['icon'] = entry['weather'][0]['icon']
+                day_conter += 1
+        daily_forecast = []
+        for day, values in forecast_data.items():
+            daily_forecast.append({
+                'date': day,
+                'min_temperature': f"{round(values['min_temperature'])}°C",
+                'max_temperature': f"{round(values['max_temperature'])}°C",
+                'weather': values['weather'],
+                'icon': values['icon']
+            })
+        if day_conter == 3:
+            break
+    return daily_forecast
+
+
+def load_payloads(paths: List[str]) -> List[Dict[str, Any]]:
+    payloads = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = json.load(f)
+        payloads.extend(content if isinstance(content, list) else [content])
+    return payloads
+
+
+def record(cities: List[str], out: str) -> None:
+    from weather_client import get_client
+    api_key = os.getenv('OPENWEATHER_API_KEY')
+    if not api_key:
+        sys.exit("OPENWEATHER_API_KEY nicht gesetzt!")
+    client = get_client(api_key)
+    payloads = [p for p in (client.forecast(city) for city in cities) if p]
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(payloads, f, ensure_ascii=False)
+    print(f"{len(payloads)} Vorhersagen in {out} gespeichert.")
+
+
+def bench(func, payloads: List[Dict[str, Any]], repeat: int, **kwargs: Any) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for payload in payloads:
+            func(payload, **kwargs)
+        timings.append(time.perf_counter() - started)
+    per_payload = [t / len(payloads) * 1e6 for t in timings]
+    return {
+        'mean_us': round(statistics.mean(per_payload), 1),
+        'min_us': round(min(per_payload), 1),
+        'p95_us': round(sorted(per_payload)[int(len(per_payload) * 0.95) - 1 if len(per_payload) > 1 else 0], 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payload', nargs='*', default=[])
+    parser.add_argument('--record', nargs='*')
+    parser.add_argument('--out', default='recorded_forecasts.json')
+    parser.add_argument('--cities', type=int, default=25)
+    parser.add_argument('--entries', type=int, default=40, help='Einträge pro generierter Vorhersage')
+    parser.add_argument('--days', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.out)
+        return
+
+    if args.payload:
+        payloads = load_payloads(args.payload)
+        source = 'recorded'
+    else:
+        now = time.time()
+        payloads = [forecast_payload(f'Stadt {i}', now=now, count=args.entries, tz_offset=3600 * (i % 5))
+                    for i in range(args.cities)]
+        source = 'generated'
+
+    results = {
+        'source': source,
+        'payloads': len(payloads),
+        'entries': sum(len(p['list']) for p in payloads),
+        'legacy': bench(legacy_aggregate, payloads, args.repeat),
+        'single_pass': bench(aggregate_forecast, payloads, args.repeat, days=args.days)
+    }
+    results['speedup'] = round(results['legacy']['mean_us'] / results['single_pass']['mean_us'], 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{results['payloads']} Vorhersagen ({source}), {results['entries']} Einträge")
+        print(f"bisher:     {results['legacy']['mean_us']} µs/Vorhersage (p95 {results['legacy']['p95_us']})")
+        print(f"Ein-Pass:   {results['single_pass']['mean_us']} µs/Vorhersage (p95 {results['single_pass']['p95_us']})")
+        print(f"Faktor:     {results['speedup']}x")
+
+
+if __name__ == '__main__':
+    main()
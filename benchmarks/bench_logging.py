@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Kosten eines Log-Aufrufs im Request-Thread: synchroner RotatingFileHandler
+(bisher) gegen die Queue aus log_pipeline.py (Listener-Thread schreibt).
+
+Mit --slow-ms wird eine hängende Platte simuliert (jeder Schreibvorgang
+wartet so lange). Synchron blockiert dann jeder Request; über die Queue
+bleibt der Aufruf schnell und Einträge werden verworfen, sobald sie voll ist.
+
+    python benchmarks/bench_logging.py --threads 8 --records 5000
+    python benchmarks/bench_logging.py --slow-ms 5 --queue-size 1000
+"""
+
+import argparse
+import logging
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_pipeline import DroppingQueueHandler, DroppingQueueListener, JsonFormatter  # noqa: E402
+
+
+class SlowFileHandler(RotatingFileHandler):
+    def __init__(self, path: str, delay_s: float) -> None:
+        super().__init__(path, maxBytes=10 * 1024 * 1024, backupCount=2)
+        self.delay_s = delay_s
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        super().emit(record)
+
+
+def run(mode: str, args: argparse.Namespace, directory: str) -> Dict[str, Any]:
+    file_handler = SlowFileHandler(os.path.join(directory, f'{mode}.log'), args.slow_ms / 1000)
+    file_handler.setFormatter(JsonFormatter())
+    logger = logging.getLogger(f'bench.{mode}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    listener = None
+    if mode == 'queue':
+        handler = DroppingQueueHandler(queue.Queue(args.queue_size))
+        listener = DroppingQueueListener(handler, file_handler)
+        listener.start()
+        logger.addHandler(handler)
+    else:
+        handler = None
+        logger.addHandler(file_handler)
+
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        own = []
+        for i in range(args.records):
+            started = time.perf_counter()
+            logger.info('GET /api/public/snapshot 304', extra={'worker': index, 'seq': i, 'duration_ms': 1.2})
+            own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if listener is not None:
+        listener.stop()
+    file_handler.close()
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'calls': len(latencies),
+        'elapsed_s': round(elapsed, 3),
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 1),
+        'p99_us': round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        'max_ms': round(latencies[-1] * 1000, 2),
+        'dropped': handler.dropped if handler is not None else 0
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--records', type=int, default=5000, help='pro Thread')
+    parser.add_argument('--slow-ms', type=float, default=0.0)
+    parser.add_argument('--queue-size', type=int, default=10000)
+    args = parser.parse_args()
+    if args.slow_ms:
+        # Synchron würde jeder Aufruf warten: Umfang begrenzen
+        args.records = min(args.records, int(2000 / args.slow_ms / args.threads) + 1)
+
+    directory = tempfile.mkdtemp(prefix='ff_logging_')
+    try:
+        results = [run(mode, args, directory) for mode in ('sync', 'queue')]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(f"{args.threads} Threads × {args.records} Einträge, Platte +{args.slow_ms} ms/Eintrag, "
+          f"Queue {args.queue_size}")
+    print(f"{'Modus':<6} {'Aufrufe':>8} {'Dauer s':>8} {'p50 µs':>8} {'p99 µs':>9} {'max ms':>8} {'verworfen':>10}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['calls']:>8} {r['elapsed_s']:>8} {r['p50_us']:>8} {r['p99_us']:>9} "
+              f"{r['max_ms']:>8} {r['dropped']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Wirkung der PDF-Optimierung (pdf_optimize.py) auf gescannte Aushänge:
+Dateigröße, Renderzeit der ersten Seite und Dauer der Optimierung.
+
+Die Test-PDFs enthalten pro Seite ein verrauschtes A4-Bild in
+Scanner-Auflösung (benchmarks/pdf_fixtures.make_scan_pdf).
+
+    python benchmarks/bench_optimize.py --scan-dpi 300 --pages 1 2
+    python benchmarks/bench_optimize.py --dpi 120 --quality 70
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_fixtures import make_scan_pdf  # noqa: E402
+from pdf_optimize import available_backend, optimize_pdf  # noqa: E402
+from snapshot_cache import hash_bytes  # noqa: E402
+
+
+def run(pages: int, args: argparse.Namespace, directory: str) -> Dict[str, Any]:
+    data = make_scan_pdf(f'Aushang {pages}', pages=pages, dpi=args.scan_dpi)
+    source = os.path.join(directory, f'scan-{pages}.pdf')
+    target = os.path.join(directory, f'scan-{pages}.optimized.pdf')
+    with open(source, 'wb') as f:
+        f.write(data)
+    report = optimize_pdf(source, hash_bytes(data), target, args.dpi, args.quality, args.width)
+    report['pages'] = pages
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 3])
+    parser.add_argument('--scan-dpi', type=int, default=300, help='Auflösung der simulierten Scans')
+    parser.add_argument('--dpi', type=int, default=150, help='Zielauflösung (PDF_OPTIMIZE_DPI)')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG-Qualität (PDF_OPTIMIZE_QUALITY)')
+    parser.add_argument('--width', type=int, default=1280, help='Renderbreite der ersten Seite in Pixeln')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    if available_backend() is None:
+        print('Weder PyMuPDF noch Ghostscript verfügbar', file=sys.stderr)
+        sys.exit(1)
+
+    directory = tempfile.mkdtemp(prefix='ff_optimize_')
+    try:
+        results: List[Dict[str, Any]] = [run(pages, args, directory) for pages in args.pages]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Scans mit {args.scan_dpi} dpi -> {args.dpi} dpi, JPEG-Qualität {args.quality}, Backend {results[0]['backend']}")
+    print(f"{'Seiten':>6} {'vorher MB':>10} {'nachher MB':>11} {'Ersparnis':>10} {'linear.':>8} "
+          f"{'1. Seite ms':>16} {'Dauer s':>8}")
+    for r in results:
+        saved = 1 - r['optimized_bytes'] / r['original_bytes']
+        print(f"{r['pages']:>6} {r['original_bytes'] / 1e6:>10.2f} {r['optimized_bytes'] / 1e6:>11.2f} "
+              f"{saved:>9.1%} {('ja' if r['linearized'] else 'nein'):>8} "
+              f"{r['render_ms_before']!s:>7} -> {r['render_ms_after']!s:>6} {r['seconds']:>8}")
+
+
+if __name__ == '__main__':
+    main()
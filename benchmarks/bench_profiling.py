@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Overhead des Request-Profilings (profiling.py) je Request: App ohne
+Instrumentierung gegen ausgeschaltetes Profiling, Profiling für eine andere
+Route und die drei Modi bei sample_rate 1 (inkl. Ablage in output/profiles/).
+
+    python benchmarks/bench_profiling.py --requests 5000
+    python benchmarks/bench_profiling.py --path /api/public/info
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import API_backend  # noqa: E402
+from profiling import RequestProfiler  # noqa: E402
+
+
+def build_app(target_dir: str, instrument: bool) -> Any:
+    config = {'TARGET_DIR': target_dir, 'LOG_TO_FILE': False, 'WEATHER_SCHEDULER': False,
+              'PDF_OPTIMIZE_WORKERS': 0, 'RATELIMIT_ENABLED': False}
+    if instrument:
+        return API_backend.create_app(config)
+    original = RequestProfiler.instrument
+    RequestProfiler.instrument = lambda self, app: None
+    try:
+        return API_backend.create_app(config)
+    finally:
+        RequestProfiler.instrument = original
+
+
+def measure(label: str, app: Any, path: str, requests: int,
+            configure: Optional[Callable[[RequestProfiler], Any]] = None) -> Dict[str, Any]:
+    profiler = app.extensions['dashboard'].profiler
+    if configure is not None:
+        configure(profiler)
+    client = app.test_client()
+    for _ in range(50):
+        client.get(path).close()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for _ in range(requests):
+        client.get(path).close()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    profiler.configure(0)
+    return {'label': label, 'us_per_request': elapsed / requests * 1e6, 'cpu_us_per_request': cpu / requests * 1e6}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default='/api/public/pdf_status')
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    target_dir = tempfile.mkdtemp(prefix='ff_profiling_')
+    try:
+        plain = build_app(os.path.join(target_dir, 'plain'), instrument=False)
+        app = build_app(os.path.join(target_dir, 'instrumented'), instrument=True)
+        results = [
+            measure('ohne Instrumentierung', plain, args.path, args.requests),
+            measure('aus (sample_rate 0)', app, args.path, args.requests),
+            measure('andere Route', app, args.path, args.requests,
+                    lambda p: p.configure(1, route='/profiling*')),
+            measure('spans 100%', app, args.path, args.requests, lambda p: p.configure(1)),
+            measure('cprofile 100%', app, args.path, args.requests, lambda p: p.configure(1, mode='cprofile')),
+            measure('sampling 100%', app, args.path, args.requests, lambda p: p.configure(1, mode='sampling'))
+        ]
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    base = results[0]['us_per_request']
+    print(f"{args.path}, {args.requests} Requests je Variante (Flask-Testclient)")
+    print(f"{'Variante':<24} {'µs/Request':>11} {'CPU µs':>8} {'Overhead':>9}")
+    for r in results:
+        print(f"{r['label']:<24} {r['us_per_request']:>11.1f} {r['cpu_us_per_request']:>8.1f} "
+              f"{r['us_per_request'] - base:>+9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Mehrprozess-Benchmark für shared_state (Konkurrenz-Overhead).
+
+Startet P Prozesse (wie P Gunicorn-Worker), die gleichzeitig auf denselben
+Speicher zugreifen:
+
+- incr: Rate-Limit-Zähler auf einem gemeinsamen Schlüssel (Schreib-Konkurrenz)
+- get:  Lesen eines gecachten Wetter-Snapshots
+- set:  Schreiben eines Snapshots
+
+Gemessen werden Latenzen (p50/p95/p99) und Durchsatz je Prozessanzahl, dazu
+zwei Korrektheits-Prüfungen: der gemeinsame Zähler muss genau P × N ergeben
+und bei der Leader-Wahl darf genau ein Prozess die Sperre bekommen.
+MemoryStore dient als Untergrenze (kein gemeinsamer Zustand).
+
+    python benchmarks/bench_shared_state.py --procs 1 2 4 8 --ops 2000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared_state import FileLock, MemoryStore, SQLiteStore  # noqa: E402
+
+SNAPSHOT = {'city': 'Berlin', 'list': [{'dt': i, 'main': {'temp': 12.3}} for i in range(40)]}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def worker(backend: str, path: str, op: str, ops: int, start: Any, queue: Any) -> None:
+    store = SQLiteStore(path) if backend == 'sqlite' else MemoryStore()
+    store.set('snapshot', SNAPSHOT)
+    start.wait()
+    latencies = []
+    for i in range(ops):
+        started = time.perf_counter()
+        if op == 'incr':
+            store.incr('LIMITER/login/127.0.0.1', 60)
+        elif op == 'get':
+            store.get('snapshot')
+        else:
+            store.set(f'snapshot-{os.getpid()}-{i % 16}', SNAPSHOT, ttl=600)
+        latencies.append(time.perf_counter() - started)
+    queue.put(latencies)
+
+
+def run(backend: str, op: str, procs: int, ops: int, path: str) -> Dict[str, Any]:
+    if backend == 'sqlite':
+        SQLiteStore(path).reset()
+    ctx = multiprocessing.get_context('fork')
+    start = ctx.Event()
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=worker, args=(backend, path, op, ops, start, queue)) for _ in range(procs)]
+    for p in workers:
+        p.start()
+    time.sleep(0.2)
+    began = time.perf_counter()
+    start.set()
+    latencies: List[float] = []
+    for _ in workers:
+        latencies.extend(queue.get())
+    elapsed = time.perf_counter() - began
+    for p in workers:
+        p.join()
+
+    result = {
+        'backend': backend,
+        'op': op,
+        'procs': procs,
+        'ops_per_s': round(len(latencies) / elapsed),
+        'p50_us': round(percentile(latencies, 0.50) * 1e6, 1),
+        'p95_us': round(percentile(latencies, 0.95) * 1e6, 1),
+        'p99_us': round(percentile(latencies, 0.99) * 1e6, 1),
+        'mean_us': round(statistics.mean(latencies) * 1e6, 1)
+    }
+    if backend == 'sqlite' and op == 'incr':
+        counted = SQLiteStore(path).counter('LIMITER/login/127.0.0.1')[0]
+        result['counter_ok'] = counted == procs * ops
+    return result
+
+
+def try_lead(path: str, start: Any, queue: Any) -> None:
+    lock = FileLock(path)
+    start.wait()
+    queue.put(lock.acquire(blocking=False))
+    time.sleep(0.5)  # Sperre halten, bis alle versucht haben
+
+
+def leader_election(procs: int, directory: str) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context('fork')
+    start = ctx.Event()
+    queue = ctx.Queue()
+    path = os.path.join(directory, 'leader.lock')
+    workers = [ctx.Process(target=try_lead, args=(path, start, queue)) for _ in range(procs)]
+    for p in workers:
+        p.start()
+    start.set()
+    leaders = sum(1 for _ in workers if queue.get())
+    for p in workers:
+        p.join()
+    return {'procs': procs, 'leaders': leaders, 'ok': leaders == 1}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procs', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--ops', type=int, default=2000, help='Operationen pro Prozess')
+    parser.add_argument('--ops-types', nargs='+', default=['incr', 'get', 'set'])
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'shared_state.db')
+        for op in args.ops_types:
+            for procs in args.procs:
+                for backend in ('memory', 'sqlite'):
+                    results.append(run(backend, op, procs, args.ops, path))
+        election = leader_election(max(args.procs), directory)
+
+    if args.json:
+        print(json.dumps({'results': results, 'leader_election': election}, indent=2))
+        return
+    print(f"{'Op':<5} {'Backend':<7} {'Proz.':>5} {'Ops/s':>9} {'p50 µs':>8} {'p95 µs':>8} {'p99 µs':>8}  Zähler")
+    for r in results:
+        check = '' if 'counter_ok' not in r else ('ok' if r['counter_ok'] else 'FALSCH')
+        print(f"{r['op']:<5} {r['backend']:<7} {r['procs']:>5} {r['ops_per_s']:>9} "
+              f"{r['p50_us']:>8} {r['p95_us']:>8} {r['p99_us']:>8}  {check}")
+    print(f"Leader-Wahl mit {election['procs']} Prozessen: {election['leaders']} Leader "
+          f"({'ok' if election['ok'] else 'FALSCH'})")
+
+
+if __name__ == '__main__':
+    main()
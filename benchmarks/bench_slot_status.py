@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Kosten einer Slot-Statusabfrage: bisheriger Scan (os.stat/Hash-Cache je Slot
+plus os.listdir wie /pdf_belegt) gegen das Slot-Manifest im Speicher
+(slot_manifest.py).
+
+    python benchmarks/bench_slot_status.py --slots 6 --requests 20000
+    python benchmarks/bench_slot_status.py --slots 48 --groups 8
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_fixtures import make_pdf  # noqa: E402
+from slot_manifest import SlotManifest, parse_screen_groups  # noqa: E402
+from snapshot_cache import snapshot_cache  # noqa: E402
+
+
+def scan_status(pdf_dir: str, slot_count: int) -> Dict[str, Any]:
+    """Vorgehen vor dem Manifest: jeder Request prüft jeden Slot im Dateisystem."""
+    occupied = []
+    versions = {}
+    for number in range(1, slot_count + 1):
+        version = snapshot_cache.file_version(os.path.join(pdf_dir, f'{number}.pdf'))
+        if version is not None:
+            occupied.append(number)
+            versions[number] = version.etag
+    pdf_files = [name for name in os.listdir(pdf_dir) if name.endswith('.pdf')]
+    return {'occupied': occupied, 'versions': versions, 'pdf_files': pdf_files}
+
+
+def measure(label: str, call: Callable[[], Any], requests: int) -> Dict[str, Any]:
+    call()  # Caches füllen
+    stat_calls = snapshot_cache.stat_calls
+    started = time.perf_counter()
+    for _ in range(requests):
+        call()
+    elapsed = time.perf_counter() - started
+    return {
+        'label': label,
+        'us_per_request': round(elapsed / requests * 1e6, 2),
+        'stat_calls_per_1000': round((snapshot_cache.stat_calls - stat_calls) / requests * 1000, 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slots', type=int, default=6)
+    parser.add_argument('--occupied', type=float, default=0.5, help='Anteil belegter Slots')
+    parser.add_argument('--groups', type=int, default=2, help='Bildschirmgruppen gleicher Größe')
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    pdf_dir = tempfile.mkdtemp(prefix='ff_slots_')
+    try:
+        for number in range(1, int(args.slots * args.occupied) + 1):
+            with open(os.path.join(pdf_dir, f'{number}.pdf'), 'wb') as f:
+                f.write(make_pdf(f'Slot {number}', pad_kb=256))
+        size = max(args.slots // args.groups, 1)
+        spec = ';'.join(f'g{i}:{i * size + 1}-{min((i + 1) * size, args.slots)}'
+                        for i in range(args.groups) if i * size < args.slots)
+        manifest = SlotManifest(pdf_dir, args.slots, parse_screen_groups(spec, args.slots))
+        started = time.perf_counter()
+        manifest.rebuild()
+        rebuild_ms = (time.perf_counter() - started) * 1000
+
+        results = [
+            measure('Scan je Request', lambda: scan_status(pdf_dir, args.slots), args.requests),
+            measure('Manifest (alle)', lambda: manifest.status(), args.requests),
+            measure('Manifest (Gruppe)', lambda: manifest.status('g0'), args.requests)
+        ]
+    finally:
+        shutil.rmtree(pdf_dir, ignore_errors=True)
+
+    print(f"{args.slots} Slots ({int(args.slots * args.occupied)} belegt), {args.groups} Gruppen, "
+          f"{args.requests} Abfragen; rebuild() beim Start {rebuild_ms:.1f} ms")
+    print(f"{'Variante':<20} {'µs/Abfrage':>11} {'stat()/1000':>12}")
+    for r in results:
+        print(f"{r['label']:<20} {r['us_per_request']:>11} {r['stat_calls_per_1000']:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Kaltstart des Backends: Importzeit, create_app(), erster Request und
+Speicherbedarf der Gunicorn-Worker mit und ohne --preload.
+
+Jede Messung läuft in einem frischen Python-Prozess gegen ein temporäres
+Zielverzeichnis (ohne Wetter-Scheduler).
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --imports 20          # -X importtime, teuerste Module
+    python benchmarks/bench_startup.py --gunicorn --workers 4
+    python benchmarks/bench_startup.py --max-import-ms 400   # Exit-Code 1 bei Überschreitung
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schwere Module, die beim bloßen Import nicht geladen werden sollen
+HEAVY_MODULES = ('requests', 'weather_client', 'pdf_render', 'fitz', 'PIL')
+
+STAGES_SNIPPET = """
+import json, sys, time
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+started = time.perf_counter()
+stages = {}
+sys.path.insert(0, %(project)r)
+import API_backend
+stages['import'] = time.perf_counter() - started
+heavy = [m for m in %(heavy)r if m in sys.modules]
+rss = {'import': rss_mb()}
+t = time.perf_counter()
+app = API_backend.create_app({'LOG_TO_FILE': False})
+stages['create_app'] = time.perf_counter() - t
+t = time.perf_counter()
+status = app.test_client().get('/api/public/info').status_code
+stages['first_request'] = time.perf_counter() - t
+rss['first_request'] = rss_mb()
+t = time.perf_counter()
+API_backend.warm_up(app)
+stages['warm_up'] = time.perf_counter() - t
+rss['warm_up'] = rss_mb()
+print(json.dumps({'stages': stages, 'rss_mb': rss, 'heavy_on_import': heavy, 'status': status}))
+"""
+
+
+def bench_env(target_dir: str) -> Dict[str, str]:
+    return dict(os.environ, zielverzeichnis=target_dir, WEATHER_SCHEDULER='false', PDF_RENDER_WORKERS='0',
+                METRICS_FLUSH_SECONDS='60')
+
+
+def cold_start(runs: int, target_dir: str) -> Dict[str, Any]:
+    snippet = STAGES_SNIPPET % {'project': PROJECT_DIR, 'heavy': HEAVY_MODULES}
+    samples: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', snippet], cwd=target_dir, env=bench_env(target_dir),
+                                capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample['process'] = time.perf_counter() - started
+        samples.append(sample)
+
+    def median_ms(get) -> float:
+        return round(statistics.median(get(s) for s in samples) * 1000, 1)
+
+    return {
+        'runs': runs,
+        'import_ms': median_ms(lambda s: s['stages']['import']),
+        'create_app_ms': median_ms(lambda s: s['stages']['create_app']),
+        'first_request_ms': median_ms(lambda s: s['stages']['first_request']),
+        'warm_up_ms': median_ms(lambda s: s['stages']['warm_up']),
+        'process_ms': median_ms(lambda s: s['process']),
+        'rss_mb': {k: round(v, 1) for k, v in samples[-1]['rss_mb'].items()},
+        'heavy_on_import': samples[-1]['heavy_on_import']
+    }
+
+
+def import_report(top: int, target_dir: str) -> List[Dict[str, Any]]:
+    """``python -X importtime``: Module nach kumulierter Importzeit"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import sys; sys.path.insert(0, {PROJECT_DIR!r}); import API_backend'],
+        cwd=target_dir, env=bench_env(target_dir), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip())) // 2,
+                     'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda r: r['cumulative_ms'], reverse=True)[:top]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int, path: str) -> int:
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return 0
+    finally:
+        conn.close()
+
+
+def smaps(pid: int) -> Dict[str, float]:
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'uss': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def gunicorn_memory(preload: bool, workers: int, target_dir: str) -> Dict[str, Any]:
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+               '--pythonpath', PROJECT_DIR, '--log-level', 'warning'] + (['--preload'] if preload else []) + ['wsgi:app']
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=target_dir, env=bench_env(target_dir),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready: Optional[float] = None
+        while time.perf_counter() - started < 60:
+            if get(port, '/api/public/info') == 200:
+                ready = time.perf_counter() - started
+                break
+            time.sleep(0.05)
+        if ready is None:
+            raise RuntimeError('Gunicorn nicht erreichbar')
+        # Jeden Worker ein paar typische Anfragen bearbeiten lassen
+        for _ in range(workers * 20):
+            for path in ('/api/public/snapshot', '/api/public/pdf_status', '/api/public/weather', '/'):
+                get(port, path)
+        time.sleep(0.5)
+        with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+            worker_pids = [int(p) for p in f.read().split()]
+        master = smaps(server.pid)
+        per_worker = [smaps(pid) for pid in worker_pids]
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'preload': preload,
+        'workers': len(per_worker),
+        'ready_ms': round(ready * 1000),
+        'worker_uss_mb': round(statistics.mean(w['uss'] for w in per_worker), 1),
+        'worker_rss_mb': round(statistics.mean(w['rss'] for w in per_worker), 1),
+        'total_pss_mb': round(master['pss'] + sum(w['pss'] for w in per_worker), 1)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--imports', type=int, metavar='N', help='nur -X importtime-Bericht (N Module)')
+    parser.add_argument('--gunicorn', action='store_true', help='zusätzlich Worker-Speicher mit/ohne --preload')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-import-ms', type=float, help='Budget für "import API_backend"')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    target_dir = tempfile.mkdtemp(prefix='ff_startup_')
+    try:
+        if args.imports:
+            rows = import_report(args.imports, target_dir)
+            if args.json:
+                print(json.dumps(rows, indent=2))
+                return
+            print(f"{'kumuliert ms':>13} {'selbst ms':>10}  Modul")
+            for row in rows:
+                print(f"{row['cumulative_ms']:>13.1f} {row['self_ms']:>10.1f}  {'  ' * row['depth']}{row['module']}")
+            return
+
+        result: Dict[str, Any] = {'cold_start': cold_start(args.runs, target_dir)}
+        if args.gunicorn:
+            result['gunicorn'] = [gunicorn_memory(preload, args.workers, target_dir) for preload in (False, True)]
+    finally:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+    cold = result['cold_start']
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Kaltstart (Median aus {cold['runs']} Prozessen)")
+        for key, label in (('import_ms', 'import API_backend'), ('create_app_ms', 'create_app()'),
+                           ('first_request_ms', 'erster Request'), ('warm_up_ms', 'warm_up()'),
+                           ('process_ms', 'Prozess gesamt')):
+            print(f"  {label:<20} {cold[key]:>8.1f} ms")
+        print(f"  RSS nach Import/Request/warm_up: {cold['rss_mb']['import']} / "
+              f"{cold['rss_mb']['first_request']} / {cold['rss_mb']['warm_up']} MB")
+        print(f"  beim Import geladen: {', '.join(cold['heavy_on_import']) or 'keine schweren Module'}")
+        for run in result.get('gunicorn', []):
+            print(f"Gunicorn {'--preload' if run['preload'] else 'ohne --preload':<15} {run['workers']} Worker: "
+                  f"bereit nach {run['ready_ms']} ms, USS/Worker {run['worker_uss_mb']} MB, "
+                  f"RSS/Worker {run['worker_rss_mb']} MB, PSS gesamt {run['total_pss_mb']} MB")
+
+    if args.max_import_ms is not None and cold['import_ms'] > args.max_import_ms:
+        print(f"Importzeit {cold['import_ms']} ms über dem Budget von {args.max_import_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Wetterverlauf (weather_history.py) über simulierte Monate: Dateigröße mit und
+ohne Verdichtung, Zeit pro Speicherung und Antwortgröße/Dauer typischer
+Abfragen (Woche stündlich, Jahr täglich, Vorhersage gegen Beobachtung).
+
+Jede Stunde eine Beobachtung und eine Vorhersage (40 Werte im 3-Stunden-Raster),
+die sich bei jedem Abruf leicht ändert (ungünstigster Fall für die Größe).
+
+    python benchmarks/bench_weather_history.py --days 365
+    python benchmarks/bench_weather_history.py --days 730 --locations 2 --raw-days 30
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weather_history import WeatherHistory, choose_bucket  # noqa: E402
+
+HOUR = 3600
+DAY = 86400
+
+
+def temperature(ts: float) -> float:
+    season = 9 + 10 * math.sin((ts % (365 * DAY)) / (365 * DAY) * 2 * math.pi)
+    return season + 5 * math.sin((ts % DAY) / DAY * 2 * math.pi)
+
+
+def weather(ts: int, rng: random.Random) -> Dict[str, Any]:
+    data = {
+        'dt': ts,
+        'timezone': 7200,
+        'main': {'temp': temperature(ts) + rng.gauss(0, 1), 'humidity': rng.randint(40, 95),
+                 'pressure': rng.randint(990, 1030)},
+        'wind': {'speed': rng.uniform(0, 12), 'gust': rng.uniform(0, 20)},
+        'clouds': {'all': rng.randint(0, 100)}
+    }
+    if rng.random() < 0.15:
+        data['rain'] = {'1h': round(rng.uniform(0.1, 4), 2)}
+    return data
+
+
+def forecast(now: int, rng: random.Random) -> Dict[str, Any]:
+    base = (now // (3 * HOUR) + 1) * 3 * HOUR
+    entries = []
+    for i in range(40):
+        ts = base + i * 3 * HOUR
+        entry = {
+            'dt': ts,
+            'main': {'temp': temperature(ts) + rng.gauss(0, 1 + i * 0.05), 'humidity': rng.randint(40, 95),
+                     'pressure': rng.randint(990, 1030)},
+            'wind': {'speed': rng.uniform(0, 12), 'gust': rng.uniform(0, 20)},
+            'clouds': {'all': rng.randint(0, 100)},
+            'pop': round(rng.random(), 2)
+        }
+        if rng.random() < 0.2:
+            entry['rain'] = {'3h': round(rng.uniform(0.1, 6), 2)}
+        entries.append(entry)
+    return {'city': {'timezone': 7200}, 'list': entries}
+
+
+def file_bytes(path: str) -> int:
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+
+def timed_query(call) -> Dict[str, Any]:
+    started = time.perf_counter()
+    for _ in range(20):
+        result = call()
+    return {'ms': round((time.perf_counter() - started) / 20 * 1000, 2),
+            'bytes': len(json.dumps(result, separators=(',', ':'))), 'points': len(result['t'])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--locations', type=int, default=1)
+    parser.add_argument('--raw-days', type=float, default=30)
+    parser.add_argument('--retention-days', type=float, default=730)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='ff_history_')
+    try:
+        stores = {
+            'verdichtet': WeatherHistory(os.path.join(directory, 'compact.db'), args.raw_days, args.retention_days),
+            'ohne Verdichtung': WeatherHistory(os.path.join(directory, 'raw.db'), 10 ** 6, 10 ** 6)
+        }
+        start = 1_780_000_000 // DAY * DAY
+        rng = random.Random(1)
+        checkpoints = sorted({d for d in (7, 30, 90, 180, 365, 730) if d <= args.days} | {args.days})
+        sizes: List[Dict[str, Any]] = []
+        record_ms = {label: 0.0 for label in stores}
+        for hour in range(args.days * 24):
+            now = start + hour * HOUR
+            for location in range(args.locations):
+                observation, prediction = weather(now, rng), forecast(now, rng)
+                for label, store in stores.items():
+                    started = time.perf_counter()
+                    store.record(f'ort-{location}', f'Ort {location}', observation, prediction, now=now)
+                    record_ms[label] += (time.perf_counter() - started) * 1000
+            if (hour + 1) % 24 == 0 and (hour + 1) // 24 in checkpoints:
+                for store in stores.values():
+                    store._conn().execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                sizes.append({'day': (hour + 1) // 24, **{label: file_bytes(store.path) for label, store in stores.items()}})
+
+        end = start + args.days * DAY
+        store = stores['verdichtet']
+        queries = {
+            'Woche, stündlich': lambda: store.series('ort-0', end - 7 * DAY, end, HOUR, ['temperature', 'precipitation']),
+            'Woche, auto (300 Punkte)': lambda: store.series('ort-0', end - 7 * DAY, end, choose_bucket(7 * DAY, 300),
+                                                              ['temperature', 'precipitation']),
+            'Jahr, täglich': lambda: store.series('ort-0', end - 365 * DAY, end, DAY, ['temperature', 'precipitation']),
+            'Vorhersage 24h vs. Beobachtung, 30 Tage': lambda: store.compare('ort-0', end - 30 * DAY, end, DAY,
+                                                                             ['temperature'], lead=24 * HOUR)
+        }
+        results = {label: timed_query(call) for label, call in queries.items()}
+        stats = store.stats()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    records = args.days * 24 * args.locations
+    print(f"{args.days} Tage, {args.locations} Ort(e), stündlich; Rohdaten {args.raw_days:g} Tage, "
+          f"Aufbewahrung {args.retention_days:g} Tage")
+    print(f"{'Tag':>5} {'verdichtet':>12} {'ohne Verdichtung':>17}")
+    for row in sizes:
+        print(f"{row['day']:>5} {row['verdichtet'] / 1024:>9.0f} KB {row['ohne Verdichtung'] / 1024:>14.0f} KB")
+    for label, total in record_ms.items():
+        print(f"record() {label}: {total / records:.2f} ms im Mittel")
+    print(f"Zeilen: {stats['observations']} Beobachtungen, {stats['observations_daily']} Tageswerte, "
+          f"{stats['forecasts']} Vorhersagewerte")
+    print(f"{'Abfrage':<42} {'ms':>6} {'Punkte':>7} {'JSON-Bytes':>11}")
+    for label, r in results.items():
+        print(f"{label:<42} {r['ms']:>6} {r['points']:>7} {r['bytes']:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,419 @@
+#!/usr/bin/env node
+// Führt den Anzeige-Client (static/js/script.js) ohne Browser aus; gesteuert von
+// benchmarks/bench_display.py.
+//
+// DOM, Canvas, pdf.js, createImageBitmap und EventSource sind Attrappen, die
+// mitzählen, was ein Browser an Arbeit hätte: PDFs parsen, Seiten rastern,
+// Bilder dekodieren, zeichnen. HTTP geht echt an den Testserver, mit dem
+// Verhalten eines Browser-Caches (ETag-Revalidierung, max-age/immutable).
+// Die Zeit ist virtuell, eine Stunde läuft in wenigen Sekunden durch.
+//
+// Protokoll auf stdout/stdin: "change <slot>" -> Python tauscht das PDF aus und
+// antwortet "ok" oder "ok rendered"; zum Schluss "result <json>".
+
+'use strict';
+
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+const options = JSON.parse(process.argv[2]);
+const stats = {
+  requests: 0, not_modified: 0, cache_hits: 0, bytes: 0,
+  pdf_parses: 0, rasters: 0, raster_pixels: 0, decodes: 0, decode_pixels: 0,
+  draws: 0, scale_pixels: 0, copy_pixels: 0, canvas_resets: 0, dom_writes: 0,
+  timer_runs: 0, errors: 0
+};
+
+// ===== Virtuelle Zeit =====
+const start = Date.UTC(2026, 0, 5, 7, 0, 0);
+let now = start;
+const timers = new Map();
+let timerSeq = 0;
+
+function addTimer(fn, delay, args, repeat) {
+  const id = ++timerSeq;
+  const wait = Math.max(Number(delay) || 0, 0);
+  timers.set(id, { due: now + wait, fn, args, every: repeat ? Math.max(wait, 1) : 0 });
+  return id;
+}
+
+class VirtualDate extends Date {
+  constructor(...args) {
+    if (args.length) super(...args); else super(now);
+  }
+
+  static now() {
+    return now;
+  }
+}
+
+// Laufende Ein-/Ausgabe: der nächste Timer feuert erst, wenn alles angekommen ist
+let pending = 0;
+let onIdle = null;
+
+function track(promise) {
+  pending++;
+  return promise.finally(() => {
+    if (--pending === 0 && onIdle) onIdle();
+  });
+}
+
+async function settle() {
+  for (;;) {
+    if (pending) await new Promise(resolve => { onIdle = resolve; });
+    onIdle = null;
+    await new Promise(resolve => setImmediate(resolve));
+    if (!pending) return;
+  }
+}
+
+// ===== HTTP mit Browser-Cache =====
+const pageUrl = `${options.base}/static/index.html${options.group ? `?group=${options.group}` : ''}`;
+const httpCache = new Map();
+
+function cachedResponse(entry) {
+  return new Response(entry.body, { status: 200, headers: entry.headers });
+}
+
+async function doFetch(url, init) {
+  const target = new URL(url, pageUrl).href;
+  const headers = Object.assign({}, init && init.headers);
+  const conditional = Object.keys(headers).some(name => name.toLowerCase() === 'if-none-match');
+  const cached = conditional ? null : httpCache.get(target);
+  if (cached && cached.expires > now) {
+    stats.cache_hits++;
+    return cachedResponse(cached);
+  }
+  if (cached && cached.etag) headers['If-None-Match'] = cached.etag;
+
+  stats.requests++;
+  const response = await fetch(target, { headers });
+  const body = Buffer.from(await response.arrayBuffer());
+  stats.bytes += body.length;
+  if (response.status === 304) {
+    stats.not_modified++;
+    return cached ? cachedResponse(cached) : new Response(null, { status: 304 });
+  }
+
+  const cacheControl = response.headers.get('cache-control') || '';
+  const maxAge = /max-age=(\d+)/.exec(cacheControl);
+  const entry = {
+    body,
+    headers: [...response.headers].filter(([name]) => !['content-encoding', 'content-length'].includes(name)),
+    etag: response.headers.get('etag'),
+    expires: maxAge && !cacheControl.includes('no-cache') ? now + Number(maxAge[1]) * 1000 : 0
+  };
+  if (response.ok && !conditional && (entry.etag || entry.expires)) httpCache.set(target, entry);
+  return new Response(response.status === 204 ? null : body, { status: response.status, headers: entry.headers });
+}
+
+function fakeFetch(url, init) {
+  return track(doFetch(String(url), init));
+}
+
+// ===== Bilder, Canvas, pdf.js =====
+function imageSize(buf) {
+  if (buf.length > 24 && buf.readUInt32BE(0) === 0x89504e47) return [buf.readUInt32BE(16), buf.readUInt32BE(20)];
+  if (buf.length > 30 && buf.toString('ascii', 0, 4) === 'RIFF' && buf.toString('ascii', 8, 12) === 'WEBP') {
+    const chunk = buf.toString('ascii', 12, 16);
+    if (chunk === 'VP8 ') return [buf.readUInt16LE(26) & 0x3fff, buf.readUInt16LE(28) & 0x3fff];
+    if (chunk === 'VP8L') {
+      const bits = buf.readUInt32LE(21);
+      return [(bits & 0x3fff) + 1, ((bits >>> 14) & 0x3fff) + 1];
+    }
+    if (chunk === 'VP8X') return [buf.readUIntLE(24, 3) + 1, buf.readUIntLE(27, 3) + 1];
+  }
+  return [0, 0];
+}
+
+function decoded(buf) {
+  const [width, height] = imageSize(buf);
+  stats.decodes++;
+  stats.decode_pixels += width * height;
+  return { width, height, close() {} };
+}
+
+class FakeContext {
+  constructor(canvas) {
+    this.canvas = canvas;
+  }
+
+  // Gleiche Größe: 1:1-Kopie, sonst skaliertes Zeichnen
+  drawImage(source, x, y, width = source.width, height = source.height) {
+    stats.draws++;
+    copyOrScale(source, width, height);
+  }
+
+  clearRect() {}
+}
+
+class FakeCanvas {
+  constructor(parentElement) {
+    this.parentElement = parentElement;
+    this._width = 300;
+    this._height = 150;
+    this._context = new FakeContext(this);
+  }
+
+  get width() { return this._width; }
+  set width(value) { this._width = value | 0; stats.canvas_resets++; }
+  get height() { return this._height; }
+  set height(value) { this._height = value | 0; stats.canvas_resets++; }
+
+  getContext() {
+    return this._context;
+  }
+}
+
+class FakeImage {
+  constructor() {
+    this.width = 0;
+    this.height = 0;
+  }
+
+  set src(url) {
+    this._src = url;
+    track(fakeFetch(url)
+      .then(response => response.arrayBuffer())
+      .then(body => {
+        const bitmap = decoded(Buffer.from(body));
+        this.width = bitmap.width;
+        this.height = bitmap.height;
+        if (this.onload) this.onload();
+      })
+      .catch(() => { if (this.onerror) this.onerror(); }));
+  }
+
+  get src() {
+    return this._src;
+  }
+
+  decode() {
+    return Promise.resolve();
+  }
+}
+
+function copyOrScale(source, width, height) {
+  if (width === source.width && height === source.height) {
+    stats.copy_pixels += width * height;
+  } else {
+    stats.scale_pixels += width * height;
+  }
+}
+
+function createImageBitmap(source, { resizeWidth, resizeHeight } = {}) {
+  const resize = bitmap => {
+    if (resizeWidth === undefined) return bitmap;
+    copyOrScale(bitmap, resizeWidth, resizeHeight);
+    return { width: resizeWidth, height: resizeHeight, close() {} };
+  };
+  if (typeof source.arrayBuffer === 'function') {
+    return track(source.arrayBuffer().then(body => resize(decoded(Buffer.from(body)))));
+  }
+  if (resizeWidth === undefined) copyOrScale(source, source.width, source.height);
+  return Promise.resolve(resize({ width: source.width, height: source.height, close() {} }));
+}
+
+// pdf.js: lädt das PDF über fakeFetch (Cache wie im Browser) und zählt Parsen und Rastern
+const pdfjsLib = {
+  getDocument(url) {
+    const promise = track(fakeFetch(url)
+      .then(response => {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        return response.arrayBuffer();
+      })
+      .then(body => {
+        stats.pdf_parses++;
+        const numPages = (Buffer.from(body).toString('latin1').match(/\/Type\s*\/Page(?!s)/g) || []).length || 1;
+        return {
+          numPages,
+          destroy() {},
+          getPage() {
+            return Promise.resolve({
+              getViewport: ({ scale }) => ({ width: 595 * scale, height: 842 * scale }),
+              render({ viewport }) {
+                stats.rasters++;
+                stats.raster_pixels += Math.round(viewport.width) * Math.round(viewport.height);
+                return { promise: Promise.resolve(), cancel() {} };
+              },
+              cleanup() {}
+            });
+          }
+        };
+      }));
+    return { promise };
+  }
+};
+
+// ===== DOM =====
+class FakeElement {
+  constructor() {
+    this.className = '';
+    this.style = {};
+    this.children = [];
+    this._text = '';
+    this._html = '';
+    this._src = '';
+    this._p = null;
+  }
+
+  get textContent() { return this._text; }
+  set textContent(value) { this._text = value; stats.dom_writes++; }
+  get innerText() { return this._text; }
+  set innerText(value) { this._text = value; stats.dom_writes++; }
+  get innerHTML() { return this._html; }
+  set innerHTML(value) { this._html = value; this.children = []; stats.dom_writes++; }
+  get src() { return this._src; }
+  set src(value) { this._src = value; stats.dom_writes++; }
+
+  appendChild(child) {
+    this.children.push(child);
+    stats.dom_writes++;
+    return child;
+  }
+
+  querySelector() {
+    return this._p || (this._p = new FakeElement());
+  }
+}
+
+const elements = new Map();
+const canvases = Array.from({ length: options.canvases }, () => new FakeCanvas({ clientWidth: options.width, clientHeight: options.height }));
+const listeners = { document: {}, window: {} };
+
+function listen(target) {
+  return (type, fn) => { (listeners[target][type] = listeners[target][type] || []).push(fn); };
+}
+
+function dispatch(target, type, event = {}) {
+  (listeners[target][type] || []).forEach(fn => {
+    try {
+      fn(event);
+    } catch (error) {
+      stats.errors++;
+    }
+  });
+}
+
+const document = {
+  getElementById(id) {
+    if (!elements.has(id)) elements.set(id, new FakeElement());
+    return elements.get(id);
+  },
+  querySelectorAll: () => canvases,
+  createElement: tag => (tag === 'canvas' ? new FakeCanvas(null) : new FakeElement()),
+  addEventListener: listen('document')
+};
+
+const eventSources = [];
+
+class FakeEventSource {
+  constructor() {
+    this.listeners = {};
+    eventSources.push(this);
+    track(Promise.resolve().then(() => this.emit('open')));
+  }
+
+  addEventListener(type, fn) {
+    (this.listeners[type] = this.listeners[type] || []).push(fn);
+  }
+
+  emit(type, data = {}) {
+    (this.listeners[type] || []).forEach(fn => fn({ data: JSON.stringify(data) }));
+  }
+}
+
+const sandbox = {
+  document,
+  console: { log() {}, info() {}, warn() {}, error() { stats.errors++; } },
+  location: new URL(pageUrl),
+  fetch: fakeFetch,
+  Image: FakeImage,
+  createImageBitmap,
+  pdfjsLib,
+  EventSource: options.live ? FakeEventSource : undefined,
+  Date: VirtualDate,
+  setTimeout: (fn, delay, ...args) => addTimer(fn, delay, args, false),
+  setInterval: (fn, delay, ...args) => addTimer(fn, delay, args, true),
+  clearTimeout: id => timers.delete(id),
+  clearInterval: id => timers.delete(id),
+  URL,
+  URLSearchParams,
+  Blob,
+  Response,
+  addEventListener: listen('window')
+};
+sandbox.window = sandbox;
+vm.createContext(sandbox);
+
+// ===== Ablauf =====
+const lines = readline.createInterface({ input: process.stdin });
+const input = lines[Symbol.asyncIterator]();
+
+async function ask(line) {
+  process.stdout.write(`${line}\n`);
+  return (await input.next()).value || '';
+}
+
+function nextTimer() {
+  let next = null;
+  timers.forEach((timer, id) => {
+    if (next === null || timer.due < next.timer.due) next = { id, timer };
+  });
+  return next;
+}
+
+async function main() {
+  const end = start + options.seconds * 1000;
+  const events = [
+    ...options.changes.map(([at, slot]) => ({ due: start + at * 1000, slot })),
+    ...options.resizes.map(at => ({ due: start + at * 1000, resize: true }))
+  ].filter(event => event.due <= end).sort((a, b) => a.due - b.due);
+
+  const cpuStart = process.cpuUsage();
+  vm.runInContext(fs.readFileSync(options.script, 'utf8'), sandbox, { filename: options.script });
+  dispatch('document', 'DOMContentLoaded');
+  dispatch('window', 'load');
+  await settle();
+
+  for (;;) {
+    const next = nextTimer();
+    if (events.length && (!next || events[0].due <= next.timer.due)) {
+      const event = events.shift();
+      now = Math.max(now, event.due);
+      if (event.resize) {
+        dispatch('window', 'resize');
+      } else {
+        const reply = await ask(`change ${event.slot}`);
+        eventSources.forEach(source => source.emit('slots', { slot: event.slot }));
+        if (reply === 'ok rendered') {
+          await settle();
+          eventSources.forEach(source => source.emit('slots', { slot: event.slot, rendered: true }));
+        }
+      }
+      await settle();
+      continue;
+    }
+    if (!next || next.timer.due > end) break;
+    now = next.timer.due;
+    if (next.timer.every) next.timer.due += next.timer.every; else timers.delete(next.id);
+    stats.timer_runs++;
+    try {
+      next.timer.fn(...next.timer.args);
+    } catch (error) {
+      stats.errors++;
+    }
+    await settle();
+  }
+
+  const cpu = process.cpuUsage(cpuStart);
+  stats.cpu_ms = (cpu.user + cpu.system) / 1000;
+  process.stdout.write(`result ${JSON.stringify(stats)}\n`);
+  lines.close();
+}
+
+main().catch(error => {
+  process.stderr.write(`${error.stack}\n`);
+  process.exit(1);
+});
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Last- und Latenz-Benchmark für die Kiosk-Endpoints.
+
+Startet das Backend (API_backend.app im Werkzeug-Thread-Server oder wsgi:app
+unter Gunicorn) gegen ein temporäres Zielverzeichnis und einen lokalen
+OpenWeatherMap-Stub (benchmarks/owm_stub.py) und erzeugt realistischen
+Verkehr:
+
+- N Anzeige-Bildschirme fragen zyklisch /api/public/snapshot (mit
+  If-None-Match), weather, forecast, info und pdf_status ab und laden die
+  PDFs der sechs Slots neu, sobald sich deren Version geändert hat
+- ein Admin meldet sich an (mit CSRF-Token), lädt regelmäßig neue PDFs hoch,
+  ändert den Lauftext und stößt die Wetter-Aktualisierung an
+
+Ausgabe: Durchsatz und p50/p95/p99 pro Route, als Tabelle und als JSON
+(--out). Mit --compare wird gegen ein früheres Ergebnis verglichen:
+
+    python benchmarks/load_test.py --screens 20 --duration 30 --out before.json
+    python benchmarks/load_test.py --screens 20 --duration 30 --compare before.json
+    python benchmarks/load_test.py --server gunicorn --workers 2 --threads 50
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from owm_stub import StubServer  # noqa: E402
+from pdf_fixtures import make_pdf  # noqa: E402
+
+SLOTS = range(1, 7)
+PASSWORD = 'loadtest'
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.status: Dict[str, Dict[int, int]] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def add(self, route: str, seconds: float, status: int, size: int) -> None:
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            codes = self.status.setdefault(route, {})
+            codes[status] = codes.get(status, 0) + 1
+            self.bytes[route] = self.bytes.get(route, 0) + size
+            if status == 0 or status >= 400:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        def pct(values: List[float], q: float) -> float:
+            return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+
+        routes = {}
+        for route, values in sorted(self.samples.items()):
+            ordered = sorted(values)
+            routes[route] = {
+                'count': len(ordered),
+                'errors': self.errors.get(route, 0),
+                'rps': round(len(ordered) / elapsed, 1),
+                'p50_ms': pct(ordered, 0.50),
+                'p95_ms': pct(ordered, 0.95),
+                'p99_ms': pct(ordered, 0.99),
+                'max_ms': round(ordered[-1] * 1000, 2),
+                'mean_ms': round(sum(ordered) / len(ordered) * 1000, 2),
+                'bytes': self.bytes.get(route, 0),
+                'status': {str(k): v for k, v in sorted(self.status[route].items())}
+            }
+        return routes
+
+
+class Client:
+    """Eine Keep-Alive-Verbindung pro Bildschirm (wie ein Browser-Tab)."""
+
+    def __init__(self, port: int, recorder: Recorder) -> None:
+        self.port = port
+        self.recorder = recorder
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, route: str, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        started = time.perf_counter()
+        try:
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            data = response.read()
+            status, response_headers = response.status, {k.lower(): v for k, v in response.getheaders()}
+            if response_headers.get('connection', '').lower() == 'close':
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            status, response_headers, data = 0, {}, b''
+        self.recorder.add(route, time.perf_counter() - started, status, len(data))
+        return status, response_headers, data
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def screen(port: int, recorder: Recorder, stop: threading.Event, think: float, refetch_pdfs: bool) -> None:
+    client = Client(port, recorder)
+    snapshot_etag = None
+    seen: Dict[str, Optional[str]] = {}
+    time.sleep(random.uniform(0, think))
+    while not stop.is_set():
+        headers = {'If-None-Match': snapshot_etag} if snapshot_etag else {}
+        status, response_headers, _ = client.request('GET /api/public/snapshot', 'GET', '/api/public/snapshot', headers=headers)
+        if status == 200:
+            snapshot_etag = response_headers.get('etag')
+        for name in ('weather', 'forecast', 'info'):
+            client.request(f'GET /api/public/{name}', 'GET', f'/api/public/{name}')
+        status, _, body = client.request('GET /api/public/pdf_status', 'GET', '/api/public/pdf_status')
+        versions = json.loads(body).get('versions', {}) if status == 200 else {}
+        for slot in SLOTS:
+            version = versions.get(str(slot))
+            if refetch_pdfs or str(slot) not in seen or seen[str(slot)] != version:
+                suffix = f'?v={version}' if version else ''
+                status, _, _ = client.request('GET /api/public/pdfs/<n>.pdf', 'GET', f'/api/public/pdfs/{slot}.pdf{suffix}')
+                if status == 200:
+                    seen[str(slot)] = version
+        stop.wait(think * random.uniform(0.8, 1.2))
+    client.close()
+
+
+def multipart(fields: Dict[str, str], file_field: str, filename: str, content: bytes) -> Tuple[bytes, str]:
+    boundary = f'----loadtest{random.getrandbits(64):x}'
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode() + content + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def admin(port: int, recorder: Recorder, stop: threading.Event, upload_interval: float, pdf_kb: int) -> None:
+    client = Client(port, recorder)
+    cookie = ''
+
+    def remember(headers: Dict[str, str]) -> None:
+        nonlocal cookie
+        match = re.search(r'session=([^;]+)', headers.get('set-cookie', ''))
+        if match:
+            cookie = f'session={match.group(1)}'
+
+    def csrf_token(html: bytes) -> str:
+        match = re.search(rb'name="csrf-token" content="([^"]+)"', html)
+        return match.group(1).decode() if match else ''
+
+    status, headers, html = client.request('GET /', 'GET', '/')
+    remember(headers)
+    body, content_type = f'password={PASSWORD}&csrf_token={csrf_token(html)}'.encode(), 'application/x-www-form-urlencoded'
+    status, headers, _ = client.request('POST /', 'POST', '/', body=body,
+                                        headers={'Content-Type': content_type, 'Cookie': cookie})
+    remember(headers)
+    status, headers, html = client.request('GET /dashboard', 'GET', '/dashboard', headers={'Cookie': cookie})
+    remember(headers)
+    token = csrf_token(html)
+    if status != 200 or not token:
+        print(f"Admin-Anmeldung fehlgeschlagen (HTTP {status})", file=sys.stderr)
+        return
+
+    round_number = 0
+    while not stop.wait(upload_interval * random.uniform(0.8, 1.2)):
+        round_number += 1
+        slot = random.choice(list(SLOTS))
+        pdf = make_pdf(f'Slot {slot} Runde {round_number}', pad_kb=pdf_kb)
+        body, content_type = multipart({'number': str(slot), 'csrf_token': token}, 'file', f'aushang{slot}.pdf', pdf)
+        client.request('POST /upload', 'POST', '/upload', body=body,
+                       headers={'Content-Type': content_type, 'Cookie': cookie, 'X-CSRFToken': token})
+        if round_number % 5 == 0:
+            body = json.dumps({'info': f'Lauftext {round_number}'}).encode()
+            client.request('POST /update_infos', 'POST', '/update_infos', body=body,
+                           headers={'Content-Type': 'application/json', 'Cookie': cookie, 'X-CSRFToken': token})
+        if round_number % 10 == 0:
+            client.request('GET /wetter_update', 'GET', '/wetter_update', headers={'Cookie': cookie})
+    client.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/public/info')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('Server nicht erreichbar')
+
+
+def prepare(target_dir: str, pdf_kb: int) -> None:
+    for sub in ('pdfs', 'output'):
+        os.makedirs(os.path.join(target_dir, sub), exist_ok=True)
+    for slot in SLOTS:
+        with open(os.path.join(target_dir, 'pdfs', f'{slot}.pdf'), 'wb') as f:
+            f.write(make_pdf(f'Slot {slot}', pad_kb=pdf_kb))
+    with open(os.path.join(target_dir, 'output', 'infos.json'), 'w', encoding='utf-8') as f:
+        json.dump({'infos': 'Lasttest läuft'}, f, ensure_ascii=False)
+    with open(os.path.join(target_dir, 'output', 'auto_update_status.json'), 'w') as f:
+        json.dump({'auto_update': False}, f)
+    from wetterdaten import main as refresh_weather
+    refresh_weather(target_dir)
+
+
+def start_server(args: argparse.Namespace, target_dir: str, env: Dict[str, str]) -> Tuple[int, Any]:
+    port = free_port()
+    if args.server == 'gunicorn':
+        command = [
+            sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+            '--worker-class', 'gthread', '--workers', str(args.workers), '--threads', str(args.threads),
+            '--pythonpath', PROJECT_DIR, '--log-level', 'warning', 'wsgi:app'
+        ]
+        process = subprocess.Popen(command, cwd=target_dir, env=dict(os.environ, **env),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_ready(port)
+        return port, process.terminate
+
+    import logging
+    from werkzeug.serving import make_server
+    from API_backend import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    wait_ready(port)
+    return port, server.shutdown
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(routes: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+    header = f"{'Route':<34} {'Anz.':>7} {'Fehl.':>5} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header + ('  Δp95' if baseline else ''))
+    for route, r in routes.items():
+        line = (f"{route:<34} {r['count']:>7} {r['errors']:>5} {r['rps']:>7} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+        old = (baseline or {}).get('routes', {}).get(route)
+        if old and old['p95_ms']:
+            line += f"  {(r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100:+.0f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--screens', type=int, default=20, help='gleichzeitige Anzeige-Bildschirme')
+    parser.add_argument('--duration', type=float, default=30.0, help='Messdauer in Sekunden')
+    parser.add_argument('--think', type=float, default=1.0, help='Pause zwischen zwei Abfragezyklen (s)')
+    parser.add_argument('--upload-interval', type=float, default=2.0, help='Sekunden zwischen Admin-Uploads (0 = aus)')
+    parser.add_argument('--pdf-kb', type=int, default=256, help='Größe der Test-PDFs')
+    parser.add_argument('--refetch-pdfs', action='store_true', help='PDFs in jedem Zyklus laden (ohne Browser-Cache)')
+    parser.add_argument('--server', choices=('werkzeug', 'gunicorn'), default='werkzeug')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=50)
+    parser.add_argument('--stub-latency', type=float, default=0.05, help='Latenz des OWM-Stubs (s)')
+    parser.add_argument('--out', help='Ergebnis als JSON speichern')
+    parser.add_argument('--compare', help='früheres JSON-Ergebnis zum Vergleich')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    parser.add_argument('--keep', action='store_true', help='temporäres Zielverzeichnis behalten')
+    args = parser.parse_args()
+
+    stub = StubServer(0, latency=args.stub_latency)
+    stub.start()
+    target_dir = tempfile.mkdtemp(prefix='ff_load_')
+    env = {
+        'zielverzeichnis': target_dir,
+        'OPENWEATHER_API_KEY': 'loadtest',
+        'OPENWEATHER_BASE_URL': stub.base_url,
+        'DASHBOARD_PASSWORD': PASSWORD,
+        'WEATHER_SCHEDULER': 'false',
+        'RATE_LIMIT_LOGIN': '1000 per minute'
+    }
+    os.environ.update(env)
+    os.chdir(target_dir)
+    prepare(target_dir, args.pdf_kb)
+    port, shutdown = start_server(args, target_dir, env)
+
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [threading.Thread(target=screen, args=(port, recorder, stop, args.think, args.refetch_pdfs), daemon=True)
+               for _ in range(args.screens)]
+    if args.upload_interval > 0:
+        threads.append(threading.Thread(target=admin, args=(port, recorder, stop, args.upload_interval, args.pdf_kb),
+                                        daemon=True))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+    elapsed = time.perf_counter() - started
+    shutdown()
+
+    routes = recorder.summary(elapsed)
+    total = sum(r['count'] for r in routes.values())
+    result = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'server': args.server,
+            'workers': args.workers if args.server == 'gunicorn' else 1,
+            'screens': args.screens,
+            'duration_s': round(elapsed, 2),
+            'think_s': args.think,
+            'upload_interval_s': args.upload_interval,
+            'pdf_kb': args.pdf_kb,
+            'upstream_requests': stub.requests
+        },
+        'total': {
+            'requests': total,
+            'errors': sum(r['errors'] for r in routes.values()),
+            'rps': round(total / elapsed, 1)
+        },
+        'routes': routes
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{args.screens} Bildschirme, {result['meta']['duration_s']}s, Server {args.server}: "
+              f"{total} Anfragen, {result['total']['rps']} req/s, {result['total']['errors']} Fehler")
+        print_table(routes, baseline)
+
+    if not args.keep:
+        shutil.rmtree(target_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
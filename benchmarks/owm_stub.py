@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Lokaler Stand-in für die OpenWeatherMap API (/data/2.5/weather und /forecast).
+
+Liefert Antworten im Format der echten API, wahlweise mit künstlicher
+Latenz und Fehlerquote, damit WeatherClient, Scheduler und Benchmarks ohne
+API-Key und ohne Netz laufen:
+
+    python benchmarks/owm_stub.py --port 8099 --latency 0.2 --error-rate 0.1
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8099/data/2.5 python wetterdaten.py
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+ICONS = [('01', 'Klarer Himmel'), ('02', 'Ein paar Wolken'), ('03', 'Mäßig bewölkt'),
+         ('04', 'Überwiegend bewölkt'), ('09', 'Nieselregen'), ('10', 'Leichter Regen')]
+
+
+def _weather(seed: int, hour: int) -> Dict[str, Any]:
+    code, description = ICONS[seed % len(ICONS)]
+    suffix = 'd' if 6 <= hour < 20 else 'n'
+    return {'id': 800 + seed % 4, 'main': 'Clouds', 'description': description, 'icon': f'{code}{suffix}'}
+
+
+def current_payload(city: str, now: Optional[float] = None, tz_offset: int = 7200) -> Dict[str, Any]:
+    now = now or time.time()
+    base = 12 + 8 * math.sin(now / 86400 * 2 * math.pi)
+    hour = time.gmtime(now + tz_offset).tm_hour
+    return {
+        'coord': {'lon': 13.32, 'lat': 52.63},
+        'weather': [_weather(int(now // 3600), hour)],
+        'main': {'temp': base, 'feels_like': base - 1, 'temp_min': base - 2, 'temp_max': base + 2,
+                 'pressure': 1013, 'humidity': 60 + int(now // 3600) % 30},
+        'wind': {'speed': 3.6, 'deg': 250},
+        'dt': int(now),
+        'timezone': tz_offset,
+        'name': city,
+        'cod': 200
+    }
+
+
+def forecast_payload(city: str, now: Optional[float] = None, tz_offset: int = 7200, count: int = 40) -> Dict[str, Any]:
+    """5-Tage/3-Stunden-Vorhersage wie /forecast (40 Einträge, UTC-Zeitstempel)."""
+    now = now or time.time()
+    start = int(now // 10800 + 1) * 10800
+    entries = []
+    for i in range(count):
+        ts = start + i * 10800
+        temp = 12 + 8 * math.sin((ts % 86400) / 86400 * 2 * math.pi) + (i % 7) * 0.3
+        entry = {
+            'dt': ts,
+            'main': {'temp': temp, 'feels_like': temp - 1, 'temp_min': temp - 1.5, 'temp_max': temp + 1.5,
+                     'pressure': 1012, 'humidity': 55 + (i * 7) % 40},
+            'weather': [_weather(i // 4, time.gmtime(ts + tz_offset).tm_hour)],
+            'clouds': {'all': (i * 13) % 100},
+            'wind': {'speed': 2 + (i % 5) * 1.1, 'deg': (i * 37) % 360, 'gust': 4 + (i % 5) * 1.5},
+            'pop': ((i * 17) % 100) / 100,
+            'dt_txt': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+        }
+        if i % 3 == 0:
+            entry['rain'] = {'3h': round(0.2 * (i % 4), 2)}
+        entries.append(entry)
+    return {
+        'cod': '200', 'message': 0, 'cnt': count, 'list': entries,
+        'city': {'id': 2921044, 'name': city, 'coord': {'lat': 52.63, 'lon': 13.32},
+                 'country': 'DE', 'timezone': tz_offset}
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'OWMStub/1.0'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        stub = self.server
+        stub.requests += 1
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        if stub.latency:
+            time.sleep(stub.latency)
+        if random.random() < stub.error_rate:
+            self._send(503, {'cod': 503, 'message': 'stub error'})
+            return
+        if query.get('appid') is None:
+            self._send(401, {'cod': 401, 'message': 'Invalid API key'})
+            return
+
+        city = query.get('q', 'Berlin')
+        if parsed.path.endswith('/weather'):
+            self._send(200, current_payload(city))
+        elif parsed.path.endswith('/forecast'):
+            self._send(200, forecast_payload(city))
+        else:
+            self._send(404, {'cod': 404, 'message': 'not found'})
+
+    def _send(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, error_rate: float = 0.0) -> None:
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_port}/data/2.5'
+
+    def start(self) -> 'StubServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubServer(args.port, args.latency, args.error_rate)
+    print(f"OpenWeatherMap-Stub läuft auf {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,89 @@
+"""
+Erzeugt kleine, gültige PDF-Dateien für Benchmarks (ohne externe Bibliothek).
+
+``make_pdf('Slot 3', pad_kb=512)`` liefert eine einseitige PDF mit Text;
+``pad_kb`` bläht die Datei über einen Kommentar auf, um realistische
+Dateigrößen (eingescannte Aushänge) zu simulieren.
+
+``make_scan_pdf('Aushang', pages=2, dpi=300)`` bettet stattdessen pro Seite
+ein verrauschtes A4-Bild in Scanner-Auflösung ein (wie vom Scanner direkt).
+"""
+
+import os
+import zlib
+from typing import List
+
+
+def make_pdf(label: str, pad_kb: int = 0, pages: int = 1) -> bytes:
+    page_ids = [3 + 2 * i for i in range(pages)]
+    font_id = 3 + 2 * pages
+    objects: List[bytes] = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % p for p in page_ids), pages)
+    ]
+    for i in range(pages):
+        text = f'{label} - Seite {i + 1}'.encode('latin-1', 'replace')
+        content = b'BT /F1 28 Tf 72 720 Td (' + text + b') Tj ET'
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R '
+            b'/Resources << /Font << /F1 %d 0 R >> >> >>' % (page_ids[i] + 1, font_id)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    for _ in range(pad_kb):
+        out += b'%' + b'x' * 1022 + b'\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# Graustufen knapp unter Weiß mit Rauschen in den unteren Bits (Papierstruktur)
+_SCAN_TABLE = bytes(235 + (i & 15) for i in range(256))
+
+
+def make_scan_pdf(label: str, pages: int = 1, dpi: int = 300) -> bytes:
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    objects: List[bytes] = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b''  # Seitenbaum, unten ergänzt
+    ]
+    page_ids = []
+    for i in range(pages):
+        pixels = os.urandom(width * height * 3).translate(_SCAN_TABLE)
+        image = zlib.compress(pixels, 1)
+        image_id, content_id, page_id = len(objects) + 1, len(objects) + 2, len(objects) + 3
+        text = f'{label} - Seite {i + 1}'.encode('latin-1', 'replace')
+        content = b'q 595 0 0 842 0 0 cm /Im1 Do Q BT /F1 28 Tf 72 720 Td (' + text + b') Tj ET'
+        objects.append(b'<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB '
+                       b'/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n' % (width, height, len(image))
+                       + image + b'\nendstream')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 FONT 0 R >> /XObject << /Im1 %d 0 R >> >> >>' % (content_id, image_id))
+        page_ids.append(page_id)
+    font_id = len(objects) + 1
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % p for p in page_ids), pages)
+    objects = [o.replace(b'/F1 FONT 0 R', b'/F1 %d 0 R' % font_id) if o.startswith(b'<< /Type /Page ') else o
+               for o in objects]
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
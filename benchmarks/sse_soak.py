@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Soak-Test für den SSE-Kanal /api/public/events.
+
+Startet das Backend in einem Thread-Server gegen ein temporäres
+Zielverzeichnis, öffnet N gleichzeitige, untätige Abonnenten und
+veröffentlicht danach Events aus einem *separaten Prozess* (wie ein
+zweiter Gunicorn-Worker oder wetterdaten.py). Gemessen wird, ob und wie
+schnell jedes Event bei allen Abonnenten ankommt.
+
+    python benchmarks/sse_soak.py --subscribers 500 --events 5 --idle 30
+"""
+
+import argparse
+import json
+import os
+import resource
+import selectors
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def publish_from_other_process(target_dir: str, event_type: str) -> None:
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "from events import EventBroker\n"
+        "EventBroker(%r).publish(%r, {'soak': True})\n"
+    ) % (PROJECT_DIR, os.path.join(target_dir, 'output'), event_type)
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def open_subscriber(port: int) -> socket.socket:
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(b"GET /api/public/events HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n")
+    sock.setblocking(False)
+    return sock
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=300)
+    parser.add_argument('--events', type=int, default=3)
+    parser.add_argument('--idle', type=float, default=10.0, help='Sekunden ohne Events vor dem ersten Publish')
+    parser.add_argument('--json', action='store_true', help='Ergebnis als JSON ausgeben')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers * 2 + 256)), hard))
+
+    target_dir = tempfile.mkdtemp(prefix='ff_sse_soak_')
+    os.makedirs(os.path.join(target_dir, 'output'))
+    os.makedirs(os.path.join(target_dir, 'pdfs'))
+    os.environ['zielverzeichnis'] = target_dir
+    os.chdir(target_dir)
+    sys.path.insert(0, PROJECT_DIR)
+
+    from werkzeug.serving import make_server
+    import logging
+    from API_backend import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    selector = selectors.DefaultSelector()
+    buffers = {}
+    started = time.monotonic()
+    for _ in range(args.subscribers):
+        sock = open_subscriber(port)
+        selector.register(sock, selectors.EVENT_READ)
+        buffers[sock] = b''
+    connect_seconds = time.monotonic() - started
+
+    def pump(deadline: float, marker: bytes, pending: set) -> dict:
+        arrivals = {}
+        while pending and time.monotonic() < deadline:
+            for key, _ in selector.select(timeout=0.05):
+                sock = key.fileobj
+                try:
+                    chunk = sock.recv(65536)
+                except BlockingIOError:
+                    continue
+                buffers[sock] += chunk
+                if sock in pending and marker in buffers[sock]:
+                    arrivals[sock] = time.monotonic()
+                    pending.discard(sock)
+                    buffers[sock] = b''
+        return arrivals
+
+    # Alle Abonnenten müssen das hello-Event erhalten haben
+    hello = pump(time.monotonic() + 30, b'event: hello', set(buffers))
+    time.sleep(args.idle)
+    for sock in buffers:
+        buffers[sock] = b''
+
+    results = []
+    for i in range(args.events):
+        published = time.monotonic()
+        publish_from_other_process(target_dir, 'info')
+        arrivals = pump(time.monotonic() + 10, b'event: info', set(buffers))
+        latencies = sorted(t - published for t in arrivals.values())
+        results.append({
+            'event': i + 1,
+            'delivered': len(arrivals),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else None
+        })
+
+    summary = {
+        'subscribers': args.subscribers,
+        'connected': len(hello),
+        'connect_seconds': round(connect_seconds, 3),
+        'idle_seconds': args.idle,
+        'threads': threading.active_count(),
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'events': results
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"Abonnenten verbunden: {summary['connected']}/{args.subscribers} in {summary['connect_seconds']}s")
+        print(f"Threads: {summary['threads']}, max RSS: {summary['max_rss_kb']} kB")
+        for r in results:
+            print(f"Event {r['event']}: {r['delivered']}/{args.subscribers} zugestellt, p50 {r['p50_ms']} ms, max {r['max_ms']} ms")
+
+    for sock in buffers:
+        sock.close()
+    server.shutdown()
+    failed = any(r['delivered'] != args.subscribers for r in results) or len(hello) != args.subscribers
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+Komprimierte Antworten (gzip, Brotli falls ``brotli``/``brotlicffi`` installiert).
+
+Komprimiert werden Text-Antworten (HTML, CSS, JavaScript, JSON, SVG) ab
+COMPRESS_MIN_BYTES, wenn der Client sie per Accept-Encoding annimmt (Brotli
+vor gzip). Jede Variante wird einmal pro Inhalts-Version gebaut und im
+Speicher gehalten (LRU bis COMPRESS_CACHE_MB):
+
+- statische Dateien: Pfad + mtime + Größe, höchste Kompressionsstufe
+  (passiert nur einmal, warm_up() erledigt es vorab)
+- Antworten mit ETag (Snapshot, Slot-Status): der ETag
+- sonst: Hash des Inhalts (Wetter, Vorhersage, Info)
+
+Die Variante bekommt einen eigenen ETag (``<etag>-br``), jede komprimierbare
+Antwort ``Vary: Accept-Encoding``. Views vergleichen If-None-Match mit ihrem
+eigenen ETag; base_etags() lässt dafür auch die Varianten passen. PDFs, Bilder, Event-Streams und
+Range-Antworten bleiben unverändert, ebenso Antworten, deren Inhalt der
+Webserver per X-Sendfile/X-Accel-Redirect liefert. Nur bei statischen Dateien
+ersetzt die komprimierte Variante den Offload-Header (sonst sendete der
+Webserver die rohe Datei mit ``Content-Encoding: gzip``).
+"""
+
+import collections
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from flask import Response, request
+from werkzeug.datastructures import ETags
+from werkzeug.http import parse_etags
+from werkzeug.security import safe_join
+
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE = frozenset((
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'application/manifest+json', 'image/svg+xml'
+))
+
+# Header der FILE_DELIVERY_MODE-Offloads: den Inhalt schickt dann der Webserver
+OFFLOAD_HEADERS = ('X-Sendfile', 'X-Accel-Redirect')
+
+# (dynamisch, statisch): statische Dateien werden nur einmal komprimiert
+LEVELS = {'gzip': (6, 9), 'br': (5, 11)}
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Unterstützte Kodierungen in Reihenfolge der Bevorzugung."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    level = LEVELS[encoding][static]
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def negotiate(accept_encodings, encodings: Tuple[str, ...]) -> Optional[str]:
+    """Beste Kodierung laut Accept-Encoding (q-Werte, bei Gleichstand die Server-Reihenfolge)."""
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def base_etags(etags: ETags) -> ETags:
+    """If-None-Match samt Basis-ETags der Varianten (``<etag>-gzip`` passt auch auf ``<etag>``)."""
+    def with_base(tags: set) -> set:
+        return tags | {tag.rsplit('-', 1)[0] for tag in tags if tag.rsplit('-', 1)[-1] in LEVELS}
+    strong = etags.as_set()
+    weak = etags.as_set(include_weak=True) - strong
+    return ETags(with_base(strong), with_base(weak), etags.star_tag)
+
+
+class CompressionCache:
+    """LRU-Cache der komprimierten Varianten, begrenzt über die Summe der Bytes."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: 'collections.OrderedDict[Tuple[Hashable, str], bytes]' = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cpu_seconds = 0.0
+
+    def get(self, key: Hashable, encoding: str, load: Callable[[], bytes], static: bool = False) -> bytes:
+        entry_key = (key, encoding)
+        with self._lock:
+            body = self._entries.get(entry_key)
+            if body is not None:
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return body
+
+        started = time.process_time()
+        body = compress(load(), encoding, static)
+        elapsed = time.process_time() - started
+        metrics.inc('dashboard_compression_total', encoding=encoding, outcome='built')
+        with self._lock:
+            self.misses += 1
+            self.cpu_seconds += elapsed
+            if len(body) <= self.max_bytes:
+                previous = self._entries.pop(entry_key, None)
+                self._bytes += len(body) - (len(previous) if previous is not None else 0)
+                self._entries[entry_key] = body
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'cpu_seconds': round(self.cpu_seconds, 4)
+        }
+
+
+class ResponseCompressor:
+    def __init__(self, static_folder: Optional[str], min_size: int = 512, cache_bytes: int = 32 * 1024 * 1024,
+                 enabled: bool = True) -> None:
+        self.static_folder = static_folder
+        self.min_size = min_size
+        self.enabled = enabled
+        self.encodings = available_encodings()
+        self.cache = CompressionCache(cache_bytes)
+
+    def _static_file(self) -> Optional[Tuple[str, Hashable]]:
+        if request.endpoint != 'static' or self.static_folder is None:
+            return None
+        path = safe_join(self.static_folder, (request.view_args or {}).get('filename', ''))
+        try:
+            st = os.stat(path)
+        except (OSError, TypeError):
+            return None
+        return path, ('file', path, st.st_mtime_ns, st.st_size)
+
+    def process(self, response: Response) -> Response:
+        """after_request: komprimierte Variante einsetzen, wo es passt."""
+        if self.enabled and response.status_code == 304:
+            return self._not_modified(response)
+        if not self.enabled or response.status_code != 200 or request.method not in ('GET', 'HEAD') \
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings, self.encodings)
+        if encoding is None:
+            return response
+
+        static = self._static_file()
+        offloaded = any(header in response.headers for header in OFFLOAD_HEADERS)
+        if offloaded and static is None:
+            return response
+        if static is not None:
+            path, key = static
+            if key[3] < self.min_size:
+                return response
+
+            def load() -> bytes:
+                with open(path, 'rb') as f:
+                    return f.read()
+        else:
+            if response.is_streamed or response.direct_passthrough:
+                return response
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            etag = response.get_etag()[0]
+            key = ('etag', etag) if etag else ('sha1', hashlib.sha1(data).digest())
+
+            def load() -> bytes:
+                return data
+
+        etag, weak = response.get_etag()
+        variant_etag = f'{etag}-{encoding}' if etag else None
+        if variant_etag is not None and request.if_none_match.contains(variant_etag):
+            body = None  # Client hat genau diese Variante: 304, nichts komprimieren
+        else:
+            body = self.cache.get(key, encoding, load, static=static is not None)
+            original_size = key[3] if static is not None else len(data)
+            if len(body) >= original_size:
+                return response
+            metrics.inc('dashboard_compression_saved_bytes_total', original_size - len(body), encoding=encoding)
+
+        if static is not None:
+            response.close()  # Datei-Wrapper schließen, der Inhalt kommt aus dem Cache
+            response.direct_passthrough = False
+            for header in OFFLOAD_HEADERS:
+                response.headers.pop(header, None)
+        if body is None:
+            response.status_code = 304
+            response.set_data(b'')
+            response.headers.pop('Content-Length', None)
+        else:
+            response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if variant_etag is not None:
+            response.set_etag(variant_etag, weak=weak)
+        return response
+
+    def _not_modified(self, response: Response) -> Response:
+        """304 der View (Basis-ETag passte): dem Client den ETag seiner Variante bestätigen."""
+        etag, weak = response.get_etag()
+        if etag is None:
+            return response
+        encoding = negotiate(request.accept_encodings, self.encodings)
+        variant_etag = f'{etag}-{encoding}'
+        if encoding is not None and parse_etags(request.headers.get('If-None-Match')).contains(variant_etag):
+            response.vary.add('Accept-Encoding')
+            response.set_etag(variant_etag, weak=weak)
+        return response
+
+    def precompress_static(self) -> int:
+        """Alle komprimierbaren statischen Dateien vorab komprimieren (warm_up, --preload)."""
+        count = 0
+        if self.static_folder is None or not self.enabled:
+            return count
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                mimetype = mimetypes.guess_type(name)[0]
+                st = os.stat(path)
+                if mimetype not in COMPRESSIBLE or st.st_size < self.min_size:
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                for encoding in self.encodings:
+                    self.cache.get(('file', path, st.st_mtime_ns, st.st_size), encoding, lambda: data, static=True)
+                count += 1
+        return count
@@ -0,0 +1,213 @@
+"""
+Änderungs-Events für die Kiosk-Bildschirme (Server-Sent Events / Long-Poll).
+
+Der Broker ist eine Append-only Logdatei im Ausgabe-Verzeichnis, damit alle
+Gunicorn-Worker und auch der separate wetterdaten.py-Prozess Events
+veröffentlichen können. IDs werden über eine Sequenzdatei unter flock()
+vergeben. Pro Prozess liest ein Watcher-Thread neue Zeilen ein und weckt
+die wartenden Abonnenten; ein Abonnent ist damit nur ein schlafender Thread
+ohne eigene Datei-Zugriffe.
+"""
+
+import collections
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ('slots', 'info', 'auto_update', 'weather')
+
+
+class EventBroker:
+    def __init__(self, directory: Optional[str] = None, poll_interval: float = 0.25,
+                 buffer_size: int = 256, max_log_bytes: int = 256 * 1024) -> None:
+        self._directory = directory
+        self.poll_interval = poll_interval
+        self.max_log_bytes = max_log_bytes
+        self._buffer: Deque[Dict[str, Any]] = collections.deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._wakeup = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._last_id = 0
+        self.subscribers = 0
+
+    def configure(self, directory: str) -> None:
+        """Setzt das Verzeichnis für Log- und Sequenzdatei (vor dem ersten Zugriff)."""
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        if self._directory is None:
+            target_dir = os.getenv('zielverzeichnis', '/opt/feuerwehr_dashboard')
+            self._directory = os.path.join(target_dir, 'output')
+        return self._directory
+
+    @property
+    def log_path(self) -> str:
+        return os.path.join(self.directory, 'events.log')
+
+    @property
+    def last_id(self) -> int:
+        self._ensure_watcher()
+        return self._last_id
+
+    # ----- Schreiben -----
+
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """Hängt ein Event an das gemeinsame Log an und liefert dessen ID."""
+        os.makedirs(self.directory, exist_ok=True)
+        seq_path = os.path.join(self.directory, 'events.seq')
+        with open(seq_path, 'a+', encoding='utf-8') as seq_file:
+            fcntl.flock(seq_file, fcntl.LOCK_EX)
+            try:
+                seq_file.seek(0)
+                content = seq_file.read().strip()
+                event_id = (int(content) if content else 0) + 1
+                event = {'id': event_id, 'type': event_type, 'data': data or {}, 'ts': time.time()}
+
+                self._rotate_if_needed()
+                with open(self.log_path, 'a', encoding='utf-8') as log_file:
+                    log_file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+                seq_file.seek(0)
+                seq_file.truncate()
+                seq_file.write(str(event_id))
+                seq_file.flush()
+            finally:
+                fcntl.flock(seq_file, fcntl.LOCK_UN)
+
+        self._wakeup.set()
+        return event_id
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if os.path.getsize(self.log_path) > self.max_log_bytes:
+                os.replace(self.log_path, self.log_path + '.1')
+        except FileNotFoundError:
+            pass
+
+    # ----- Lesen -----
+
+    def _ensure_watcher(self) -> None:
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        with self._condition:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(target=self._watch, name='event-watcher', daemon=True)
+            self._watcher.start()
+            # Startposition ermitteln, damit alte Events nicht erneut ausgeliefert werden
+            self._condition.wait(timeout=5)
+
+    def _watch(self) -> None:
+        log_file = None
+        inode = None
+        first_pass = True
+        while True:
+            try:
+                st = os.stat(self.log_path)
+                if log_file is None or st.st_ino != inode:
+                    if log_file is not None:
+                        self._read_lines(log_file, publish=True)
+                        log_file.close()
+                    log_file = open(self.log_path, 'rb')
+                    inode = st.st_ino
+                self._read_lines(log_file, publish=not first_pass)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Event-Watcher Fehler: {e}")
+
+            if first_pass:
+                first_pass = False
+                with self._condition:
+                    self._condition.notify_all()
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _read_lines(self, log_file, publish: bool) -> None:
+        events = []
+        for line in log_file.readlines():
+            if not line.endswith(b'\n'):
+                # Halb geschriebene Zeile: beim nächsten Durchlauf erneut lesen
+                log_file.seek(-len(line), os.SEEK_CUR)
+                break
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        if not events:
+            return
+        with self._condition:
+            for event in events:
+                if event['id'] <= self._last_id:
+                    continue
+                self._last_id = event['id']
+                if publish:
+                    self._buffer.append(event)
+            self._condition.notify_all()
+
+    def events_since(self, last_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Gepufferte Events nach last_id; None, wenn der Puffer nicht mehr reicht."""
+        with self._condition:
+            return self._events_since(last_id)
+
+    def _events_since(self, last_id: int) -> Optional[List[Dict[str, Any]]]:
+        if last_id == self._last_id:
+            return []
+        # Client voraus (Log zurückgesetzt, z.B. Zielverzeichnis neu) oder Puffer zu kurz: Lücke
+        if last_id > self._last_id or not self._buffer or self._buffer[0]['id'] > last_id + 1:
+            return None
+        return [event for event in self._buffer if event['id'] > last_id]
+
+    def wait(self, last_id: int, timeout: float) -> Optional[List[Dict[str, Any]]]:
+        """Blockiert bis zu timeout Sekunden, bis neue Events nach last_id vorliegen."""
+        self._ensure_watcher()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self._events_since(last_id)
+                if events is None or events:
+                    return events
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._condition.wait(remaining)
+
+    def stream(self, last_id: Optional[int] = None, heartbeat: float = 15.0) -> Iterator[str]:
+        """SSE-Datenstrom; Heartbeat-Kommentare halten Proxies und Kiosk verbunden."""
+        self._ensure_watcher()
+        if last_id is None:
+            last_id = self._last_id
+        # gthread-Worker: viele Verbindungen gleichzeitig, += ist nicht atomar
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield f"retry: 5000\nevent: hello\nid: {last_id}\ndata: {{}}\n\n"
+            while True:
+                events = self.wait(last_id, heartbeat)
+                if events is None:
+                    # Zu weit zurück: Client soll alles neu laden
+                    last_id = self._last_id
+                    yield f"event: resync\nid: {last_id}\ndata: {{}}\n\n"
+                    continue
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for event in events:
+                    last_id = event['id']
+                    payload = json.dumps(event['data'], ensure_ascii=False)
+                    yield f"event: {event['type']}\nid: {last_id}\ndata: {payload}\n\n"
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+
+# Gemeinsame Instanz für Backend und wetterdaten.py
+event_broker = EventBroker()
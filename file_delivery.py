@@ -0,0 +1,87 @@
+"""
+Auslieferung von PDFs, gerasterten Seiten und static/ (FILE_DELIVERY_MODE).
+
+- sendfile (Standard): Datei-Objekt über ``wsgi.file_wrapper``; Gunicorn
+  überträgt den Inhalt per os.sendfile() aus dem Kernel, ohne die Bytes
+  durch Python zu schleifen (Range-Anfragen laufen weiter über Python)
+- python: Inhalt wird in Python gelesen und geschrieben (Vergleichswert,
+  bzw. für Server ohne file_wrapper)
+- x-accel-redirect: nginx liefert aus; Python setzt nur
+  ``X-Accel-Redirect: <FILE_DELIVERY_ACCEL_PREFIX>/<Pfad relativ zum Zielverzeichnis>``
+- x-sendfile: Apache (mod_xsendfile) / lighttpd; ``X-Sendfile: <absoluter Pfad>``
+
+In allen Modi prüft Python Slot, ETag/If-None-Match (304) und setzt die
+Cache-Header; bei den Offload-Modi bearbeitet der Webserver Range-Anfragen.
+Dateien außerhalb des Zielverzeichnisses (z.B. static/ einer Installation
+neben dem Zielverzeichnis) kann nginx nicht über die interne Location
+erreichen; sie gehen per sendfile raus. Komprimierbare statische Dateien
+ersetzt compression.py durch die gecachte Variante samt Offload-Header.
+"""
+
+import os
+import zlib
+from typing import Optional
+
+from flask import Response, current_app, request
+from werkzeug.utils import send_file as werkzeug_send_file
+
+from profiling import span
+
+MODES = ('sendfile', 'python', 'x-accel-redirect', 'x-sendfile')
+
+
+class FileDelivery:
+    def __init__(self, mode: str = 'sendfile', root: Optional[str] = None,
+                 accel_prefix: str = '/protected') -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unbekannter FILE_DELIVERY_MODE '{mode}' (erlaubt: {', '.join(MODES)})")
+        self.mode = mode
+        self.root = os.path.abspath(root) if root else None
+        self.accel_prefix = accel_prefix.rstrip('/')
+
+    @property
+    def offloaded(self) -> bool:
+        return self.mode in ('x-accel-redirect', 'x-sendfile')
+
+    def can_offload(self, path: str) -> bool:
+        if self.mode == 'x-sendfile':
+            return True
+        if self.mode != 'x-accel-redirect' or self.root is None:
+            return False
+        return os.path.commonpath([self.root, os.path.abspath(path)]) == self.root
+
+    def send(self, path: str, mimetype: str, etag: Optional[str] = None,
+             last_modified: Optional[float] = None) -> Response:
+        with span('io', f'send_file:{self.mode}'):
+            if self.can_offload(path):
+                return self._offload(path, mimetype, etag, last_modified)
+
+            environ = request.environ
+            if self.mode == 'python':
+                environ = {k: v for k, v in environ.items() if k != 'wsgi.file_wrapper'}
+            return werkzeug_send_file(
+                path,
+                environ,
+                mimetype=mimetype,
+                conditional=True,
+                etag=etag if etag is not None else True,
+                last_modified=last_modified,
+                max_age=current_app.get_send_file_max_age,
+                response_class=current_app.response_class,
+                _root_path=current_app.root_path
+            )
+
+    def _offload(self, path: str, mimetype: str, etag: Optional[str], last_modified: Optional[float]) -> Response:
+        path = os.path.abspath(path)
+        response = current_app.response_class(mimetype=mimetype)
+        if self.mode == 'x-sendfile':
+            response.headers['X-Sendfile'] = path
+        else:
+            response.headers['X-Accel-Redirect'] = f'{self.accel_prefix}/{os.path.relpath(path, self.root)}'
+        st = os.stat(path)
+        # Ohne Inhalts-Version (static/): ETag wie werkzeug.send_file aus mtime, Größe und Pfad
+        response.set_etag(etag if etag is not None
+                          else f'{st.st_mtime}-{st.st_size}-{zlib.adler32(path.encode()) & 0xffffffff}')
+        response.last_modified = last_modified if last_modified is not None else st.st_mtime
+        # Ranges bearbeitet der Webserver, 304 entscheidet weiterhin Python
+        return response.make_conditional(request.environ, accept_ranges=False)
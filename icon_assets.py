@@ -0,0 +1,90 @@
+"""
+Registry der Wetter-Icons mit inhaltsgehashten, unveränderlichen URLs.
+
+Beim Start werden static/Datenback_images/*.png einmal eingelesen und
+gehasht. Die Wetter-JSONs verweisen über ``icon_url`` auf
+/assets/icons/<code>.<hash>.png; diese Antworten dürfen ein Jahr lang
+gecacht werden, weil sich der Inhalt unter derselben URL nie ändert.
+Damit entfallen die Datei-Kopien nach output/ bei jeder Aktualisierung.
+weather_icon_links.json dient als Rückfall, um Icons über die Beschreibung
+zu finden.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+ICON_URL_PREFIX = '/assets/icons'
+
+
+class IconAsset:
+    __slots__ = ('code', 'digest', 'data', 'filename')
+
+    def __init__(self, code: str, data: bytes) -> None:
+        self.code = code
+        self.data = data
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.filename = f'{code}.{self.digest}.png'
+
+    @property
+    def url(self) -> str:
+        return f'{ICON_URL_PREFIX}/{self.filename}'
+
+
+class IconRegistry:
+    def __init__(self, icon_dir: str, links_file: Optional[str] = None) -> None:
+        self.icons: Dict[str, IconAsset] = {}
+        self.by_filename: Dict[str, IconAsset] = {}
+        self.by_description: Dict[str, str] = {}
+
+        for path in sorted(glob.glob(os.path.join(icon_dir, '*.png'))):
+            with open(path, 'rb') as f:
+                asset = IconAsset(os.path.splitext(os.path.basename(path))[0], f.read())
+            self.icons[asset.code] = asset
+            self.by_filename[asset.filename] = asset
+
+        if links_file and os.path.exists(links_file):
+            with open(links_file, 'r', encoding='utf-8') as f:
+                for description, link in json.load(f).items():
+                    match = re.search(r'/(\w{3})@', link)
+                    if match:
+                        self.by_description[description] = match.group(1)
+
+    def resolve(self, icon_code: Optional[str] = None, description: Optional[str] = None) -> Optional[IconAsset]:
+        if icon_code and icon_code in self.icons:
+            return self.icons[icon_code]
+        code = self.by_description.get(description or '')
+        return self.icons.get(code) if code else None
+
+    def url(self, icon_code: Optional[str] = None, description: Optional[str] = None) -> Optional[str]:
+        asset = self.resolve(icon_code, description)
+        return asset.url if asset is not None else None
+
+    def lookup(self, filename: str) -> Tuple[Optional[IconAsset], bool]:
+        """Asset zu einem Dateinamen; zweiter Wert False bei veraltetem Hash."""
+        asset = self.by_filename.get(filename)
+        if asset is not None:
+            return asset, True
+        code = filename.split('.', 1)[0]
+        return self.icons.get(code), False
+
+
+_registry: Optional[IconRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_icon_registry() -> IconRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = IconRegistry(
+                    os.path.join(PROJECT_DIR, 'static', 'Datenback_images'),
+                    os.path.join(PROJECT_DIR, 'weather_icon_links.json')
+                )
+    return _registry
@@ -0,0 +1,177 @@
+"""
+Nicht blockierendes Logging über eine Queue.
+
+Request-Threads legen LogRecords nur in eine begrenzte Queue
+(LOG_QUEUE_SIZE); ein Listener-Thread formatiert und schreibt sie in die
+eigentlichen Handler (Datei, Konsole). Ist die Queue voll, weil die Platte
+hängt, wird der Eintrag verworfen statt den Request aufzuhalten. Der
+Listener meldet verworfene Einträge gesammelt als Warnung, /metrics zählt
+sie in dashboard_log_records_dropped_total.
+
+Zugriffs-Logs der Kiosk-Abfragen (GET, Status < 400) werden mit
+LOG_ACCESS_SAMPLE gesampelt; Fehler und schreibende Anfragen immer geloggt.
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import traceback
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Attribute, die jeder LogRecord hat; alles andere kam über extra={...}
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Eintrag; Felder aus ``extra`` werden übernommen."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler, der bei voller Queue verwirft statt zu blockieren."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Nur die Nachricht festhalten (Argumente können sich danach ändern);
+        # Formatieren und Traceback-Aufbereitung übernimmt der Listener-Thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DroppingQueueListener(QueueListener):
+    """Listener zum DroppingQueueHandler; meldet verworfene Einträge gesammelt."""
+
+    def __init__(self, source: DroppingQueueHandler, *handlers: logging.Handler) -> None:
+        super().__init__(source.queue, *handlers, respect_handler_level=True)
+        self.source = source
+        self.reported = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        dropped = self.source.dropped
+        if dropped > self.reported:
+            notice = logging.LogRecord('log_pipeline', logging.WARNING, __file__, 0,
+                                       '%d Log-Einträge verworfen (Queue voll)', (dropped - self.reported,), None)
+            self.reported = dropped
+            super().handle(notice)
+        super().handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # Beim Beenden warten statt verwerfen, damit der Listener sicher endet
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    def __init__(self) -> None:
+        self.handler: Optional[DroppingQueueHandler] = None
+        self._handlers: Tuple[logging.Handler, ...] = ()
+        self._listener: Optional[DroppingQueueListener] = None
+        self._queue_size = 10000
+        # Nach einem Fork: Listener erst im bedienenden Prozess starten (resume)
+        self._forked = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped if self.handler is not None else 0
+
+    def configure(self, handlers: List[logging.Handler], queue_size: int = 10000,
+                  level: int = logging.INFO) -> DroppingQueueHandler:
+        """Hängt den Queue-Handler an den Root-Logger; ``handlers`` laufen im Listener-Thread."""
+        self._handlers = tuple(handlers)
+        self._queue_size = queue_size
+        self.handler = DroppingQueueHandler(queue.Queue(queue_size))
+        self.handler.setLevel(level)
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        self._start()
+        atexit.register(self.stop)
+        return self.handler
+
+    def _start(self) -> None:
+        self._listener = DroppingQueueListener(self.handler, *self._handlers)
+        # Nur neu verworfene Einträge melden (nach einem Fork stehen geerbte im Zähler)
+        self._listener.reported = self.handler.dropped
+        self._listener.start()
+
+    def stop(self) -> None:
+        """Leert die Queue und beendet den Listener (z.B. beim Herunterfahren)."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def resume(self) -> None:
+        """Im bedienenden Prozess nach einem Fork (Gunicorn-Worker) den Listener starten."""
+        if not self._forked:
+            return
+        with self._lock:
+            if self._forked:
+                self._forked = False
+                self._start()
+
+    def _after_fork(self) -> None:
+        # Der Listener-Thread des Elternprozesses fehlt im Kind. Neu gestartet wird
+        # erst mit resume(), damit die Kindprozesse der PDF-Pools keinen eigenen
+        # Listener mit Datei-Handler betreiben; bis dahin sammelt die Queue
+        self._lock = threading.Lock()
+        self._listener = None
+        if self.handler is None:
+            return
+        # Den geerbten Zähler zieht metrics als Stand des Elternprozesses ab
+        self.handler.queue = queue.Queue(self._queue_size)
+        self._forked = True
+
+    def collect(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        yield 'dashboard_log_records_dropped_total', {}, self.dropped
+
+
+class AccessSampler:
+    """Entscheidet, ob eine Anfrage ins Zugriffs-Log kommt."""
+
+    def __init__(self, rate: float) -> None:
+        self.rate = min(max(rate, 0.0), 1.0)
+
+    def sample(self, method: str, status: int) -> bool:
+        if method != 'GET' or status >= 400:
+            return True
+        return self.rate >= 1.0 or (self.rate > 0.0 and random.random() < self.rate)
+
+
+# Gemeinsame Instanz für alle Module eines Prozesses
+log_pipeline = LogPipeline()
+os.register_at_fork(after_in_child=log_pipeline._after_fork)
@@ -0,0 +1,295 @@
+"""
+Metriken im Prometheus-Textformat, über alle Gunicorn-Worker aggregiert.
+
+Jeder Prozess zählt im Speicher (ein Lock, ein paar Dict-Updates pro
+Messung) und schreibt seinen Stand alle METRICS_FLUSH_SECONDS atomar nach
+<verzeichnis>/metrics-<pid>.json. /metrics liest alle Dateien und summiert
+Zähler und Histogramme. Dateien beendeter Worker werden in
+metrics-archive.json zusammengeführt, damit Zähler nicht zurückspringen;
+Gauges zählen nur für laufende Prozesse.
+
+Ohne configure() (z.B. wetterdaten.py als eigener Prozess) wird nur im
+Speicher gezählt. Geforkte Prozesse schreiben erst nach resume(): der
+Gunicorn-Worker beim ersten Request, Kindprozesse der PDF-Pools nie. Geerbte
+Stände der Collector-Quellen zählt weiter der Elternprozess.
+"""
+
+import bisect
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FETCH_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# name -> (Typ, Hilfetext, Buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    'dashboard_http_requests_total': ('counter', 'HTTP-Anfragen nach Endpoint, Methode und Status', ()),
+    'dashboard_http_request_duration_seconds': ('histogram', 'Bearbeitungszeit pro Endpoint', LATENCY_BUCKETS),
+    'dashboard_http_request_bytes_total': ('counter', 'Empfangene Bytes (Request-Body) pro Endpoint', ()),
+    'dashboard_http_response_bytes_total': ('counter', 'Gesendete Bytes (Content-Length) pro Endpoint', ()),
+    'dashboard_file_io_duration_seconds': ('histogram', 'Datei-I/O: JSON lesen/schreiben, PDF hashen/öffnen', LATENCY_BUCKETS),
+    'dashboard_weather_fetch_duration_seconds': ('histogram', 'Dauer eines OpenWeatherMap-Abrufs inkl. Wiederholungen', FETCH_BUCKETS),
+    'dashboard_weather_fetch_total': ('counter', 'OpenWeatherMap-Abrufe nach Ergebnis', ()),
+    'dashboard_weather_refresh_duration_seconds': ('histogram', 'Dauer eines kompletten Wetter-Laufs (wetterdaten.main)', FETCH_BUCKETS),
+    'dashboard_weather_refresh_total': ('counter', 'Wetter-Läufe nach Ergebnis', ()),
+    'dashboard_upload_size_bytes': ('histogram', 'Größe hochgeladener PDFs', SIZE_BUCKETS),
+    'dashboard_uploads_total': ('counter', 'PDF-Uploads nach Ergebnis', ()),
+    'dashboard_bulk_uploads_total': ('counter', 'Sammel-Uploads nach Ergebnis (published, partial, rejected, failed)', ()),
+    'dashboard_pdf_optimize_total': ('counter', 'PDF-Optimierungen nach Ergebnis (optimized, kept, stale, failed)', ()),
+    'dashboard_pdf_optimize_saved_bytes_total': ('counter', 'Durch die PDF-Optimierung eingesparte Bytes', ()),
+    'dashboard_snapshot_cache_hits_total': ('counter', 'Treffer im Snapshot-Cache', ()),
+    'dashboard_snapshot_cache_misses_total': ('counter', 'Fehlgriffe im Snapshot-Cache (Datei gelesen/gehasht)', ()),
+    'dashboard_weather_cache_hits_total': ('counter', 'Antworten aus dem OpenWeatherMap TTL-Cache', ()),
+    'dashboard_sse_subscribers': ('gauge', 'Offene SSE-Verbindungen', ()),
+    'dashboard_compression_total': ('counter', 'Gebaute komprimierte Varianten nach Kodierung', ()),
+    'dashboard_compression_saved_bytes_total': ('counter', 'Durch Komprimierung eingesparte Antwort-Bytes', ()),
+    'dashboard_log_records_dropped_total': ('counter', 'Verworfene Log-Einträge (Log-Queue voll)', ()),
+    'dashboard_profiles_total': ('counter', 'Gespeicherte Request-Profile nach Modus', ()),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}  # Buckets..., +Inf, Summe
+        self._collectors: List[Callable[[], Iterator[Tuple[str, Dict[str, Any], float]]]] = []
+        self.directory: Optional[str] = None
+        self.flush_interval = 5.0
+        self._thread: Optional[threading.Thread] = None
+        # Nach einem Fork: Verzeichnis des Elternprozesses und dessen Collector-Stände
+        self._inherited_directory: Optional[str] = None
+        self._baseline: Dict[Tuple[str, Labels], float] = {}
+
+    # ----- Hot Path -----
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        buckets = METRICS[name][2]
+        key = (name, _labels(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0] * (len(buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def timer(self, name: str, **labels: Any) -> '_Timer':
+        return _Timer(self, name, labels)
+
+    def register_collector(self, collector: Callable[[], Iterator[Tuple[str, Dict[str, Any], float]]]) -> None:
+        """Werte, die anderswo schon gezählt werden (Cache-Statistik, Gauges), beim Export abfragen."""
+        self._collectors.append(collector)
+
+    # ----- Prozessübergreifend -----
+
+    def configure(self, directory: str, flush_interval: Optional[float] = None) -> None:
+        self.directory = directory
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        if self._thread is None or not self._thread.is_alive():  # create_app() kann mehrfach laufen
+            self._start_flusher()
+
+    def _start_flusher(self) -> None:
+        self._thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._thread.start()
+
+    def resume(self) -> None:
+        """Im bedienenden Prozess nach einem Fork (Gunicorn-Worker) wieder in die eigene Datei schreiben."""
+        if self._inherited_directory is None:
+            return
+        with self._lock:
+            directory, self._inherited_directory = self._inherited_directory, None
+        if directory is not None:
+            self.configure(directory)
+
+    def _after_fork(self) -> None:
+        # Jeder Prozess zählt ab null; geschrieben wird erst nach resume(), damit
+        # die Kindprozesse der PDF-Pools keine eigenen Dateien anlegen
+        self._lock = threading.Lock()
+        self.counters.clear()
+        self.histograms.clear()
+        self._thread = None
+        if self.directory is not None:
+            self._inherited_directory, self.directory = self.directory, None
+        # Auch Gauges: die geerbten SSE-Verbindungen bedient weiter der Elternprozess
+        self._baseline = dict(self._collected())
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _state(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()]
+        gauges = []
+        for (name, labels), value in self._collected():
+            entry = [name, list(labels), value - self._baseline.get((name, labels), 0)]
+            (gauges if METRICS[name][0] == 'gauge' else counters).append(entry)
+        return {'pid': os.getpid(), 'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+    def _collected(self) -> Iterator[Tuple[Tuple[str, Labels], float]]:
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                yield (name, _labels(labels)), value
+
+    def flush(self) -> None:
+        if self.directory is None:
+            return
+        _write_json(os.path.join(self.directory, f'metrics-{os.getpid()}.json'), self._state())
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Stände aller Prozesse (eigener live, andere aus ihren Dateien)."""
+        state = self._state()
+        if self.directory is None:
+            return [state]
+        own = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        _write_json(own, state)
+        states = [state]
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            if path == own or path.endswith('metrics-archive.json'):
+                continue
+            state = _read_json(path)
+            if state is None:
+                continue
+            if _alive(state['pid']):
+                states.append(state)
+            else:
+                self._archive(path, state)
+        archive = _read_json(os.path.join(self.directory, 'metrics-archive.json'))
+        if archive is not None:
+            states.append(archive)
+        return states
+
+    def _archive(self, path: str, state: Dict[str, Any]) -> None:
+        archive_path = os.path.join(self.directory, 'metrics-archive.json')
+        with open(os.path.join(self.directory, 'metrics-archive.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not os.path.exists(path):
+                return  # schon von einem anderen Worker übernommen
+            archive = _read_json(archive_path) or {'pid': 0, 'counters': [], 'histograms': [], 'gauges': []}
+            merged = _merge([archive, dict(state, gauges=[])])
+            _write_json(archive_path, {
+                'pid': 0,
+                'counters': [[n, list(l), v] for (n, l), v in merged['counters'].items()],
+                'histograms': [[n, list(l), s] for (n, l), s in merged['histograms'].items()],
+                'gauges': []
+            })
+            os.remove(path)
+
+    def render(self) -> str:
+        merged = _merge(self.collect())
+        lines: List[str] = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'histogram':
+                for (series_name, labels), series in sorted(merged['histograms'].items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), series):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_format(labels + (("le", le),))} {cumulative:g}')
+                    lines.append(f'{name}_sum{_format(labels)} {series[-1]:.6f}')
+                    lines.append(f'{name}_count{_format(labels)} {cumulative:g}')
+            else:
+                values = merged['gauges'] if kind == 'gauge' else merged['counters']
+                for (series_name, labels), value in sorted(values.items()):
+                    if series_name == name:
+                        lines.append(f'{name}{_format(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'labels', 'started')
+
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, Any]) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+def _merge(states: List[Dict[str, Any]]) -> Dict[str, Dict[Tuple[str, Labels], Any]]:
+    counters: Dict[Tuple[str, Labels], float] = {}
+    gauges: Dict[Tuple[str, Labels], float] = {}
+    histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    for state in states:
+        for target, entries in ((counters, state['counters']), (gauges, state['gauges'])):
+            for name, labels, value in entries:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                target[key] = target.get(key, 0) + value
+        for name, labels, series in state['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            current = histograms.get(key)
+            histograms[key] = list(series) if current is None else [a + b for a, b in zip(current, series)]
+    return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+
+def _format(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.metrics-', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+# Gemeinsame Instanz für alle Module eines Prozesses
+metrics = Metrics()
+os.register_at_fork(after_in_child=metrics._after_fork)
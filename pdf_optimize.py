@@ -0,0 +1,330 @@
+"""
+Nachbearbeitung hochgeladener PDFs für die Kiosk-Anzeige.
+
+Nach dem Upload läuft im Prozess-Pool (PDF_OPTIMIZE_WORKERS):
+- Bilder über PDF_OPTIMIZE_DPI auf diese Auflösung herunterrechnen und als
+  JPEG (PDF_OPTIMIZE_QUALITY) neu komprimieren
+- Unnötiges entfernen: Metadaten, Vorschaubilder, Anhänge, JavaScript,
+  unbenutzte Objekte; Streams komprimieren
+- Linearisieren ("Fast Web View"), damit die erste Seite sofort erscheint
+
+Werkzeuge (optional, requirements-optional.txt; in dieser Reihenfolge):
+- PyMuPDF für Bilder und Aufräumen, sonst Ghostscript (``gs``)
+- Linearisieren mit pikepdf oder ``qpdf`` (Ghostscript linearisiert selbst;
+  PyMuPDF kann es seit MuPDF 1.24 nicht mehr)
+
+Das Ergebnis ersetzt den Slot atomar (os.replace), aber nur, wenn der Slot
+noch die Ausgangsversion enthält und es sich lohnt. Kommt während einer
+Optimierung ein neuer Upload, wird der alte Auftrag verworfen (bzw. endet als
+veraltet) und der neueste startet danach. Das Original bleibt unter
+pdfs/originals/<slot>.pdf für eine erneute Verarbeitung, der Bericht
+(Größe, Renderzeit der ersten Seite vorher/nachher) unter <slot>.json.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import metrics
+from pdf_upload import _fsync_dir, slot_lock
+from snapshot_cache import hash_bytes, hash_file, snapshot_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+
+def available_backend() -> Optional[str]:
+    if fitz is not None:
+        return 'pymupdf'
+    if shutil.which('gs'):
+        return 'ghostscript'
+    return None
+
+
+def available_linearizer() -> Optional[str]:
+    if pikepdf is not None:
+        return 'pikepdf'
+    if shutil.which('qpdf'):
+        return 'qpdf'
+    return None
+
+
+def _optimize_pymupdf(source: str, target: str, dpi: int, quality: int) -> None:
+    doc = fitz.open(source)
+    try:
+        # Nur deutlich zu hoch aufgelöste Bilder anfassen; Strichbilder (1 Bit) bleiben scharf
+        doc.rewrite_images(dpi_threshold=int(dpi * 1.25), dpi_target=dpi, quality=quality,
+                           lossy=True, lossless=True, bitonal=False, color=True, gray=True)
+        doc.scrub(attached_files=True, clean_pages=True, embedded_files=True, hidden_text=False,
+                  javascript=True, metadata=True, redactions=False, remove_links=False,
+                  reset_fields=False, reset_responses=True, thumbnails=True, xml_metadata=True)
+        doc.save(target, garbage=4, clean=True, deflate=True, deflate_images=True,
+                 deflate_fonts=True, use_objstms=1)
+    finally:
+        doc.close()
+
+
+def _optimize_ghostscript(source: str, target: str, dpi: int, quality: int) -> None:
+    subprocess.run(
+        ['gs', '-q', '-dNOPAUSE', '-dBATCH', '-dSAFER', '-sDEVICE=pdfwrite', '-dCompatibilityLevel=1.5',
+         '-dDetectDuplicateImages=true', '-dFastWebView=true',
+         '-dDownsampleColorImages=true', f'-dColorImageResolution={dpi}', '-dColorImageDownsampleThreshold=1.25',
+         '-dDownsampleGrayImages=true', f'-dGrayImageResolution={dpi}', '-dGrayImageDownsampleThreshold=1.25',
+         f'-dJPEGQ={quality}', f'-sOutputFile={target}', source],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=600
+    )
+
+
+def _linearize(path: str, linearizer: str) -> None:
+    tmp_path = path + '.lin'
+    if linearizer == 'pikepdf':
+        with pikepdf.open(path) as pdf:
+            pdf.save(tmp_path, linearize=True, object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    else:
+        subprocess.run(['qpdf', '--linearize', '--object-streams=generate', path, tmp_path],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300)
+    os.replace(tmp_path, path)
+
+
+def is_linearized(path: str) -> bool:
+    """Linearisierte PDFs beginnen mit einem /Linearized-Dictionary."""
+    with open(path, 'rb') as f:
+        return b'/Linearized' in f.read(1024)
+
+
+def first_page_render_ms(path: str, width: int) -> Optional[float]:
+    if fitz is None:
+        return None
+    started = time.perf_counter()
+    doc = fitz.open(path)
+    try:
+        if doc.page_count == 0:
+            return None
+        page = doc[0]
+        zoom = width / page.rect.width
+        page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    finally:
+        doc.close()
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def optimize_pdf(source: str, version: str, target: str, dpi: int, quality: int,
+                 render_width: int) -> Optional[Dict[str, Any]]:
+    """Läuft im Worker-Prozess. Schreibt nach ``target``; None, wenn sich die Quelle geändert hat."""
+    with open(source, 'rb') as f:
+        data = f.read()
+    if hash_bytes(data) != version:
+        return None
+
+    started = time.perf_counter()
+    backend = available_backend()
+    if backend == 'pymupdf':
+        _optimize_pymupdf(source, target, dpi, quality)
+    else:
+        _optimize_ghostscript(source, target, dpi, quality)
+    linearizer = available_linearizer()
+    if linearizer is not None:
+        _linearize(target, linearizer)
+
+    return {
+        'backend': backend if linearizer is None else f'{backend}+{linearizer}',
+        'original_bytes': len(data),
+        'optimized_bytes': os.path.getsize(target),
+        'linearized_before': is_linearized(source),
+        'linearized': is_linearized(target),
+        'render_ms_before': first_page_render_ms(source, render_width),
+        'render_ms_after': first_page_render_ms(target, render_width),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+class PdfOptimizer:
+    def __init__(self, pdf_dir: str, dpi: int = 150, quality: int = 80, max_workers: int = 1,
+                 min_savings: float = 0.05, render_width: int = 1280,
+                 on_finished: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> None:
+        self.pdf_dir = pdf_dir
+        self.originals_dir = os.path.join(pdf_dir, 'originals')
+        self.dpi = dpi
+        self.quality = quality
+        self.max_workers = max_workers
+        self.min_savings = min_savings
+        self.render_width = render_width
+        self.on_finished = on_finished
+        self.backend = available_backend()
+        self.linearizer = available_linearizer()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[int, Future] = {}
+        # Neuester Auftrag je Slot, solange dort noch ein älterer läuft: (Quelle, Version, erwartet)
+        self._queued: Dict[int, Tuple[str, str, str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.max_workers > 0
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.pdf_dir, f'{slot}.pdf')
+
+    def original_path(self, slot: int) -> str:
+        return os.path.join(self.originals_dir, f'{slot}.pdf')
+
+    def report(self, slot: int) -> Optional[Dict[str, Any]]:
+        snapshot = snapshot_cache.get(os.path.join(self.originals_dir, f'{slot}.json'))
+        return snapshot.data if snapshot is not None else None
+
+    def original_version(self, slot: int, current_version: str) -> Optional[str]:
+        """Version des hochgeladenen Originals, falls der Slot dessen optimierte Fassung enthält."""
+        report = self.report(slot)
+        if report is not None and report.get('version') == current_version:
+            return report.get('original_version')
+        return None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, slot: int, version: str) -> bool:
+        """Optimiert den frisch hochgeladenen Slot im Hintergrund."""
+        self.discard(slot)  # Original und Bericht des vorherigen Uploads gelten nicht mehr
+        return self._submit(slot, self.slot_path(slot), version, expected=version)
+
+    def reprocess(self, slot: int) -> bool:
+        """Optimiert erneut ab dem aufbewahrten Original (z.B. nach Änderung von DPI/Qualität)."""
+        current = snapshot_cache.file_version(self.slot_path(slot))
+        report = self.report(slot)
+        if current is None or report is None or not os.path.exists(self.original_path(slot)):
+            return False
+        if current.etag not in (report.get('version'), report.get('original_version')):
+            return False  # Slot wurde inzwischen neu belegt
+        return self._submit(slot, self.original_path(slot), report['original_version'], expected=current.etag)
+
+    def _submit(self, slot: int, source: str, version: str, expected: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            pending = self._pending.get(slot)
+            if pending is not None and not pending.done():
+                # Der laufende Auftrag ist überholt; _finished startet danach den neuesten
+                self._queued[slot] = (source, version, expected)
+            else:
+                pending = None
+                fd, target = tempfile.mkstemp(dir=self.pdf_dir, prefix='.optimize-', suffix='.tmp')
+                os.close(fd)
+                future = self._get_executor().submit(optimize_pdf, source, version, target, self.dpi,
+                                                     self.quality, self.render_width)
+                self._pending[slot] = future
+        if pending is not None:
+            # Wartet er noch im Pool, gar nicht erst anfangen (cancel ruft _finished sofort auf)
+            pending.cancel()
+            return True
+        future.add_done_callback(lambda f: self._finished(slot, source, version, expected, target, f))
+        return True
+
+    def _worth_it(self, result: Dict[str, Any]) -> bool:
+        if result['optimized_bytes'] <= result['original_bytes'] * (1 - self.min_savings):
+            return True
+        # Nur linearisiert: lohnt sich, solange die Datei nicht wächst
+        return result['linearized'] and not result['linearized_before'] \
+            and result['optimized_bytes'] <= result['original_bytes']
+
+    def _finished(self, slot: int, source: str, version: str, expected: str, target: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(slot) is future:
+                del self._pending[slot]
+            queued = self._queued.pop(slot, None)
+        if queued is not None:
+            self._submit(slot, *queued)
+        if future.cancelled():
+            metrics.inc('dashboard_pdf_optimize_total', outcome='stale')
+            _remove(target)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Optimierung von Slot {slot} fehlgeschlagen: {e}")
+            metrics.inc('dashboard_pdf_optimize_total', outcome='failed')
+            _remove(target)
+            return
+        if result is None:
+            metrics.inc('dashboard_pdf_optimize_total', outcome='stale')
+            _remove(target)
+            return
+
+        slot_path = self.slot_path(slot)
+        outcome = 'kept'
+        final_version = expected
+        # Gleiche Sperre wie der Upload: zwischen Prüfen und Ersetzen darf kein neuer Upload landen
+        with slot_lock(self.pdf_dir, slot):
+            current = snapshot_cache.file_version(slot_path)
+            if current is None or current.etag != expected:
+                outcome = 'stale'
+            elif self._worth_it(result):
+                os.makedirs(self.originals_dir, exist_ok=True)
+                if source == slot_path:
+                    _keep_original(slot_path, self.original_path(slot))
+                os.chmod(target, 0o644)
+                os.replace(target, slot_path)
+                _fsync_dir(self.pdf_dir)
+                final_version = hash_file(slot_path)
+                outcome = 'optimized'
+        _remove(target)
+        metrics.inc('dashboard_pdf_optimize_total', outcome=outcome)
+        if outcome == 'stale':
+            return
+
+        saved = result['original_bytes'] - result['optimized_bytes'] if outcome == 'optimized' else 0
+        if saved > 0:
+            metrics.inc('dashboard_pdf_optimize_saved_bytes_total', saved)
+        report = dict(result, slot=slot, outcome=outcome, original_version=version, version=final_version,
+                      saved_bytes=saved, saved_ratio=round(saved / result['original_bytes'], 3) if result['original_bytes'] else 0.0,
+                      dpi=self.dpi, quality=self.quality, finished_at=time.time())
+        os.makedirs(self.originals_dir, exist_ok=True)
+        snapshot_cache.write_json(os.path.join(self.originals_dir, f'{slot}.json'), report)
+        logger.info(f"Slot {slot} {outcome}: {result['original_bytes']} -> {result['optimized_bytes']} Bytes, "
+                    f"erste Seite {result['render_ms_before']} -> {result['render_ms_after']} ms")
+        if self.on_finished is not None:
+            self.on_finished(slot, report)
+
+    def is_pending(self, slot: int) -> bool:
+        with self._lock:
+            future = self._pending.get(slot)
+            return slot in self._queued or (future is not None and not future.done())
+
+    def discard(self, slot: int) -> None:
+        """Entfernt Original und Bericht eines Slots (z.B. nach dem Löschen)."""
+        for path in (self.original_path(slot), os.path.join(self.originals_dir, f'{slot}.json')):
+            _remove(path)
+
+
+def _keep_original(slot_path: str, original_path: str) -> None:
+    """Original per Hardlink sichern (kein Kopieren, der Slot bleibt dabei belegt)."""
+    tmp_path = original_path + '.tmp'
+    _remove(tmp_path)
+    try:
+        os.link(slot_path, tmp_path)
+    except OSError:
+        shutil.copy2(slot_path, tmp_path)
+    os.replace(tmp_path, original_path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,202 @@
+"""
+Vorab-Rasterung der PDF-Slots für die Kiosk-Bildschirme.
+
+Nach einem Upload wird jede Seite eines Slots in einem begrenzten
+Prozess-Pool in fertige Bilder (WebP oder PNG) in den konfigurierten
+Anzeigebreiten umgewandelt. Die Anzeige rotiert dann nur noch Bilder,
+statt das PDF mit pdf.js zu parsen und zu rendern.
+
+Renderer (optional, in dieser Reihenfolge):
+- PyMuPDF (``pip install pymupdf``), WebP zusätzlich mit Pillow
+- ``pdftoppm`` aus poppler-utils (nur PNG)
+
+Ablage: renders/<slot>/<version>/<breite>/<seite>.<format> plus manifest.json
+"""
+
+import glob
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from snapshot_cache import hash_bytes
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def available_renderer() -> Optional[str]:
+    if fitz is not None:
+        return 'pymupdf'
+    if shutil.which('pdftoppm'):
+        return 'pdftoppm'
+    return None
+
+
+def effective_format(requested: str) -> str:
+    """WebP nur, wenn PyMuPDF und Pillow vorhanden sind, sonst PNG."""
+    if requested == 'webp' and fitz is not None and Image is not None:
+        return 'webp'
+    return 'png'
+
+
+def _render_pymupdf(data: bytes, out_dir: str, widths: List[int], fmt: str) -> int:
+    doc = fitz.open(stream=data, filetype='pdf')
+    try:
+        for page_number, page in enumerate(doc, start=1):
+            for width in widths:
+                zoom = width / page.rect.width
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                path = os.path.join(out_dir, str(width), f'{page_number}.{fmt}')
+                if fmt == 'webp':
+                    image = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+                    image.save(path, 'WEBP', quality=80, method=4)
+                else:
+                    pix.save(path)
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _render_pdftoppm(data: bytes, out_dir: str, widths: List[int]) -> int:
+    source = os.path.join(out_dir, 'source.pdf')
+    with open(source, 'wb') as f:
+        f.write(data)
+    try:
+        page_count = 0
+        for width in widths:
+            width_dir = os.path.join(out_dir, str(width))
+            subprocess.run(
+                ['pdftoppm', '-png', '-scale-to-x', str(width), '-scale-to-y', '-1', source, os.path.join(width_dir, 'p')],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=300
+            )
+            # pdftoppm nummeriert je nach Seitenzahl mit führenden Nullen (p-01.png)
+            pages = sorted(glob.glob(os.path.join(width_dir, 'p-*.png')))
+            for path in pages:
+                number = int(os.path.basename(path)[2:-4])
+                os.replace(path, os.path.join(width_dir, f'{number}.png'))
+            page_count = len(pages)
+        return page_count
+    finally:
+        os.remove(source)
+
+
+def render_pdf(pdf_path: str, version: str, out_dir: str, widths: List[int], fmt: str) -> Optional[Dict[str, Any]]:
+    """Läuft im Worker-Prozess. Liefert das Manifest oder None, wenn sich das PDF inzwischen geändert hat."""
+    with open(pdf_path, 'rb') as f:
+        data = f.read()
+    if hash_bytes(data) != version:
+        return None
+
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(out_dir), prefix='.render-')
+    try:
+        for width in widths:
+            os.makedirs(os.path.join(tmp_dir, str(width)))
+        if available_renderer() == 'pymupdf':
+            page_count = _render_pymupdf(data, tmp_dir, widths, fmt)
+        else:
+            page_count = _render_pdftoppm(data, tmp_dir, widths)
+
+        manifest = {'version': version, 'pages': page_count, 'widths': widths, 'format': fmt}
+        with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        try:
+            os.replace(tmp_dir, out_dir)
+        except OSError:
+            # Ein paralleler Lauf war schneller, dessen Ergebnis ist identisch
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return manifest
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+class RenderPipeline:
+    def __init__(self, render_root: str, widths: List[int], fmt: str = 'webp', max_workers: int = 1,
+                 on_rendered: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> None:
+        self.render_root = render_root
+        self.widths = widths
+        self.format = effective_format(fmt)
+        self.max_workers = max_workers
+        self.on_rendered = on_rendered
+        self.renderer = available_renderer()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.renderer is not None and bool(self.widths)
+
+    def version_dir(self, slot: int, version: str) -> str:
+        return os.path.join(self.render_root, str(slot), version)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, slot: int, pdf_path: str, version: str) -> bool:
+        """Plant die Rasterung eines Slots ein; blockiert den Request-Thread nicht."""
+        if not self.enabled:
+            return False
+        out_dir = self.version_dir(slot, version)
+        if os.path.exists(os.path.join(out_dir, 'manifest.json')):
+            return False
+
+        with self._lock:
+            pending = self._pending.get(slot)
+            if pending is not None and not pending.done() and getattr(pending, 'version', None) == version:
+                return False
+            os.makedirs(os.path.dirname(out_dir), exist_ok=True)
+            future = self._get_executor().submit(render_pdf, pdf_path, version, out_dir, self.widths, self.format)
+            future.version = version
+            self._pending[slot] = future
+        future.add_done_callback(lambda f: self._finished(slot, version, f))
+        return True
+
+    def _finished(self, slot: int, version: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(slot) is future:
+                del self._pending[slot]
+        try:
+            manifest = future.result()
+        except Exception as e:
+            logger.error(f"Rasterung von Slot {slot} fehlgeschlagen: {e}")
+            return
+        if manifest is None:
+            return
+        self._remove_old_versions(slot, keep=version)
+        if self.on_rendered is not None:
+            self.on_rendered(slot, manifest)
+
+    def _remove_old_versions(self, slot: int, keep: Optional[str] = None) -> None:
+        slot_dir = os.path.join(self.render_root, str(slot))
+        if not os.path.isdir(slot_dir):
+            return
+        for name in os.listdir(slot_dir):
+            if name != keep and not name.startswith('.'):
+                shutil.rmtree(os.path.join(slot_dir, name), ignore_errors=True)
+
+    def is_pending(self, slot: int, version: str) -> bool:
+        with self._lock:
+            future = self._pending.get(slot)
+            return future is not None and not future.done() and getattr(future, 'version', None) == version
+
+    def discard(self, slot: int) -> None:
+        """Entfernt alle gerenderten Seiten eines Slots (z.B. nach dem Löschen)."""
+        self._remove_old_versions(slot)
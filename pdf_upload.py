@@ -0,0 +1,198 @@
+"""
+Streamender, atomarer PDF-Upload.
+
+Der Upload wird in Blöcken gelesen (konstanter Speicherbedarf), gegen die
+Maximalgröße und den PDF-Header geprüft und gehasht. Unveränderte Inhalte
+werden verworfen, ohne den Slot anzufassen. Alles andere landet zunächst in
+einer Temp-Datei im Zielverzeichnis, wird per fsync gesichert und dann per
+os.replace() atomar an die Stelle des Slots gesetzt - ein Kiosk sieht also
+immer entweder das alte oder das neue, nie ein halbes PDF.
+
+Der Sammel-Upload (/upload/bulk) stellt mehrere Dateien mit stage_many()
+parallel bereit, auch aus einem ZIP-Archiv, und setzt sie mit commit_many()
+direkt nacheinander ein.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Collection, Dict, Iterator, List, Optional, Tuple
+
+from shared_state import FileLock
+
+CHUNK_SIZE = 64 * 1024
+# Laut PDF-Spezifikation darf der Header innerhalb der ersten 1024 Bytes stehen
+HEADER_WINDOW = 1024
+
+
+class UploadRejected(Exception):
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class StagedPdf:
+    """Vollständig geschriebene, geprüfte Temp-Datei, bereit für commit()."""
+
+    __slots__ = ('tmp_path', 'version', 'size')
+
+    def __init__(self, tmp_path: str, version: str, size: int) -> None:
+        self.tmp_path = tmp_path
+        self.version = version
+        self.size = size
+
+
+def _checked_chunks(stream: BinaryIO, max_bytes: int) -> Iterator[bytes]:
+    """Liefert Blöcke des Streams und prüft dabei Größe und PDF-Header."""
+    size = 0
+    head = b''
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if len(head) < HEADER_WINDOW:
+            head += chunk[:HEADER_WINDOW - len(head)]
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadRejected(f'File too large (max {max_bytes // (1024 * 1024)} MB)', 413)
+        yield chunk
+
+    if size == 0:
+        raise UploadRejected('Empty file')
+    if b'%PDF-' not in head:
+        raise UploadRejected('Invalid file content, only PDFs are allowed')
+
+
+def _hash_stream(stream: BinaryIO, max_bytes: int) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in _checked_chunks(stream, max_bytes):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest()[:16], size
+
+
+def stage_pdf(stream: BinaryIO, directory: str, max_bytes: int,
+              current_versions: Collection[str] = ()) -> Optional[StagedPdf]:
+    """
+    Schreibt den Upload geprüft in eine Temp-Datei im Zielverzeichnis.
+    Liefert None, wenn der Inhalt einer der aktuellen Slot-Versionen entspricht
+    (Slot-Inhalt bzw. das Original vor der Optimierung).
+    """
+    seekable = hasattr(stream, 'seekable') and stream.seekable()
+    if seekable:
+        # Werkzeug puffert Uploads ohnehin (SpooledTemporaryFile): erst prüfen
+        # und hashen, damit Duplikate und ungültige Dateien nie geschrieben werden
+        version, size = _hash_stream(stream, max_bytes)
+        if version in current_versions:
+            return None
+        stream.seek(0)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in _checked_chunks(stream, max_bytes):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    version = digest.hexdigest()[:16]
+    if version in current_versions:
+        os.remove(tmp_path)
+        return None
+    return StagedPdf(tmp_path, version, size)
+
+
+def slot_lock(directory: str, slot: int) -> FileLock:
+    """Sperre für Prüfen und Ersetzen eines Slots (Upload, Optimierung), neue Instanz pro Vorgang."""
+    return FileLock(os.path.join(directory, f'.slot-{slot}.lock'))
+
+
+def _fsync_dir(directory: str) -> None:
+    dir_fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def commit(staged: StagedPdf, file_path: str) -> None:
+    """Setzt die Temp-Datei atomar an die Stelle des Slots."""
+    os.chmod(staged.tmp_path, 0o644)
+    os.replace(staged.tmp_path, file_path)
+    # Auch den Verzeichniseintrag sichern, sonst kann ein Stromausfall den rename verlieren
+    _fsync_dir(os.path.dirname(file_path))
+
+
+def commit_many(staged: Dict[str, StagedPdf]) -> None:
+    """Setzt mehrere Temp-Dateien (Zielpfad -> Datei) direkt nacheinander ein, ein fsync je Verzeichnis."""
+    for file_path, item in staged.items():
+        os.chmod(item.tmp_path, 0o644)
+        os.replace(item.tmp_path, file_path)
+    for directory in {os.path.dirname(file_path) for file_path in staged}:
+        _fsync_dir(directory)
+
+
+def discard(staged: StagedPdf) -> None:
+    try:
+        os.remove(staged.tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+def slot_from_filename(name: str) -> Optional[int]:
+    """Slot aus führender Nummer im Dateinamen: '3.pdf', '3_Wachplan.pdf', '03 Dienstplan.pdf' -> 3."""
+    match = re.match(r'(\d+)(?:[\s._-]|$)', os.path.basename(name))
+    return int(match.group(1)) if match else None
+
+
+def archive_members(stream: BinaryIO, max_members: int) -> Tuple[zipfile.ZipFile, List[zipfile.ZipInfo]]:
+    """Öffnet ein ZIP-Archiv; Dateien ohne Verzeichnisse und versteckte Einträge (z.B. __MACOSX)."""
+    try:
+        archive = zipfile.ZipFile(stream)
+    except (zipfile.BadZipFile, OSError):
+        raise UploadRejected('Invalid ZIP archive') from None
+    members = [
+        info for info in archive.infolist()
+        if not info.is_dir() and not any(part.startswith(('.', '__MACOSX')) for part in info.filename.split('/'))
+    ]
+    if len(members) > max_members:
+        archive.close()
+        raise UploadRejected(f'Too many files in archive (max {max_members})')
+    return archive, members
+
+
+def stage_many(jobs: Dict[int, Tuple[Callable[[], BinaryIO], str, Collection[str]]], max_bytes: int,
+               workers: int = 4) -> Dict[int, object]:
+    """
+    Stellt mehrere Uploads parallel bereit, je Slot (Öffner des Streams,
+    Zielverzeichnis, aktuelle Versionen) wie stage_pdf(). Liefert je Slot
+    StagedPdf, None (unverändert) oder die aufgetretene Ausnahme. Lesen,
+    Entpacken, Hashen und fsync geben den GIL frei, daher Threads.
+    """
+    def stage(slot: int) -> object:
+        open_stream, directory, current_versions = jobs[slot]
+        try:
+            with open_stream() as stream:
+                return stage_pdf(stream, directory, max_bytes, current_versions)
+        except (zipfile.BadZipFile, zlib.error, EOFError):
+            return UploadRejected('Corrupt file in ZIP archive')
+        except Exception as e:
+            return e
+
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs))), thread_name_prefix='bulk-upload') as pool:
+        return dict(zip(jobs, pool.map(stage, jobs)))
@@ -0,0 +1,525 @@
+"""
+Profiling einzelner Requests, zur Laufzeit zuschaltbar (Admin: /profiling).
+
+Ein WSGI-Wrapper entscheidet pro Request, ob er profiliert wird: ein Anteil
+aller Requests (``sample_rate``), optional nur für Pfade, die auf ``route``
+passen (fnmatch, z.B. ``/api/public/pdfs/*``). Die Einstellung steht in
+output/profiling.json und gilt für alle Gunicorn-Worker (geprüft einmal pro
+Sekunde), bis ``until`` abläuft. Ausgeschaltet kostet ein Request einen
+Zeitvergleich im Wrapper und einen Attributzugriff je Hook.
+
+Ein Profil enthält die Spans des Requests mit Start, Dauer und Tiefe:
+
+- middleware: before/after_request-Hooks (CSRF, Limiter, Metriken,
+  Komprimierung), Context-Processor, login_required
+- handler: die View-Funktion
+- io: JSON lesen/schreiben, PDF hashen/öffnen, Datei senden, Body ausliefern
+- serialize: jsonify, Templates
+
+``other`` ist die Zeit außerhalb aller Spans (Request-Kontext, Routing,
+Session). Zusätzlich je nach ``mode``:
+
+- ``cprofile``: cProfile-Dump (<id>.prof, mit pstats/snakeviz lesbar), je
+  Prozess läuft höchstens einer gleichzeitig
+- ``sampling``: Stack-Samples alle PROFILING_SAMPLE_INTERVAL_MS als
+  Collapsed Stacks (<id>.stacks.txt, für flamegraph.pl/speedscope)
+
+Profile landen in output/profiles/, die neuesten PROFILING_KEEP bleiben.
+Dateiantworten über wsgi.file_wrapper (sendfile) werden nicht umgepackt, ihr
+Versand fehlt dann im Profil.
+"""
+
+import cProfile
+import fnmatch
+import functools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+MODES = ('spans', 'cprofile', 'sampling')
+KINDS = ('middleware', 'handler', 'io', 'serialize')
+
+_local = threading.local()
+
+
+class RequestProfile:
+    def __init__(self, profile_id: str, method: str, path: str, mode: str) -> None:
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.endpoint: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+        self.spans: List[List[Any]] = []  # [Art, Name, Start ms, Dauer ms, Tiefe]
+        self.depth = 0
+        self.stacks: Dict[str, int] = {}
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.notes: List[str] = []
+        self.total_ms = 0.0
+        self.cpu_ms = 0.0
+
+    def finish(self) -> None:
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self.cpu_ms = (time.thread_time() - self.cpu_started) * 1000
+
+    def breakdown(self) -> Dict[str, float]:
+        """Exklusive Zeit je Art (verschachtelte Spans zählen beim innersten)."""
+        totals = dict.fromkeys(KINDS, 0.0)
+        children = [0.0] * len(self.spans)
+        for index, span in enumerate(self.spans):
+            # Eltern-Span: der letzte davor mit kleinerer Tiefe
+            for parent in range(index - 1, -1, -1):
+                if self.spans[parent][4] < span[4]:
+                    children[parent] += span[3]
+                    break
+        for index, (kind, _, _, duration, _) in enumerate(self.spans):
+            totals[kind] += max(duration - children[index], 0.0)
+        totals['other'] = max(self.total_ms - sum(span[3] for span in self.spans if span[4] == 0), 0.0)
+        return {kind: round(value, 3) for kind, value in totals.items()}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'endpoint': self.endpoint,
+            'status': self.status,
+            'mode': self.mode,
+            'started_at': self.started_at,
+            'total_ms': round(self.total_ms, 3),
+            'cpu_ms': round(self.cpu_ms, 3),
+            'breakdown': self.breakdown()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = self.summary()
+        data['spans'] = [
+            {'kind': kind, 'name': name, 'start_ms': round(start, 3), 'duration_ms': round(duration, 3), 'depth': depth}
+            for kind, name, start, duration, depth in self.spans
+        ]
+        data['notes'] = self.notes
+        return data
+
+
+class _Span:
+    __slots__ = ('profile', 'kind', 'name', 'started', 'index')
+
+    def __init__(self, profile: RequestProfile, kind: str, name: str) -> None:
+        self.profile = profile
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        profile = self.profile
+        self.started = time.perf_counter()
+        self.index = len(profile.spans)
+        profile.spans.append([self.kind, self.name, (self.started - profile.started) * 1000, 0.0, profile.depth])
+        profile.depth += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.profile.depth -= 1
+        self.profile.spans[self.index][3] = (time.perf_counter() - self.started) * 1000
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def current() -> Optional[RequestProfile]:
+    return getattr(_local, 'profile', None)
+
+
+def span(kind: str, name: str):
+    """``with span('io', 'json_read'):`` - ohne aktives Profil ein geteilter No-op."""
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, kind, name)
+
+
+def traced(kind: str, name: str, func: Callable) -> Callable:
+    """Hook/View als Span erfassen; ohne aktives Profil nur ein zusätzlicher Aufruf."""
+    # wraps(): CSRF- und Limiter-Ausnahmen hängen an Modul und Name der View
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profile = getattr(_local, 'profile', None)
+        if profile is None:
+            return func(*args, **kwargs)
+        if kind == 'handler':
+            profile.endpoint = name
+        with _Span(profile, kind, name):
+            return func(*args, **kwargs)
+    wrapper.profiled = True
+    return wrapper
+
+
+def _qualname(func: Callable) -> str:
+    return f"{getattr(func, '__module__', '?')}.{getattr(func, '__qualname__', repr(func))}"
+
+
+class _ProfiledJSON:
+    """Mixin für den JSON-Provider der App: jsonify/get_json als Span 'serialize'."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with span('serialize', 'json_dumps'):
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        with span('serialize', 'json_loads'):
+            return super().loads(s, **kwargs)
+
+
+class StackSampler:
+    """Ein Thread pro Prozess, der die Stacks profilierter Request-Threads abtastet."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._targets: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._targets[threading.get_ident()] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+                self._thread.start()
+
+    def remove(self) -> None:
+        with self._lock:
+            self._targets.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        idle_since = None
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                targets = dict(self._targets)
+                if not targets:
+                    # Nach einer Sekunde ohne Ziel beenden, add() startet neu
+                    idle_since = idle_since or time.monotonic()
+                    if time.monotonic() - idle_since > 1.0:
+                        self._thread = None
+                        return
+                    continue
+            idle_since = None
+            frames = sys._current_frames()
+            for ident, profile in targets.items():
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                names = []
+                while frame is not None and len(names) < 128:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                key = ';'.join(reversed(names))
+                profile.stacks[key] = profile.stacks.get(key, 0) + 1
+
+
+class _ProfiledBody:
+    """Antwort-Body: Ausliefern als Span 'io', Profil beim close() abschließen."""
+
+    def __init__(self, body: Iterable[bytes], profile: RequestProfile, profiler: 'RequestProfiler') -> None:
+        self.body = body
+        self.profile = profile
+        self.profiler = profiler
+
+    def __iter__(self):
+        _local.profile = self.profile
+        try:
+            with _Span(self.profile, 'io', 'send_body'):
+                for chunk in self.body:
+                    yield chunk
+        finally:
+            _local.profile = None
+
+    def close(self) -> None:
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.profiler.finish(self.profile)
+
+
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfiler:
+    def __init__(self, directory: str, settings_path: str, defaults: Optional[Dict[str, Any]] = None,
+                 keep: int = 200, sample_interval: float = 0.005) -> None:
+        self.directory = directory
+        self.settings_path = settings_path
+        self.defaults = self._validate(defaults or {})
+        self.keep = keep
+        self.sampler = StackSampler(sample_interval)
+        self._settings = self.defaults
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.on_profile: Optional[Callable[[RequestProfile], None]] = None
+
+    # ----- Einstellungen -----
+
+    @staticmethod
+    def _validate(values: Dict[str, Any]) -> Dict[str, Any]:
+        rate = float(values.get('sample_rate') or 0.0)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError('sample_rate must be between 0 and 1')
+        mode = values.get('mode') or 'spans'
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        route = values.get('route') or None
+        if route is not None and (not isinstance(route, str) or not route.startswith('/')):
+            raise ValueError("route must be a path pattern starting with '/'")
+        until = values.get('until')
+        return {
+            'sample_rate': rate,
+            'route': route,
+            'mode': mode,
+            'until': float(until) if until is not None else None,
+            'updated_at': values.get('updated_at')
+        }
+
+    def settings(self) -> Dict[str, Any]:
+        """Aktuelle Einstellung; output/profiling.json wird höchstens einmal pro Sekunde geprüft."""
+        now = time.monotonic()
+        if now - self._checked_at < 1.0:
+            return self._settings
+        self._checked_at = now
+        try:
+            st = os.stat(self.settings_path)
+            signature = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            signature = None
+        if signature != self._signature:
+            settings = self.defaults
+            if signature is not None:
+                try:
+                    with open(self.settings_path, 'r', encoding='utf-8') as f:
+                        settings = self._validate(json.load(f))
+                except (OSError, ValueError, TypeError):
+                    settings = self.defaults
+            self._settings = settings
+            self._signature = signature
+        return self._settings
+
+    def configure(self, sample_rate: Any = 0.0, route: Optional[str] = None, mode: str = 'spans',
+                  duration: Optional[float] = None) -> Dict[str, Any]:
+        """Neue Einstellung für alle Worker; ``duration`` Sekunden, danach wieder aus."""
+        if duration is not None and float(duration) <= 0:
+            raise ValueError('duration must be positive')
+        settings = self._validate({
+            'sample_rate': sample_rate,
+            'route': route,
+            'mode': mode,
+            'until': time.time() + float(duration) if duration is not None else None,
+            'updated_at': time.time()
+        })
+        _write_json(self.settings_path, settings)
+        self._checked_at = 0.0
+        return self.settings()
+
+    def active_settings(self) -> Optional[Dict[str, Any]]:
+        settings = self.settings()
+        if settings['sample_rate'] <= 0.0:
+            return None
+        if settings['until'] is not None and time.time() >= settings['until']:
+            return None
+        return settings
+
+    # ----- Instrumentierung -----
+
+    def instrument(self, app: Any) -> None:
+        """Hooks, Context-Processor und Views der App als Spans erfassen (nach register_blueprint)."""
+        for kind, registry in (('middleware', app.before_request_funcs), ('middleware', app.after_request_funcs),
+                               ('middleware', app.teardown_request_funcs),
+                               ('middleware', app.template_context_processors)):
+            for key, funcs in registry.items():
+                registry[key] = [f if getattr(f, 'profiled', False) else traced(kind, _qualname(f), f) for f in funcs]
+        for endpoint, view in list(app.view_functions.items()):
+            if not getattr(view, 'profiled', False):
+                app.view_functions[endpoint] = traced('handler', endpoint, view)
+        provider = type(app.json)
+        app.json = type(f'Profiled{provider.__name__}', (_ProfiledJSON, provider), {})(app)
+        app.wsgi_app = self.wrap(app.wsgi_app)
+
+        from flask import before_render_template, template_rendered
+        before_render_template.connect(self._template_started, app, weak=False)
+        template_rendered.connect(self._template_finished, app, weak=False)
+
+    @staticmethod
+    def _template_started(sender: Any, template: Any, **extra: Any) -> None:
+        profile = current()
+        if profile is not None:
+            template_span = _Span(profile, 'serialize', f'template:{template.name}')
+            template_span.__enter__()
+            _local.template_span = template_span
+
+    @staticmethod
+    def _template_finished(sender: Any, template: Any, **extra: Any) -> None:
+        template_span = getattr(_local, 'template_span', None)
+        if template_span is not None:
+            _local.template_span = None
+            template_span.__exit__(None, None, None)
+
+    def wrap(self, wsgi_app: Callable) -> Callable:
+        def profiled_app(environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+            settings = self.active_settings()
+            if settings is None:
+                return wsgi_app(environ, start_response)
+            path = environ.get('PATH_INFO', '')
+            if settings['route'] is not None and not fnmatch.fnmatchcase(path, settings['route']):
+                return wsgi_app(environ, start_response)
+            if settings['sample_rate'] < 1.0 and random.random() >= settings['sample_rate']:
+                return wsgi_app(environ, start_response)
+            return self._profile(wsgi_app, environ, start_response, settings['mode'])
+        profiled_app.__wrapped__ = wsgi_app
+        return profiled_app
+
+    def _profile(self, wsgi_app: Callable, environ: Dict[str, Any], start_response: Callable,
+                 mode: str) -> Iterable[bytes]:
+        with self._lock:
+            self._seq += 1
+            profile_id = f"{int(time.time() * 1000)}-{os.getpid()}-{self._seq}"
+        profile = RequestProfile(profile_id, environ.get('REQUEST_METHOD', 'GET'), environ.get('PATH_INFO', ''), mode)
+        streaming = []
+
+        def capture(status: str, headers: List[Tuple[str, str]], exc_info: Any = None) -> Callable:
+            profile.status = int(status.split(' ', 1)[0])
+            content_type = next((value for name, value in headers if name.lower() == 'content-type'), '')
+            streaming.append(content_type.startswith('text/event-stream'))
+            return start_response(status, headers, exc_info)
+
+        self._start(profile)
+        try:
+            body = wsgi_app(environ, capture)
+        except BaseException:
+            self.finish(profile)
+            raise
+        _local.profile = None
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if (streaming and streaming[0]) or (isinstance(file_wrapper, type) and isinstance(body, file_wrapper)):
+            # Event-Stream bzw. sendfile: nicht umpacken, Profil endet mit dem Handler
+            profile.notes.append('body not traced')
+            self.finish(profile)
+            return body
+        return _ProfiledBody(body, profile, self)
+
+    def _start(self, profile: RequestProfile) -> None:
+        _local.profile = profile
+        if profile.mode == 'cprofile':
+            if _cprofile_lock.acquire(blocking=False):
+                profile.cprofile = cProfile.Profile()
+                profile.cprofile.enable()
+            else:
+                profile.notes.append('cprofile busy, spans only')
+        elif profile.mode == 'sampling':
+            self.sampler.add(profile)
+
+    def finish(self, profile: RequestProfile) -> None:
+        _local.profile = None
+        if profile.cprofile is not None:
+            profile.cprofile.disable()
+            _cprofile_lock.release()
+        if profile.mode == 'sampling':
+            self.sampler.remove()
+        profile.finish()
+        try:
+            self._store(profile)
+        except OSError as e:
+            profile.notes.append(f'not stored: {e}')
+        if self.on_profile is not None:
+            self.on_profile(profile)
+
+    # ----- Ablage -----
+
+    def _store(self, profile: RequestProfile) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        files = [f'{profile.id}.json']
+        if profile.cprofile is not None:
+            profile.cprofile.dump_stats(os.path.join(self.directory, f'{profile.id}.prof'))
+            files.append(f'{profile.id}.prof')
+        if profile.stacks:
+            lines = ''.join(f'{stack} {count}\n' for stack, count in sorted(profile.stacks.items()))
+            with open(os.path.join(self.directory, f'{profile.id}.stacks.txt'), 'w', encoding='utf-8') as f:
+                f.write(lines)
+            files.append(f'{profile.id}.stacks.txt')
+        data = profile.to_dict()
+        data['files'] = files
+        _write_json(os.path.join(self.directory, f'{profile.id}.json'), data)
+        self._prune()
+
+    def _prune(self) -> None:
+        names = sorted((name for name in os.listdir(self.directory) if name.endswith('.json')), key=_sort_key)
+        for name in names[:max(len(names) - self.keep, 0)]:
+            for suffix in ('.json', '.prof', '.stacks.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-5] + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Zusammenfassungen der neuesten Profile aller Worker (neueste zuerst)."""
+        try:
+            names = sorted((name for name in os.listdir(self.directory) if name.endswith('.json')),
+                           key=_sort_key, reverse=True)
+        except FileNotFoundError:
+            return []
+        profiles = []
+        for name in names[:limit]:
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # gerade entfernt
+            data.pop('spans', None)
+            profiles.append(data)
+        return profiles
+
+    def file_path(self, name: str) -> Optional[str]:
+        """Pfad einer Profil-Datei (<id>.json/.prof/.stacks.txt) oder None."""
+        if os.path.basename(name) != name or not name.endswith(('.json', '.prof', '.stacks.txt')):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+def _sort_key(name: str) -> Tuple[int, ...]:
+    # <ms>-<pid>-<nr>.json
+    return tuple(int(part) if part.isdigit() else 0 for part in name[:-5].split('-'))
+
+
+def _write_json(path: str, data: Any) -> None:
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,238 @@
+"""
+Hintergrund-Scheduler für die Wetter-Aktualisierung im Backend-Prozess.
+
+- läuft im konfigurierten Intervall und fragt vor jedem Lauf den
+  Auto-Update-Schalter neu ab (toggle_auto_update wirkt sofort)
+- gleichzeitige Auslöser (Timer, /wetter_update, mehrere Admins, auch aus
+  verschiedenen Workern) werden zu genau einem laufenden Job zusammengefasst
+  ("single flight" über einen Eintrag im gemeinsamen Store)
+- Dauer, letzter Erfolg, letzter Fehler, letzter Versuch und Job-Einträge
+  liegen im gemeinsamen Store (shared_state): /wetter_update/status liefert in
+  jedem Worker dieselbe Antwort, und ein neuer Leader kennt den letzten Lauf
+- mit mehreren Gunicorn-Workern läuft der Zeitplan nur im Worker, der die
+  Leader-Sperre (shared_state.FileLock) hält; die übrigen versuchen sie bei
+  jedem Takt zu übernehmen. Eine gemeinsame Lauf-Sperre serialisiert manuelle
+  Auslöser über Prozessgrenzen hinweg.
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from metrics import metrics
+from shared_state import MemoryStore
+
+JOB_KEY = 'weather_refresh:job:{}'
+RUNNING_KEY = 'weather_refresh:running'
+RESULT_KEY = 'weather_refresh:result'
+ATTEMPT_KEY = 'weather_refresh:last_attempt'
+
+
+class RefreshJob:
+    __slots__ = ('id', 'trigger', 'state', 'created_at', 'started_at', 'finished_at', 'error')
+
+    def __init__(self, trigger: str) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.trigger = trigger
+        self.state = 'running'
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return round(self.finished_at - self.started_at, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'trigger': self.trigger,
+            'state': self.state,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration': self.duration,
+            'error': self.error
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RefreshJob':
+        job = cls(data['trigger'])
+        job.id = data['job_id']
+        for field in ('state', 'created_at', 'started_at', 'finished_at', 'error'):
+            setattr(job, field, data[field])
+        return job
+
+
+class RefreshScheduler:
+    def __init__(self, task: Callable[[], Any], interval: float,
+                 is_enabled: Callable[[], bool], store: Optional[Any] = None,
+                 history_ttl: float = 86400, stale_after: float = 900,
+                 leader: Optional[Any] = None, run_lock: Optional[Any] = None,
+                 poll_interval: float = 15.0) -> None:
+        self.task = task
+        self.interval = interval
+        self.is_enabled = is_enabled
+        self.leader = leader
+        self.run_lock = run_lock
+        self.store = store if store is not None else MemoryStore()
+        self.history_ttl = history_ttl
+        # Laufender Job gilt danach als verwaist (Worker während des Laufs beendet)
+        self.stale_after = stale_after
+        self.poll_interval = min(poll_interval, interval)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ----- Jobs -----
+
+    def trigger(self, reason: str = 'manual') -> RefreshJob:
+        """Startet einen Lauf oder liefert den bereits laufenden Job zurück."""
+        job = RefreshJob(reason)
+        self._save(job)
+        while not self.store.add(RUNNING_KEY, job.id, ttl=self.stale_after):
+            running = self.running_job()
+            if running is not None:
+                self.store.delete(JOB_KEY.format(job.id))
+                return running
+        threading.Thread(target=self._run, args=(job,), name=f'weather-refresh-{job.id}', daemon=True).start()
+        return job
+
+    def _run(self, job: RefreshJob) -> None:
+        try:
+            if self.run_lock is not None:
+                with self.run_lock:
+                    self._started(job)
+                    self.task()
+            else:
+                self._started(job)
+                self.task()
+            job.state = 'succeeded'
+        except Exception as e:
+            job.state = 'failed'
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            if job.started_at is not None:
+                metrics.observe('dashboard_weather_refresh_duration_seconds', job.finished_at - job.started_at)
+            metrics.inc('dashboard_weather_refresh_total', outcome=job.state, trigger=job.trigger)
+            # Nur der Job mit dem RUNNING_KEY schreibt das Ergebnis (single flight)
+            if self.store.get(RUNNING_KEY) == job.id:
+                result = self._result()
+                result['last_duration'] = job.duration
+                if job.state == 'succeeded':
+                    result['last_success'] = job.finished_at
+                else:
+                    result['last_error'] = job.error
+                    result['last_error_at'] = job.finished_at
+                self.store.set(RESULT_KEY, result)
+                self.store.delete(RUNNING_KEY)
+
+    def _started(self, job: RefreshJob) -> None:
+        job.started_at = time.time()
+        self._save(job)
+
+    def _save(self, job: RefreshJob) -> None:
+        self.store.set(JOB_KEY.format(job.id), job.to_dict(), ttl=self.history_ttl)
+
+    def running_job(self) -> Optional[RefreshJob]:
+        job_id = self.store.get(RUNNING_KEY)
+        if job_id is None:
+            return None
+        job = self.get_job(job_id)
+        if job is None:
+            # Eintrag ohne Job (abgelaufen): Sperre freigeben
+            self.store.delete(RUNNING_KEY)
+        return job
+
+    def _result(self) -> Dict[str, Any]:
+        return self.store.get(RESULT_KEY) or {}
+
+    @property
+    def last_success(self) -> Optional[float]:
+        return self._result().get('last_success')
+
+    @property
+    def last_attempt(self) -> Optional[float]:
+        return self.store.get(ATTEMPT_KEY)
+
+    def get_job(self, job_id: str) -> Optional[RefreshJob]:
+        """Job aus dem gemeinsamen Store, auch wenn ein anderer Worker ihn gestartet hat."""
+        data = self.store.get(JOB_KEY.format(job_id))
+        return RefreshJob.from_dict(data) if data is not None else None
+
+    # ----- Zeitsteuerung -----
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name='weather-scheduler', daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Nach Änderung des Auto-Update-Schalters sofort neu bewerten."""
+        self._wakeup.set()
+
+    def is_leader(self) -> bool:
+        """Versucht die Leader-Sperre zu übernehmen (nur im Scheduler-Takt)."""
+        return self.leader is None or self.leader.acquire(blocking=False)
+
+    @property
+    def leading(self) -> bool:
+        """Hält dieser Prozess die Leader-Sperre? Fragt nur ab, ohne sie zu nehmen."""
+        return self.leader is None or self.leader.held
+
+    def _enabled(self) -> bool:
+        try:
+            return bool(self.is_enabled())
+        except Exception:
+            return False
+
+    def _loop(self) -> None:
+        # Der Schalter wird bei jedem Takt gelesen, damit der Leader auch
+        # Änderungen bemerkt, die in einem anderen Worker gemacht wurden
+        was_enabled = False
+        while True:
+            self._wakeup.clear()
+            enabled = self._enabled()
+            if enabled and self.is_leader():
+                now = time.time()
+                # Schalter wieder an: nicht erst ein volles Intervall warten,
+                # wenn der letzte erfolgreiche Lauf schon zu lange her ist
+                last_success, last_attempt = self.last_success, self.last_attempt
+                stale = last_success is None or now - last_success >= self.interval
+                if last_attempt is None or now - last_attempt >= self.interval or (stale and not was_enabled):
+                    self.store.set(ATTEMPT_KEY, now)
+                    self.trigger('schedule')
+            was_enabled = enabled
+            self._wakeup.wait(self.poll_interval)
+
+    @property
+    def next_run(self) -> Optional[float]:
+        last_attempt = self.last_attempt
+        if last_attempt is None or not self.leading:
+            return None
+        return last_attempt + self.interval
+
+    def status(self) -> Dict[str, Any]:
+        running = self.running_job()
+        result = self._result()
+        enabled = self._enabled()
+        return {
+            'auto_update': enabled,
+            'interval': self.interval,
+            'scheduler_running': self._thread is not None and self._thread.is_alive(),
+            'leader': self._thread is not None and self.leading,
+            'pid': os.getpid(),
+            'next_run': self.next_run if enabled else None,
+            'running_job': running.to_dict() if running is not None else None,
+            'last_success': result.get('last_success'),
+            'last_error': result.get('last_error'),
+            'last_error_at': result.get('last_error_at'),
+            'last_duration': result.get('last_duration')
+        }
@@ -0,0 +1,339 @@
+"""
+Gemeinsamer Zustand für alle Gunicorn-Worker, ohne externen Dienst.
+
+- SQLiteStore: Schlüssel/Wert mit Ablaufzeit und atomare Zähler in einer
+  SQLite-Datenbank im WAL-Modus (Leser blockieren Schreiber nicht)
+- MemoryStore: gleiche Schnittstelle nur im Prozess (Entwicklung, ein Worker)
+- SQLiteLimiterStorage: Speicher für Flask-Limiter (``sqlite:///pfad.db``),
+  damit "5 per minute" für alle Worker zusammen gilt und nicht pro Worker
+- FileLock: flock-basierte Sperre, u.a. für die Leader-Wahl des Schedulers;
+  endet der Leader-Prozess, gibt das Betriebssystem die Sperre frei
+
+Die Auswahl erfolgt über SHARED_STATE_BACKEND (sqlite|memory) und
+SHARED_STATE_PATH (Standard: <TARGET_DIR>/output/shared_state.db).
+create_app() ruft configure_shared_store() mit dem Zielverzeichnis der App auf;
+ohne Konfiguration gilt die Umgebung (zielverzeichnis), sonst RuntimeError.
+"""
+
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from limits.storage import Storage
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)',
+    'CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires REAL NOT NULL)'
+)
+
+
+class SQLiteStore:
+    backend = 'sqlite'
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Eine Verbindung pro Thread und Prozess (nach fork nicht wiederverwenden)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ----- Schlüssel/Wert -----
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute('SELECT value, expires FROM kv WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.time() + ttl if ttl else None
+        self._conn().execute('INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)',
+                             (key, json.dumps(value), expires))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Setzt key nur, wenn er fehlt oder abgelaufen ist; atomar über alle Worker."""
+        now = time.time()
+        cursor = self._conn().execute(
+            'INSERT INTO kv (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE kv.expires IS NOT NULL AND kv.expires <= ?',
+            (key, json.dumps(value), now + ttl if ttl else None, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._conn().execute('DELETE FROM kv WHERE key = ?', (key,))
+
+    # ----- Zähler mit festem Zeitfenster -----
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO counters (key, value, expires) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                'value = CASE WHEN expires <= ? THEN excluded.value ELSE value + excluded.value END, '
+                'expires = CASE WHEN expires <= ? THEN excluded.expires ELSE expires END',
+                (key, amount, now + expiry, now, now)
+            )
+            value = conn.execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def counter(self, key: str) -> Tuple[int, float]:
+        """Zählerstand und Ablaufzeitpunkt (abgelaufen: 0 und jetzt)."""
+        now = time.time()
+        row = self._conn().execute('SELECT value, expires FROM counters WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] <= now:
+            return 0, now
+        return row[0], row[1]
+
+    def clear_counter(self, key: str) -> None:
+        self._conn().execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    def reset(self) -> int:
+        conn = self._conn()
+        count = conn.execute('DELETE FROM counters').rowcount
+        conn.execute('DELETE FROM kv')
+        return count
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.execute('DELETE FROM counters WHERE expires <= ?', (now,))
+        conn.execute('DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?', (now,))
+
+
+class MemoryStore:
+    backend = 'memory'
+
+    def __init__(self) -> None:
+        self.path = None
+        self._lock = threading.Lock()
+        self._kv: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._counters: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._kv.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._kv[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self.get(key) is not None:
+                return False
+            self.set(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        self._kv.pop(key, None)
+
+    def incr(self, key: str, expiry: float, amount: int = 1) -> int:
+        now = time.time()
+        with self._lock:
+            value, expires = self._counters.get(key, (0, now))
+            if expires <= now:
+                value, expires = 0, now + expiry
+            self._counters[key] = (value + amount, expires)
+            return value + amount
+
+    def counter(self, key: str) -> Tuple[int, float]:
+        now = time.time()
+        value, expires = self._counters.get(key, (0, now))
+        return (value, expires) if expires > now else (0, now)
+
+    def clear_counter(self, key: str) -> None:
+        self._counters.pop(key, None)
+
+    def reset(self) -> int:
+        with self._lock:
+            count = len(self._counters)
+            self._counters.clear()
+            self._kv.clear()
+        return count
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            self._counters = {k: v for k, v in self._counters.items() if v[1] > now}
+            self._kv = {k: v for k, v in self._kv.items() if v[1] is None or v[1] > now}
+
+
+class SQLiteLimiterStorage(Storage):
+    """Flask-Limiter Speicher (Fixed Window) auf SQLiteStore: ``sqlite:///absoluter/pfad.db``"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options: Any) -> None:
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.store = SQLiteStore(uri.split('://', 1)[1], timeout=float(options.get('timeout', 5.0)))
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key: str, expiry: int, elastic_expiry: bool = False, amount: int = 1) -> int:
+        return self.store.incr(key, expiry, amount)
+
+    def get(self, key: str) -> int:
+        return self.store.counter(key)[0]
+
+    def get_expiry(self, key: str) -> float:
+        return self.store.counter(key)[1]
+
+    def check(self) -> bool:
+        try:
+            self.store.counter('__check__')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        return self.store.reset()
+
+    def clear(self, key: str) -> None:
+        self.store.clear_counter(key)
+
+
+class FileLock:
+    """
+    Exklusive flock-Sperre für Prozesse und Threads: gehalten wird sie vom
+    Thread, der sie genommen hat. acquire() ist für diesen idempotent (Takt des
+    Leaders), andere Threads desselben Prozesses warten wie fremde Prozesse.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._owner: Optional[int] = None
+        # Gehalten, solange die flock-Sperre gehalten wird
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self._owner == threading.get_ident():
+            return True
+        if not self._lock.acquire(blocking):
+            return False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BaseException:
+                os.close(fd)
+                raise
+        except BlockingIOError:
+            self._lock.release()
+            return False
+        except BaseException:
+            self._lock.release()
+            raise
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self._owner = threading.get_ident()
+        return True
+
+    def release(self) -> None:
+        if self._owner != threading.get_ident():
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+        self._owner = None
+        self._lock.release()
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+BACKENDS = ('sqlite', 'memory')
+
+
+def shared_state_path(target_dir: Optional[str] = None, path: Optional[str] = None) -> str:
+    """SHARED_STATE_PATH bzw. <target_dir>/output/shared_state.db; ohne beides RuntimeError."""
+    path = path or os.getenv('SHARED_STATE_PATH')
+    if path:
+        return path
+    target_dir = target_dir or os.getenv('zielverzeichnis')
+    if not target_dir:
+        raise RuntimeError('Gemeinsamer Zustand: weder TARGET_DIR noch SHARED_STATE_PATH gesetzt')
+    return os.path.join(target_dir, 'output', 'shared_state.db')
+
+
+def shared_state_backend(backend: Optional[str] = None) -> str:
+    backend = backend or os.getenv('SHARED_STATE_BACKEND', 'sqlite')
+    if backend not in BACKENDS:
+        raise ValueError(f"SHARED_STATE_BACKEND muss {' oder '.join(BACKENDS)} sein, nicht {backend!r}")
+    return backend
+
+
+def limiter_storage_uri(target_dir: Optional[str] = None, backend: Optional[str] = None,
+                        path: Optional[str] = None) -> str:
+    """Speicher-URI für Flask-Limiter passend zu SHARED_STATE_BACKEND."""
+    if shared_state_backend(backend) == 'memory':
+        return 'memory://'
+    return f'sqlite://{os.path.abspath(shared_state_path(target_dir, path))}'
+
+
+_stores: Dict[Tuple[str, Optional[str]], Any] = {}
+_store = None
+_store_lock = threading.Lock()
+
+
+def configure_shared_store(target_dir: Optional[str] = None, backend: Optional[str] = None,
+                           path: Optional[str] = None):
+    """
+    Store für ein Zielverzeichnis (einer pro Pfad und Prozess) und zugleich der
+    Standard für get_shared_store(). Fehler beim Öffnen werden nicht verschluckt.
+    """
+    global _store
+    backend = shared_state_backend(backend)
+    key = (backend, os.path.abspath(shared_state_path(target_dir, path)) if backend == 'sqlite' else None)
+    with _store_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SQLiteStore(key[1]) if backend == 'sqlite' else MemoryStore()
+        _store = store
+    return store
+
+
+def get_shared_store():
+    """Zuletzt konfigurierter Store; ohne configure_shared_store() aus der Umgebung."""
+    if _store is None:
+        return configure_shared_store()
+    return _store
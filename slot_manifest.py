@@ -0,0 +1,224 @@
+"""
+Index der PDF-Slots (pdfs/manifest.json).
+
+Pro belegtem Slot stehen Version (Inhalts-Hash), Größe, Seitenzahl,
+Upload-Zeit und Dateiname im Manifest. upload_file/delete_file, der
+Sammel-Upload und die PDF-Optimierung aktualisieren es unter der Sperre der
+jeweiligen Slots, das Manifest selbst wird unter einer eigenen Sperre
+gelesen, geändert und atomar ersetzt. Beim Start gleicht rebuild() es mit pdfs/ ab; gehasht wird
+dabei nur, was sich seit dem letzten Eintrag geändert hat.
+
+Statusabfragen lesen nur den Snapshot im Speicher: die Antwort pro
+Bildschirmgruppe wird einmal pro Manifest-Version serialisiert. Änderungen
+anderer Worker werden wie bei allen Snapshots nach spätestens
+SNAPSHOT_REVALIDATE_SECONDS erkannt.
+
+Slot-Anzahl (SLOT_COUNT) und Bildschirmgruppen (SCREEN_GROUPS) sind
+konfigurierbar, z.B. ``SCREEN_GROUPS=halle:1-3;wache:4,5,6``.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared_state import FileLock
+from snapshot_cache import snapshot_cache
+
+DEFAULT_GROUP = 'all'
+
+
+def parse_screen_groups(spec: str, slot_count: int) -> Dict[str, List[int]]:
+    """``name:1-3;name2:4,5`` -> {'all': [1..n], 'name': [1, 2, 3], 'name2': [4, 5]}"""
+    groups = {DEFAULT_GROUP: list(range(1, slot_count + 1))}
+    for part in filter(None, (p.strip() for p in spec.split(';'))):
+        name, _, numbers = part.partition(':')
+        name = name.strip()
+        if not name or not numbers.strip():
+            raise ValueError(f"Ungültige Bildschirmgruppe: {part!r}")
+        slots: List[int] = []
+        for item in filter(None, (i.strip() for i in numbers.split(','))):
+            first, _, last = item.partition('-')
+            slots.extend(range(int(first), int(last or first) + 1))
+        invalid = [s for s in slots if not 1 <= s <= slot_count]
+        if invalid:
+            raise ValueError(f"Bildschirmgruppe {name!r}: Slots {invalid} außerhalb 1..{slot_count}")
+        groups[name] = sorted(set(slots))
+    return groups
+
+
+def count_pages(path: str) -> Optional[int]:
+    """Seitenzahl über PyMuPDF (optional); None, wenn nicht verfügbar oder unlesbar."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        return None
+    try:
+        with fitz.open(path) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+def _signature(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+
+class SlotManifest:
+    def __init__(self, pdf_dir: str, slot_count: int = 6,
+                 groups: Optional[Dict[str, List[int]]] = None) -> None:
+        self.pdf_dir = pdf_dir
+        self.path = os.path.join(pdf_dir, 'manifest.json')
+        self.slot_count = slot_count
+        self.groups = groups or {DEFAULT_GROUP: list(range(1, slot_count + 1))}
+        # Serialisierte Antworten je Gruppe: (Manifest-ETag, Version, Daten, Bytes)
+        self._views: Dict[str, Tuple[str, str, Dict[str, Any], bytes]] = {}
+        self._views_lock = threading.Lock()
+
+    @property
+    def slots(self) -> range:
+        return range(1, self.slot_count + 1)
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.pdf_dir, f'{slot}.pdf')
+
+    def _lock(self) -> FileLock:
+        return FileLock(os.path.join(self.pdf_dir, '.manifest.lock'))
+
+    # ----- Schreiben -----
+
+    def _entry(self, slot: int, previous: Optional[Dict[str, Any]], version: Optional[str] = None,
+               filename: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Eintrag aus der Datei im Slot; unveränderte Dateien (gleiche Signatur) werden nicht gehasht."""
+        path = self.slot_path(slot)
+        signature = _signature(path)
+        if signature is None:
+            return None
+        if previous is not None and previous.get('signature') == signature and filename is None:
+            return previous
+        if version is None:
+            file_version = snapshot_cache.file_version(path)
+            if file_version is None:
+                return None
+            version = file_version.etag
+        keep = previous is not None and filename is None
+        return {
+            'version': version,
+            'size': signature[2],
+            'pages': count_pages(path),
+            # Nach der Optimierung bleiben Upload-Zeit und Dateiname erhalten; ohne Upload zählt mtime
+            'uploaded_at': previous['uploaded_at'] if keep else (time.time() if filename else signature[1] / 1e9),
+            'filename': previous.get('filename') if keep else filename,
+            'signature': signature
+        }
+
+    def _read(self) -> Dict[str, Any]:
+        snapshot_cache.invalidate(self.path)  # unter der Sperre immer den Stand auf der Platte
+        snapshot = snapshot_cache.get(self.path)
+        return snapshot.data if snapshot is not None else {'slots': {}}
+
+    def _write(self, slots: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        ordered = {key: slots[key] for key in sorted(slots, key=int)}
+        data = {
+            'version': _version(ordered),
+            'slot_count': self.slot_count,
+            'updated_at': time.time(),
+            'slots': ordered
+        }
+        snapshot_cache.write_json(self.path, data, ensure_ascii=False, indent=None)
+        return data
+
+    def update(self, slot: int, version: Optional[str] = None, filename: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Übernimmt den aktuellen Inhalt von Slot ``slot`` ins Manifest (leer = Eintrag entfernen).
+        Der Aufrufer hält die Sperre des Slots (pdf_upload.slot_lock). ``filename`` markiert
+        einen neuen Upload, ``version`` spart das erneute Hashen.
+        """
+        return self.update_many({slot: (version, filename)})
+
+    def update_many(self, changes: Dict[int, Tuple[Optional[str], Optional[str]]]) -> Dict[str, Any]:
+        """
+        Wie update() für mehrere Slots ({Slot: (version, filename)}) in einem
+        Schreibvorgang: Bildschirme sehen alle Änderungen mit derselben Manifest-Version.
+        Der Aufrufer hält die Sperren aller betroffenen Slots.
+        """
+        with self._lock():
+            slots = dict(self._read().get('slots', {}))
+            for slot, (version, filename) in changes.items():
+                entry = self._entry(slot, slots.get(str(slot)), version, filename)
+                if entry is None:
+                    slots.pop(str(slot), None)
+                else:
+                    slots[str(slot)] = entry
+            return self._write(slots)
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Gleicht das Manifest mit pdfs/ ab (beim Start; Slots über SLOT_COUNT fallen heraus)."""
+        os.makedirs(self.pdf_dir, exist_ok=True)
+        with self._lock():
+            data = self._read()
+            previous = data.get('slots', {})
+            slots = {}
+            for slot in self.slots:
+                entry = self._entry(slot, previous.get(str(slot)))
+                if entry is not None:
+                    slots[str(slot)] = entry
+            if slots == previous and data.get('slot_count') == self.slot_count:
+                return data
+            return self._write(slots)
+
+    # ----- Lesen -----
+
+    def current(self) -> Dict[str, Any]:
+        snapshot = snapshot_cache.get(self.path)
+        if snapshot is None:
+            return self.rebuild()  # z.B. manuell gelöscht
+        return snapshot.data
+
+    def entry(self, slot: int) -> Optional[Dict[str, Any]]:
+        return self.current()['slots'].get(str(slot))
+
+    def status(self, group: str = DEFAULT_GROUP) -> Optional[Tuple[str, Dict[str, Any], bytes]]:
+        """(Version, Daten, JSON-Bytes) des Slot-Status einer Gruppe; None bei unbekannter Gruppe."""
+        numbers = self.groups.get(group)
+        if numbers is None:
+            return None
+        snapshot = snapshot_cache.get(self.path)
+        if snapshot is None:
+            self.rebuild()
+            snapshot = snapshot_cache.get(self.path)
+        with self._views_lock:
+            cached = self._views.get(group)
+            if cached is not None and cached[0] == snapshot.etag:
+                return cached[1:]
+
+        slots = {}
+        for number in numbers:
+            entry = snapshot.data['slots'].get(str(number))
+            if entry is not None:
+                slots[number] = {key: value for key, value in entry.items() if key != 'signature'}
+        version = _version(slots)
+        data = {
+            'version': version,
+            'group': group,
+            'slot_count': self.slot_count,
+            'screen_slots': numbers,
+            'occupied': list(slots),
+            'versions': {number: entry['version'] for number, entry in slots.items()},
+            'slots': slots
+        }
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with self._views_lock:
+            self._views[group] = (snapshot.etag, version, data, body)
+        return version, data, body
+
+
+def _version(slots: Dict[Any, Dict[str, Any]]) -> str:
+    key = repr(sorted((str(number), entry['version']) for number, entry in slots.items()))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
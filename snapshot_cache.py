@@ -0,0 +1,211 @@
+"""
+In-Process Snapshot-Cache für die Ausgabe-Dateien (output/*.json) und
+Inhalts-Versionen (ETags) der PDF-Slots.
+
+Jede Datei wird einmal gelesen, geparst und als fertige Antwort-Bytes im
+Speicher gehalten. Invalidiert wird über die Datei-Signatur (Inode, mtime,
+Größe): Schreiber im selben Prozess (update_infos, toggle_auto_update,
+wetterdaten.main) gehen über write_json() und aktualisieren den Cache sofort,
+Änderungen aus anderen Prozessen werden spätestens nach
+SNAPSHOT_REVALIDATE_SECONDS per os.stat erkannt.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import metrics
+from profiling import span
+
+Signature = Optional[Tuple[int, int, int]]
+
+
+class Snapshot:
+    """Geparster Inhalt einer Datei samt vorserialisierter Antwort."""
+
+    __slots__ = ('path', 'data', 'body', 'etag', 'signature', 'checked_at')
+
+    def __init__(self, path: str, data: Any, body: bytes, signature: Signature) -> None:
+        self.path = path
+        self.data = data
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.signature = signature
+        self.checked_at = time.monotonic()
+
+
+class FileVersion:
+    """Inhalts-Hash einer (Binär-)Datei, z.B. eines PDF-Slots."""
+
+    __slots__ = ('path', 'etag', 'mtime', 'size', 'signature')
+
+    def __init__(self, path: str, etag: str, mtime: float, size: int, signature: Signature) -> None:
+        self.path = path
+        self.etag = etag
+        self.mtime = mtime
+        self.size = size
+        self.signature = signature
+
+
+def hash_bytes(data: bytes) -> str:
+    """Wie hash_file(), für bereits geladene Inhalte."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Kurzer SHA-256 Inhalts-Hash, dient als ETag und als ?v= URL-Version."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class SnapshotCache:
+    def __init__(self, revalidate_interval: float = 1.0) -> None:
+        self.revalidate_interval = revalidate_interval
+        self._entries: Dict[str, Optional[Snapshot]] = {}
+        self._checked: Dict[str, float] = {}
+        self._versions: Dict[str, FileVersion] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stat_calls = 0
+        self.writes = 0
+
+    @staticmethod
+    def _signature(path: str) -> Signature:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @staticmethod
+    def _serialize(data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def get(self, path: str) -> Optional[Snapshot]:
+        """Liefert den Snapshot einer Datei oder None, wenn sie nicht existiert."""
+        now = time.monotonic()
+        with self._lock:
+            if path in self._entries and now - self._checked[path] < self.revalidate_interval:
+                self.hits += 1
+                return self._entries[path]
+
+        self.stat_calls += 1
+        signature = self._signature(path)
+        with self._lock:
+            if path in self._entries:
+                entry = self._entries[path]
+                current = entry.signature if entry is not None else None
+                if current == signature:
+                    self._checked[path] = now
+                    self.hits += 1
+                    return entry
+
+        entry = self._load(path, signature)
+        with self._lock:
+            self._entries[path] = entry
+            self._checked[path] = now
+            self.misses += 1
+        return entry
+
+    def _load(self, path: str, signature: Signature) -> Optional[Snapshot]:
+        if signature is None:
+            return None
+        with metrics.timer('dashboard_file_io_duration_seconds', op='json_read'), span('io', 'json_read'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        return Snapshot(path, data, self._serialize(data), signature)
+
+    def write_json(self, path: str, data: Any, ensure_ascii: bool = True, indent: Optional[int] = 4) -> Snapshot:
+        """Schreibt JSON atomar (Temp-Datei + rename) und legt den Snapshot direkt an."""
+        directory = os.path.dirname(path) or '.'
+        started = time.perf_counter()
+        with span('io', 'json_write'):
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=ensure_ascii, indent=indent)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        metrics.observe('dashboard_file_io_duration_seconds', time.perf_counter() - started, op='json_write')
+
+        entry = Snapshot(path, data, self._serialize(data), self._signature(path))
+        with self._lock:
+            self._entries[path] = entry
+            self._checked[path] = time.monotonic()
+            self.writes += 1
+        return entry
+
+    def file_version(self, path: str) -> Optional[FileVersion]:
+        """Inhalts-Version einer Datei; gehasht wird nur, wenn sich die Signatur ändert."""
+        self.stat_calls += 1
+        signature = self._signature(path)
+        if signature is None:
+            with self._lock:
+                self._versions.pop(path, None)
+            return None
+
+        with self._lock:
+            version = self._versions.get(path)
+            if version is not None and version.signature == signature:
+                self.hits += 1
+                return version
+
+        with metrics.timer('dashboard_file_io_duration_seconds', op='pdf_hash'), span('io', 'pdf_hash'):
+            etag = hash_file(path)
+        version = FileVersion(path, etag, signature[1] / 1e9, signature[2], signature)
+        with self._lock:
+            self._versions[path] = version
+            self.misses += 1
+        return version
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Verwirft einen (oder alle) Snapshots, z.B. nach externem Schreiben."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._checked.clear()
+                self._versions.clear()
+            else:
+                self._entries.pop(path, None)
+                self._checked.pop(path, None)
+                self._versions.pop(path, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'stat_calls': self.stat_calls,
+            'writes': self.writes,
+            'entries': len(self._entries),
+            'file_versions': len(self._versions),
+            'revalidate_interval': self.revalidate_interval
+        }
+
+
+# Gemeinsame Instanz für Backend und wetterdaten.py
+snapshot_cache = SnapshotCache(float(os.getenv('SNAPSHOT_REVALIDATE_SECONDS', 1.0)))
+
+
+def _cache_metrics():
+    yield 'dashboard_snapshot_cache_hits_total', {}, snapshot_cache.hits
+    yield 'dashboard_snapshot_cache_misses_total', {}, snapshot_cache.misses
+
+
+metrics.register_collector(_cache_metrics)
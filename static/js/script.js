@@ -1,4 +1,72 @@
-// Lade Wetterdaten für Frontend
+// Anzeige-Client der Informationstafel
+//
+// Ein einziger Zeitplan (schedule/tick) steuert Seitenwechsel, Uhr und das
+// Polling ohne Live-Verbindung; was gleichzeitig fällig ist, läuft im selben
+// Durchgang. PDF-Slots werden nur neu geladen, wenn sich ihre Version in
+// /api/public/pdf_status ändert. Gerasterte Seiten bleiben als ImageBitmap im
+// Speicher: Seitenwechsel und Größenänderungen zeichnen nur noch um.
+
+const PAGE_INTERVAL = 15000;       // Seitenwechsel
+const STATUS_INTERVAL = 60000;     // Slot-Status (nur ohne Live-Verbindung)
+const INFO_INTERVAL = 60000;       // Lauftext (nur ohne Live-Verbindung)
+const WEATHER_INTERVAL = 300000;   // Wetter (nur ohne Live-Verbindung)
+const TICK_SLACK = 250;            // so knapp beieinander Fälliges läuft gemeinsam
+const BITMAP_BUDGET = 256 * 1024 * 1024; // Bytes für gerasterte Seiten (4 Byte je Pixel)
+
+// Bildschirmgruppe aus der Adresse, z.B. /static/index.html?group=halle
+const screenGroup = new URLSearchParams(window.location.search).get('group');
+
+// ===== Zeitplan =====
+const tasks = new Map();
+let tickTimer = null;
+let tickDue = Infinity;
+
+// Aufgabe einplanen (ersetzt eine gleichnamige); every > 0 wiederholt sie
+function schedule(name, delay, run, every = 0) {
+  tasks.set(name, { due: Date.now() + delay, run, every });
+  armTick();
+}
+
+function cancel(name) {
+  tasks.delete(name);
+}
+
+function armTick() {
+  let next = Infinity;
+  tasks.forEach(task => { next = Math.min(next, task.due); });
+  if (next === tickDue) return;
+  clearTimeout(tickTimer);
+  tickDue = next;
+  if (next !== Infinity) {
+    tickTimer = setTimeout(tick, Math.min(Math.max(next - Date.now(), 0), 2147483647));
+  }
+}
+
+function tick() {
+  tickDue = Infinity;
+  const now = Date.now();
+  tasks.forEach((task, name) => {
+    if (task.due > now + TICK_SLACK) return;
+    if (task.every) {
+      task.due = Math.max(task.due + task.every, now + TICK_SLACK + 1);
+    } else {
+      tasks.delete(name);
+    }
+    task.run();
+  });
+  armTick();
+}
+
+// ===== Uhr =====
+function updateClock() {
+  const now = new Date();
+  document.getElementById('time').textContent = now.toLocaleTimeString('de-DE', { hour: '2-digit', minute: '2-digit' });
+  document.getElementById('date').textContent = now.toLocaleDateString('de-DE');
+  // Nächste volle Minute; TICK_SLACK dazu, damit der Durchgang nicht davor liegt
+  schedule('clock', 60000 - (now.getSeconds() * 1000 + now.getMilliseconds()) + TICK_SLACK, updateClock);
+}
+
+// ===== Wetter =====
 async function loadWeatherData() {
   try {
     const weatherResponse = await fetch('/api/public/weather');
@@ -6,7 +74,7 @@ async function loadWeatherData() {
       const weatherData = await weatherResponse.json();
       updateWeatherDisplay(weatherData);
     }
-    
+
     const forecastResponse = await fetch('/api/public/forecast');
     if (forecastResponse.ok) {
       const forecastData = await forecastResponse.json();
@@ -17,48 +85,94 @@ async function loadWeatherData() {
   }
 }
 
-// Lade Lauftext
-async function loadInfoData() {
-  try {
-    const response = await fetch('/api/public/info');
-    if (response.ok) {
-      const data = await response.json();
-      updateMarqueeText(data.infos);
-    }
-  } catch (error) {
-    console.error('Fehler beim Laden der Info-Daten:', error);
-  }
+// Inhaltsgehashte Icon-URL aus den Wetterdaten (dauerhaft cachebar)
+function iconUrl(item) {
+  return item.icon_url || `/static/Datenback_images/${item.icon}.png`;
 }
 
+// /api/public/weather: {weather, akt_temperature, min_temperature, max_temperature, icon, icon_url}
 function updateWeatherDisplay(data) {
   const weatherElement = document.getElementById('weather');
   const weatherIcon = document.getElementById('weather-icon');
   const minTemp = document.getElementById('min-temp');
   const maxTemp = document.getElementById('max-temp');
-  
-  if (weatherElement) weatherElement.textContent = data.description || 'Wetter nicht verfügbar';
-  if (weatherIcon && data.icon) weatherIcon.src = `/static/Datenback_images/${data.icon}.png`;
-  if (minTemp) minTemp.textContent = `Min: ${data.temp_min}°C`;
-  if (maxTemp) maxTemp.textContent = `Max: ${data.temp_max}°C`;
+
+  if (weatherElement) {
+    weatherElement.textContent = data.weather ? `${data.weather}, ${data.akt_temperature}` : 'Wetter nicht verfügbar';
+  }
+  if (weatherIcon && (data.icon_url || data.icon)) {
+    weatherIcon.src = iconUrl(data);
+    weatherIcon.alt = data.weather || 'Wetter Icon';
+  }
+  if (minTemp) minTemp.textContent = `Min: ${data.min_temperature}`;
+  if (maxTemp) maxTemp.textContent = `Max: ${data.max_temperature}`;
 }
 
-function updateForecastDisplay(data) {
+// /api/public/forecast: Liste von {date, min_temperature, max_temperature, weather, icon, icon_url}
+function updateForecastDisplay(days) {
   const container = document.getElementById('forecast-container');
-  if (!container || !data.list) return;
-  
+  if (!container || !Array.isArray(days)) return;
+
   container.innerHTML = '';
-  data.list.slice(0, 3).forEach(day => {
+  days.forEach(day => {
     const dayElement = document.createElement('div');
     dayElement.className = 'forecast-day';
-    dayElement.innerHTML = `
-      <div>${new Date(day.dt * 1000).toLocaleDateString('de-DE', { weekday: 'short' })}</div>
-      <img src="/static/Datenback_images/${day.weather[0].icon}.png" alt="${day.weather[0].description}" />
-      <div>${Math.round(day.main.temp)}°C</div>
-    `;
+
+    const dateElement = document.createElement('p');
+    dateElement.textContent = new Date(day.date).toLocaleDateString('de-DE', { weekday: 'short' });
+
+    const iconElement = document.createElement('img');
+    iconElement.src = iconUrl(day);
+    iconElement.alt = day.weather || '';
+
+    const tempElement = document.createElement('p');
+    tempElement.textContent = `${day.min_temperature} / ${day.max_temperature}`;
+
+    dayElement.appendChild(dateElement);
+    dayElement.appendChild(iconElement);
+    dayElement.appendChild(tempElement);
     container.appendChild(dayElement);
   });
 }
 
+// ===== Lauftext =====
+let infoVersion = null;
+
+async function loadInfoData() {
+  try {
+    const response = await fetch('/api/public/info');
+    if (response.ok) {
+      const data = await response.json();
+      infoVersion = data.version;
+      updateMarqueeText(data.infos);
+      scheduleInfoChange(data);
+    }
+  } catch (error) {
+    console.error('Fehler beim Laden der Info-Daten:', error);
+  }
+}
+
+// Geplante Nachrichten: genau zum nächsten Start/Ende neu laden (Uhr des Servers)
+function scheduleInfoChange(data) {
+  cancel('info-change');
+  if (!data.next_change_at) return;
+  const delay = Math.max(data.next_change_at - data.server_time, 0) * 1000 + TICK_SLACK;
+  schedule('info-change', delay, loadInfoData);
+}
+
+// Polling ohne Live-Verbindung: nur nachfragen, ob sich seit infoVersion etwas geändert hat
+async function checkInfoData() {
+  if (infoVersion === null) return loadInfoData();
+  try {
+    const response = await fetch(`/api/public/messages?since=${infoVersion}`);
+    if (!response.ok) return;
+    const data = await response.json();
+    if (data.resync || data.changes.length) loadInfoData();
+  } catch (error) {
+    console.error('Fehler beim Abfragen der Info-Daten:', error);
+  }
+}
+
 function updateMarqueeText(text) {
   const marquee = document.getElementById('marquee1');
   if (marquee && text) {
@@ -66,175 +180,300 @@ function updateMarqueeText(text) {
   }
 }
 
-// Initialisierung
-document.addEventListener('DOMContentLoaded', function() {
-  loadPdfs();
-  loadWeatherData();
-  loadInfoData();
-  
-  // Regelmäßige Updates
-  setInterval(loadWeatherData, 300000); // Alle 5 Minuten
-  setInterval(loadInfoData, 60000); // Alle 1 Minute
-  setInterval(loadPdfs, reloadInterval); // PDF reload
-});
-
-const pdfUrls = [
-  '/api/public/pdfs/1.pdf',
-  '/api/public/pdfs/2.pdf',
-  '/api/public/pdfs/3.pdf',
-  '/api/public/pdfs/4.pdf',
-  '/api/public/pdfs/5.pdf',
-  '/api/public/pdfs/6.pdf'
-];
-
-const intervalTimes = [15000, 15000, 15000, 15000, 15000, 15000];
-const reloadInterval = 60000; // 1 Minute in Millisekunden
-const totalPdfs = pdfUrls.length;
-const canvases = document.querySelectorAll('.pdf-container canvas');
-let currentPages = new Array(totalPdfs).fill(1);
-let pdfDocuments = [];
-let renderTasks = new Array(totalPdfs).fill(null);
-
-// Funktion zum Laden der PDFs
-function loadPdfs() {
-  pdfDocuments = []; // Leere das Array, um alte Referenzen zu entfernen
-  pdfUrls.forEach((url, index) => {
-    pdfjsLib.getDocument(url).promise.then(function (pdfDoc) {
-      pdfDocuments[index] = pdfDoc;
-      displayPage(index, currentPages[index]);
-    }).catch(error => {
-      console.error(`Fehler beim Laden der PDF ${url}:`, error);
-    });
-  });
+// ===== PDF-Slots =====
+// Je Canvas ein Slot; welche Slot-Nummer er zeigt, bestimmt die Bildschirmgruppe
+const slots = Array.from(document.querySelectorAll('.pdf-container canvas'), (canvas, index) => ({
+  canvas,
+  number: index + 1,
+  version: null,
+  generation: 0,     // zählt bei jedem Versionswechsel hoch, verwirft veraltete Ladevorgänge
+  page: 1,
+  pages: 0,
+  rendered: null,    // vom Server gerasterte Seiten (status ready)
+  renderPending: false,
+  pdfDoc: null       // pdf.js-Dokument, solange keine gerasterten Seiten bereitstehen
+}));
+let statusVersion = null;
+
+// Gerasterte Seiten: LRU über alle Slots, Schlüssel "<slot>:<version>:<seite>"
+const bitmaps = new Map();
+let bitmapBytes = 0;
+
+function cachedBitmap(key) {
+  const entry = bitmaps.get(key);
+  if (entry) {
+    bitmaps.delete(key);
+    bitmaps.set(key, entry);
+  }
+  return entry || null;
 }
 
-// Funktion zum Anzeigen einer Seite
-function displayPage(pdfIndex, pageNum) {
-  const canvas = canvases[pdfIndex];
-  const context = canvas.getContext('2d');
-
-  if (renderTasks[pdfIndex]) {
-    renderTasks[pdfIndex].cancel();
-    renderTasks[pdfIndex] = null;
+function storeBitmap(key, raster) {
+  releaseBitmap(key);
+  const entry = { ...raster, bytes: raster.bitmap.width * raster.bitmap.height * 4 };
+  bitmaps.set(key, entry);
+  bitmapBytes += entry.bytes;
+  for (const oldKey of bitmaps.keys()) {
+    if (bitmapBytes <= BITMAP_BUDGET || oldKey === key) break;
+    releaseBitmap(oldKey);
   }
+  return entry;
+}
 
-  pdfDocuments[pdfIndex].getPage(pageNum).then(function (page) {
-    const viewport = page.getViewport({ scale: 1.5 });
-
-    const containerWidth = canvas.parentElement.clientWidth;
-    const containerHeight = canvas.parentElement.clientHeight;
-    const scale = Math.min(containerWidth / viewport.width, containerHeight / viewport.height);
-    const scaledViewport = page.getViewport({ scale });
-
-    canvas.width = scaledViewport.width;
-    canvas.height = scaledViewport.height;
+function releaseBitmap(key) {
+  const entry = bitmaps.get(key);
+  if (!entry) return;
+  bitmaps.delete(key);
+  bitmapBytes -= entry.bytes;
+  if (entry.bitmap.close) entry.bitmap.close();
+}
 
-    const renderContext = {
-      canvasContext: context,
-      viewport: scaledViewport
-    };
+function releaseSlot(slot) {
+  const prefix = `${slot.number}:`;
+  for (const key of bitmaps.keys()) {
+    if (key.startsWith(prefix)) releaseBitmap(key);
+  }
+  if (slot.pdfDoc) slot.pdfDoc.destroy();
+  slot.pdfDoc = null;
+  slot.rendered = null;
+  slot.renderPending = false;
+  slot.pages = 0;
+  slot.page = 1;
+  slot.generation++;
+}
 
-    renderTasks[pdfIndex] = page.render(renderContext);
-    renderTasks[pdfIndex].promise.then(function () {
-      renderTasks[pdfIndex] = null;
+// Slot-Status mit If-None-Match: unverändert = 304 ohne Inhalt, kein Slot wird angefasst
+async function loadSlotStatus() {
+  const url = screenGroup ? `/api/public/pdf_status?group=${encodeURIComponent(screenGroup)}` : '/api/public/pdf_status';
+  try {
+    const response = await fetch(url, { headers: statusVersion ? { 'If-None-Match': `"${statusVersion}"` } : {} });
+    if (response.status === 304) return;
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    const status = await response.json();
+    statusVersion = status.version;
+    slots.forEach((slot, index) => {
+      const number = status.screen_slots[index];
+      const version = status.versions[number] || null;
+      if (number !== slot.number || version !== slot.version) {
+        setSlotVersion(slot, number, version);
+      }
     });
-  }).catch(error => {
-    console.error(`Fehler beim Anzeigen der Seite ${pageNum} für PDF ${pdfIndex}:`, error);
-  });
+  } catch (error) {
+    console.error('Fehler beim Laden des Slot-Status:', error);
+  }
 }
 
-// Funktion zum Wechseln zur nächsten Seite
-function nextPage(pdfIndex) {
-  if (currentPages[pdfIndex] < pdfDocuments[pdfIndex].numPages) {
-    currentPages[pdfIndex]++;
+function setSlotVersion(slot, number, version) {
+  releaseSlot(slot);
+  slot.number = number;
+  slot.version = version;
+  if (version) {
+    loadSlot(slot);
   } else {
-    currentPages[pdfIndex] = 1;
+    slot.canvas.width = 0;  // leerer Slot
   }
-  displayPage(pdfIndex, currentPages[pdfIndex]);
 }
 
-// PDFs initial laden
-loadPdfs();
+// Vom Server vorab gerasterte Seiten; sonst das PDF über pdf.js
+async function loadSlot(slot) {
+  const generation = slot.generation;
+  const info = await fetch(`/api/public/pdfs/${slot.number}/pages`)
+    .then(response => response.ok ? response.json() : null)
+    .catch(() => null);
+  if (generation !== slot.generation) return;
+
+  slot.renderPending = !!info && info.status === 'pending';
+  if (info && info.status === 'ready') {
+    // Bilder statt pdf.js: kein PDF-Parsing auf dem Kiosk; schon gerasterte Seiten bleiben gültig
+    slot.rendered = info;
+    slot.pages = info.pages;
+    if (slot.pdfDoc) slot.pdfDoc.destroy();
+    slot.pdfDoc = null;
+  } else if (!slot.pdfDoc) {
+    const url = `/api/public/pdfs/${slot.number}.pdf?v=${slot.version}`;
+    try {
+      const pdfDoc = await pdfjsLib.getDocument(url).promise;
+      if (generation !== slot.generation) {
+        pdfDoc.destroy();
+        return;
+      }
+      slot.pdfDoc = pdfDoc;
+      slot.pages = pdfDoc.numPages;
+    } catch (error) {
+      console.error(`Fehler beim Laden der PDF ${url}:`, error);
+      return;
+    }
+  }
+  slot.page = Math.min(slot.page, slot.pages);
+  showPage(slot);
+}
 
-// Seitenwechsel alle 15 Sekunden
-for (let i = 0; i < totalPdfs; i++) {
-  setInterval(() => nextPage(i), intervalTimes[i]);
+// Seite in der Größe des Containers
+function fitSize(canvas, width, height) {
+  const box = canvas.parentElement;
+  const scale = Math.min(box.clientWidth / width, box.clientHeight / height);
+  return { width: Math.round(width * scale), height: Math.round(height * scale) };
 }
 
-// PDFs alle 1 Minute neu laden
-setInterval(() => {
-  console.log("PDFs werden neu geladen...");
-  loadPdfs();
-}, reloadInterval);
+// true, wenn der Container seit der Rasterung gewachsen ist
+function tooSmall(canvas, entry) {
+  const box = canvas.parentElement;
+  return box.clientWidth > entry.covers.width || box.clientHeight > entry.covers.height;
+}
 
-// Seiten bei Fenstergröße ändern neu rendern
-window.addEventListener('resize', () => {
-  for (let i = 0; i < totalPdfs; i++) {
-    displayPage(i, currentPages[i]);
+// Einmal auf Containergröße skalieren: danach ist jeder Seitenwechsel eine 1:1-Kopie
+async function fitBitmap(canvas, bitmap) {
+  const size = fitSize(canvas, bitmap.width, bitmap.height);
+  if (!window.createImageBitmap || !size.width || (size.width === bitmap.width && size.height === bitmap.height)) {
+    return bitmap;
   }
-});
-
-function loadWeatherData() {
-  fetch('~/output/wetterdaten.json')
-    .then(response => response.json())
-    .then(data => {
-      document.getElementById('weather').innerText = `${data.weather}, ${data.akt_temperature}`;
-      document.getElementById('weather-icon').src = `~/output/wetter_icon.png`;
-      document.getElementById('min-temp').innerText = `Min: ${data.min_temperature}`;
-      document.getElementById('max-temp').innerText = `Max: ${data.max_temperature}`;
-    })
-    .catch(error => console.error('Fehler beim Laden der Wetterdaten:', error));
+  const scaled = await createImageBitmap(bitmap, { resizeWidth: size.width, resizeHeight: size.height, resizeQuality: 'high' });
+  bitmap.close();
+  return scaled;
+}
 
-  fetch('~/output/wettervorhersage.json')
-    .then(response => response.json())
-    .then(data => {
-      const forecastContainer = document.getElementById('forecast-container');
-      forecastContainer.innerHTML = ''; // Clear previous content
+async function decodeImage(blob) {
+  if (window.createImageBitmap) return createImageBitmap(blob);
+  const image = new Image();
+  image.src = URL.createObjectURL(blob);
+  await image.decode();
+  URL.revokeObjectURL(image.src);
+  return image;
+}
 
-      data.slice(0, 7).forEach(day => {
-        const dayElement = document.createElement('div');
-        dayElement.className = 'forecast-day';
+// Gerasterte Seite vom Server in der kleinsten Breite, die den Container füllt
+async function loadPageImage(canvas, rendered, pageNum) {
+  const containerWidth = canvas.parentElement.clientWidth;
+  const widths = rendered.widths.slice().sort((a, b) => a - b);
+  const width = widths.find(w => w >= containerWidth) || widths[widths.length - 1];
+  const response = await fetch(rendered.urls[width][pageNum - 1]);
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  const bitmap = await fitBitmap(canvas, await decodeImage(await response.blob()));
+  return { bitmap, covers: { width: canvas.parentElement.clientWidth, height: canvas.parentElement.clientHeight } };
+}
 
-        const dateElement = document.createElement('p');
-        dateElement.innerText = new Date(day.date).toLocaleDateString('de-DE', { weekday: 'short' });
+// Seite mit pdf.js auf ein eigenes Canvas rastern und als ImageBitmap behalten
+async function renderPdfPage(canvas, pdfDoc, pageNum) {
+  const box = canvas.parentElement;
+  const page = await pdfDoc.getPage(pageNum);
+  const size = page.getViewport({ scale: 1 });
+  const viewport = page.getViewport({ scale: Math.min(box.clientWidth / size.width, box.clientHeight / size.height) });
+  const target = document.createElement('canvas');
+  target.width = Math.round(viewport.width);
+  target.height = Math.round(viewport.height);
+  await page.render({ canvasContext: target.getContext('2d'), viewport }).promise;
+  page.cleanup();
+  const bitmap = window.createImageBitmap ? await createImageBitmap(target) : target;
+  return { bitmap, covers: { width: box.clientWidth, height: box.clientHeight } };
+}
 
-        const iconElement = document.createElement('img');
-        iconElement.src = `~/output/${day.date}.png`; // Verwende das passende Bild aus dem output-Ordner
+function drawBitmap(canvas, bitmap) {
+  const size = fitSize(canvas, bitmap.width, bitmap.height);
+  const context = canvas.getContext('2d');
+  if (canvas.width !== size.width || canvas.height !== size.height) {
+    canvas.width = size.width;
+    canvas.height = size.height;
+  } else {
+    context.clearRect(0, 0, size.width, size.height);
+  }
+  context.drawImage(bitmap, 0, 0, size.width, size.height);
+}
 
-        const tempElement = document.createElement('p');
-        tempElement.innerText = `${day.min_temperature} / ${day.max_temperature}`;
+// Aktuelle Seite zeichnen; gerastert wird nur, was nicht (groß genug) im Cache liegt
+async function showPage(slot) {
+  if (!slot.pages) return;
+  const { generation, page } = slot;
+  const key = `${slot.number}:${slot.version}:${page}`;
+  let entry = cachedBitmap(key);
+  if (!entry || tooSmall(slot.canvas, entry)) {
+    let raster;
+    try {
+      raster = slot.rendered
+        ? await loadPageImage(slot.canvas, slot.rendered, page)
+        : await renderPdfPage(slot.canvas, slot.pdfDoc, page);
+    } catch (error) {
+      console.error(`Fehler beim Anzeigen der Seite ${page} für Slot ${slot.number}:`, error);
+      return;
+    }
+    if (generation !== slot.generation) {
+      if (raster.bitmap.close) raster.bitmap.close();
+      return;
+    }
+    entry = storeBitmap(key, raster);
+  }
+  if (slot.page === page) drawBitmap(slot.canvas, entry.bitmap);
+}
 
-        dayElement.appendChild(dateElement);
-        dayElement.appendChild(iconElement);
-        dayElement.appendChild(tempElement);
+// Seitenwechsel aller mehrseitigen Slots im selben Durchgang
+function nextPages() {
+  slots.forEach(slot => {
+    if (slot.pages < 2) return;
+    slot.page = slot.page % slot.pages + 1;
+    showPage(slot);
+  });
+}
 
-        forecastContainer.appendChild(dayElement);
-      });
-    })
-    .catch(error => console.error('Fehler beim Laden der Wettervorhersage:', error));
+function redrawPages() {
+  slots.forEach(showPage);
 }
 
-function updateWeatherData() {
-  loadWeatherData();
-  setInterval(loadWeatherData, 3600000); // Aktualisiert die Wetterdaten jede Stunde
+// Polling: Status (meist 304) und Slots, deren Rasterung noch lief
+function pollSlots() {
+  loadSlotStatus();
+  slots.forEach(slot => {
+    if (slot.renderPending) loadSlot(slot);
+  });
 }
 
-function loadMarqueeData() {
-  fetch('~/output/infos.json')
-    .then(response => response.json())
-    .then(data => {
-      const marquee1 = document.getElementById('marquee1').querySelector('p');
+function slotChanged(event) {
+  const data = event.data ? JSON.parse(event.data) : {};
+  if (data.rendered) {
+    // Gleiche Version, jetzt als Bilder verfügbar
+    slots.forEach(slot => {
+      if (slot.number === data.slot && slot.version) loadSlot(slot);
+    });
+  }
+  loadSlotStatus();
+}
 
-      // Beispiel: Zeige die ersten beiden Infos aus der JSON-Datei an
-      marquee1.textContent = data.infos;
-    })
-    .catch(error => console.error('Fehler beim Laden der Marquee-Daten:', error));
+// ===== Live-Updates =====
+// Server-Sent Events; Polling läuft nur ohne aktive Verbindung
+let liveUpdatesConnected = false;
+
+function connectLiveUpdates() {
+  if (!window.EventSource) return;
+  const source = new EventSource('/api/public/events');
+  source.addEventListener('open', () => { liveUpdatesConnected = true; });
+  source.addEventListener('error', () => { liveUpdatesConnected = false; });
+  source.addEventListener('slots', slotChanged);
+  source.addEventListener('info', () => loadInfoData());
+  source.addEventListener('weather', () => loadWeatherData());
+  source.addEventListener('resync', () => {
+    loadSlotStatus();
+    loadWeatherData();
+    loadInfoData();
+  });
 }
 
+function whenPolling(callback) {
+  return () => {
+    if (!liveUpdatesConnected) callback();
+  };
+}
 
-window.addEventListener('load', () => {
+// ===== Initialisierung =====
+document.addEventListener('DOMContentLoaded', function() {
+  updateClock();
+  loadSlotStatus();
   loadWeatherData();
-  updateWeatherData();
-  loadMarqueeData();
-  setInterval(loadMarqueeData, 60000); // Aktualisiert die Marquee-Daten jede Minute
-});
\ No newline at end of file
+  loadInfoData();
+  connectLiveUpdates();
+
+  schedule('pages', PAGE_INTERVAL, nextPages, PAGE_INTERVAL);
+  schedule('status', STATUS_INTERVAL, whenPolling(pollSlots), STATUS_INTERVAL);
+  schedule('info', INFO_INTERVAL, whenPolling(checkInfoData), INFO_INTERVAL);
+  schedule('weather', WEATHER_INTERVAL, whenPolling(loadWeatherData), WEATHER_INTERVAL);
+});
+
+// Nach dem Ende einer Größenänderung neu zeichnen (aus dem Cache, solange groß genug)
+window.addEventListener('resize', () => schedule('resize', 200, redrawPages));
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """App mit eigenem Zielverzeichnis, ohne Scheduler, Log-Dateien und Hintergrund-Pools."""
+    import API_backend
+
+    def factory(**config):
+        settings = {
+            'TARGET_DIR': str(tmp_path), 'LOG_TO_FILE': False, 'WEATHER_SCHEDULER': False,
+            'PDF_OPTIMIZE_WORKERS': 0, 'PDF_RENDER_WIDTHS': [], 'RATELIMIT_ENABLED': False
+        }
+        settings.update(config)
+        return API_backend.create_app(settings)
+    return factory
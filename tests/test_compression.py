@@ -0,0 +1,90 @@
+import gzip
+import os
+
+import pytest
+from flask import Response, request
+
+
+def static_path(app, name):
+    return os.path.join(app.static_folder, name)
+
+
+def get(client, path, encoding='gzip'):
+    response = client.get(path, headers={'Accept-Encoding': encoding} if encoding else {})
+    response.close()
+    return response
+
+
+def test_x_sendfile_static_text_is_compressed_without_offload_header(make_app):
+    app = make_app(FILE_DELIVERY_MODE='x-sendfile')
+    response = get(app.test_client(), '/static/css/styles.css')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'X-Sendfile' not in response.headers
+    with open(static_path(app, 'css/styles.css'), 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+
+def test_x_sendfile_static_304_drops_offload_header(make_app):
+    app = make_app(FILE_DELIVERY_MODE='x-sendfile')
+    client = app.test_client()
+    etag = get(client, '/static/css/styles.css').headers['ETag']
+    response = client.get('/static/css/styles.css', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    response.close()
+
+    assert response.status_code == 304
+    assert 'X-Sendfile' not in response.headers
+
+
+@pytest.mark.parametrize('path, encoding', [
+    ('/static/images/Logo_FF_Glienicke.jpg', 'gzip'),  # nicht komprimierbar
+    ('/static/css/styles.css', None)                     # Client ohne Accept-Encoding
+])
+def test_x_sendfile_untouched_when_not_compressed(make_app, path, encoding):
+    app = make_app(FILE_DELIVERY_MODE='x-sendfile')
+    response = get(app.test_client(), path, encoding)
+
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['X-Sendfile'] == static_path(app, path.split('/static/', 1)[1])
+
+
+def test_offloaded_dynamic_response_is_not_compressed(make_app):
+    app = make_app(FILE_DELIVERY_MODE='x-sendfile')
+
+    @app.route('/offloaded.json')
+    def offloaded():
+        return app.response_class(headers={'X-Sendfile': static_path(app, 'css/styles.css')},
+                                  mimetype='application/json')
+
+    response = get(app.test_client(), '/offloaded.json')
+    assert 'Content-Encoding' not in response.headers
+    assert 'X-Sendfile' in response.headers
+
+
+def test_view_revalidates_compressed_variant(make_app):
+    app = make_app()
+    rendered = []
+
+    @app.route('/versioned.json')
+    def versioned():
+        # Wie die öffentlichen Views: 304 beim eigenen ETag, ohne den Inhalt zu bauen
+        if request.if_none_match.contains('v1'):
+            response = Response(status=304)
+        else:
+            rendered.append(1)
+            response = Response('{"slots": []}' * 100, mimetype='application/json')
+        response.set_etag('v1')
+        return response
+
+    client = app.test_client()
+    etag = get(client, '/versioned.json').headers['ETag']
+    assert etag == '"v1-gzip"'
+
+    response = client.get('/versioned.json', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    response.close()
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(rendered) == 1
@@ -0,0 +1,37 @@
+import pytest
+
+from events import EventBroker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = EventBroker(str(tmp_path), poll_interval=0.01, buffer_size=4)
+    broker.last_id  # Watcher starten
+    return broker
+
+
+def test_events_after_last_id(broker):
+    start = broker.last_id
+    first = broker.publish('slots', {'slot': 1})
+    second = broker.publish('info')
+
+    events = broker.wait(start, timeout=2)
+    while events and events[-1]['id'] < second:
+        events += broker.wait(events[-1]['id'], timeout=2)
+    assert [event['id'] for event in events] == [first, second]
+    assert broker.wait(second, timeout=0.05) == []
+
+
+def test_buffer_too_short_is_a_gap(broker):
+    start = broker.last_id
+    for _ in range(6):
+        last = broker.publish('info')
+    while broker.wait(last - 1, timeout=2) == []:
+        pass
+    assert broker.events_since(start) is None
+
+
+def test_client_ahead_is_a_gap(broker):
+    # Last-Event-ID aus einem früheren Log (Zielverzeichnis neu angelegt)
+    assert broker.events_since(broker.last_id + 50) is None
+    assert broker.wait(broker.last_id + 50, timeout=1) is None
@@ -0,0 +1,59 @@
+import gzip
+
+import pytest
+
+
+def accel_app(make_app):
+    # static/ liegt hier nicht im temporären Zielverzeichnis: Wurzel auf das Projekt legen
+    app = make_app(FILE_DELIVERY_MODE='x-accel-redirect')
+    app.extensions['dashboard'].file_delivery.root = app.root_path
+    return app
+
+
+def get(client, path, **headers):
+    response = client.get(path, headers=headers)
+    response.get_data()  # Datei-Wrapper lesen, bevor er geschlossen wird
+    response.close()
+    return response
+
+
+def test_x_accel_redirect_static_binary(make_app):
+    response = get(accel_app(make_app).test_client(), '/static/images/Logo_FF_Glienicke.jpg')
+
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == '/protected/static/images/Logo_FF_Glienicke.jpg'
+    assert response.mimetype == 'image/jpeg'
+    assert response.data == b''
+
+
+def test_x_accel_redirect_static_304(make_app):
+    client = accel_app(make_app).test_client()
+    etag = get(client, '/static/images/Logo_FF_Glienicke.jpg').headers['ETag']
+
+    assert get(client, '/static/images/Logo_FF_Glienicke.jpg', **{'If-None-Match': etag}).status_code == 304
+
+
+def test_x_accel_redirect_static_text_compressed_in_python(make_app):
+    app = accel_app(make_app)
+    response = get(app.test_client(), '/static/css/styles.css', **{'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'X-Accel-Redirect' not in response.headers
+    with open(f'{app.static_folder}/css/styles.css', 'rb') as f:
+        assert gzip.decompress(response.data) == f.read()
+
+
+def test_x_accel_redirect_outside_root_falls_back_to_sendfile(make_app):
+    app = make_app(FILE_DELIVERY_MODE='x-accel-redirect')  # Wurzel: temporäres Zielverzeichnis
+    response = get(app.test_client(), '/static/images/Logo_FF_Glienicke.jpg')
+
+    assert response.status_code == 200
+    assert 'X-Accel-Redirect' not in response.headers
+    with open(f'{app.static_folder}/images/Logo_FF_Glienicke.jpg', 'rb') as f:
+        assert response.data == f.read()
+
+
+@pytest.mark.parametrize('mode', ['sendfile', 'python', 'x-sendfile', 'x-accel-redirect'])
+@pytest.mark.parametrize('path', ['/static/missing.css', '/static/../API_backend.py', '/static/css'])
+def test_static_not_found(make_app, mode, path):
+    assert get(make_app(FILE_DELIVERY_MODE=mode).test_client(), path).status_code == 404
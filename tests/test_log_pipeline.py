@@ -0,0 +1,64 @@
+import logging
+import os
+import threading
+
+import pytest
+
+from log_pipeline import LogPipeline
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+
+@pytest.fixture
+def pipeline():
+    handler = ListHandler()
+    pipeline = LogPipeline()
+    pipeline.configure([handler])
+    pipeline.records = handler.records
+    yield pipeline
+    pipeline.stop()
+    logging.getLogger().removeHandler(pipeline.handler)
+
+
+def in_child(check):
+    """Führt ``check()`` in einem echten Kindprozess aus; dessen Ergebnis ist der Exit-Code."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            code = 0 if check() else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+def listener_threads():
+    return [thread for thread in threading.enumerate() if '_monitor' in thread.name]
+
+
+def test_forked_child_starts_no_listener(pipeline):
+    def pool_child():
+        pipeline._after_fork()  # wie der at-fork-Hook im Kindprozess eines ProcessPoolExecutor
+        logging.getLogger('pdf_render').warning('im Pool')
+        return not pipeline.running and not listener_threads()
+
+    assert in_child(pool_child) == 0
+
+
+def test_worker_resumes_and_delivers_queued_records(pipeline):
+    def worker():
+        pipeline._after_fork()
+        logging.getLogger('dashboard').warning('vor dem ersten Request')
+        pipeline.resume()  # erster Request im Gunicorn-Worker
+        pipeline.stop()
+        return pipeline.records[-1:] == ['vor dem ersten Request']
+
+    assert in_child(worker) == 0
@@ -0,0 +1,69 @@
+import os
+
+from metrics import Metrics
+
+
+def forked(child):
+    """Führt ``child()`` in einem echten Kindprozess aus; liefert dessen pid."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            child()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    return pid
+
+
+def configured(tmp_path, cache):
+    m = Metrics()
+    m.register_collector(lambda: iter([('dashboard_snapshot_cache_hits_total', {}, cache['hits']),
+                                       ('dashboard_sse_subscribers', {}, cache['subscribers'])]))
+    m.configure(str(tmp_path), flush_interval=3600)
+    return m
+
+
+def series(m, name):
+    lines = [line for line in m.render().splitlines() if line.startswith(name + ' ')]
+    return float(lines[0].split()[1])
+
+
+def test_pool_child_writes_no_metrics_file(tmp_path):
+    cache = {'hits': 10, 'subscribers': 2}
+    m = configured(tmp_path, cache)
+
+    def pool_child():
+        m._after_fork()  # wie der at-fork-Hook im Kindprozess eines ProcessPoolExecutor
+        m.inc('dashboard_uploads_total', outcome='stored')
+        m.flush()
+
+    pid = forked(pool_child)
+    assert not os.path.exists(tmp_path / f'metrics-{pid}.json')
+    assert series(m, 'dashboard_snapshot_cache_hits_total') == 10
+    assert series(m, 'dashboard_sse_subscribers') == 2
+
+
+def test_worker_exports_only_its_own_collector_values(tmp_path):
+    cache = {'hits': 10, 'subscribers': 2}
+    m = configured(tmp_path, cache)
+
+    def worker():
+        m._after_fork()
+        m.resume()  # erster Request im Gunicorn-Worker
+        cache['hits'] += 3
+        cache['subscribers'] += 1
+        m.inc('dashboard_uploads_total', outcome='stored')
+        m.flush()
+
+    pid = forked(worker)
+    assert os.path.exists(tmp_path / f'metrics-{pid}.json')
+
+    # Elternprozess 10 + Worker 3; die Datei des beendeten Workers wandert ins Archiv
+    assert series(m, 'dashboard_snapshot_cache_hits_total') == 13
+    assert series(m, 'dashboard_sse_subscribers') == 2
+    assert 'dashboard_uploads_total{outcome="stored"} 1' in m.render()
+    assert not os.path.exists(tmp_path / f'metrics-{pid}.json')
+    assert os.path.exists(tmp_path / 'metrics-archive.json')
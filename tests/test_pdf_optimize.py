@@ -0,0 +1,95 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pdf_optimize
+from pdf_optimize import PdfOptimizer
+from snapshot_cache import hash_file
+
+# Gleichzeitig startbare Aufträge: 1 wie der Standard (PDF_OPTIMIZE_WORKERS=1)
+WORKERS = 1
+
+
+@pytest.fixture
+def optimizer(tmp_path, monkeypatch):
+    """Optimizer mit Thread-Pool und einer Fake-Optimierung, die bis release.set() blockiert."""
+    release = threading.Event()
+    started = []
+
+    def fake_optimize(source, version, target, dpi, quality, render_width):
+        started.append(version)
+        release.wait(5)
+        if hash_file(source) != version:
+            return None
+        shutil.copyfile(source, target)
+        with open(target, 'ab') as f:
+            f.write(b'%optimized\n')
+        size = os.path.getsize(source)
+        return {'backend': 'fake', 'original_bytes': size, 'optimized_bytes': size // 2,
+                'linearized_before': False, 'linearized': False,
+                'render_ms_before': None, 'render_ms_after': None, 'seconds': 0.0}
+
+    monkeypatch.setattr(pdf_optimize, 'optimize_pdf', fake_optimize)
+    monkeypatch.setattr(pdf_optimize, 'available_backend', lambda: 'fake')
+    finished = []
+    opt = PdfOptimizer(str(tmp_path), max_workers=WORKERS, on_finished=lambda slot, report: finished.append(report))
+    opt._executor = ThreadPoolExecutor(max_workers=WORKERS)
+    opt.release, opt.started, opt.finished = release, started, finished
+    yield opt
+    release.set()
+    opt._executor.shutdown(wait=True)
+
+
+def upload(optimizer, slot, content):
+    path = optimizer.slot_path(slot)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return hash_file(path)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_reupload_during_optimization_is_optimized(optimizer):
+    first = upload(optimizer, 1, b'%PDF-1.4 erste Fassung\n')
+    assert optimizer.submit(1, first)
+    wait_for(lambda: optimizer.started)
+
+    second = upload(optimizer, 1, b'%PDF-1.4 zweite Fassung\n')
+    assert optimizer.submit(1, second)
+    assert optimizer.is_pending(1)
+
+    optimizer.release.set()
+    wait_for(lambda: optimizer.finished)
+    wait_for(lambda: not optimizer.is_pending(1))
+
+    assert [report['original_version'] for report in optimizer.finished] == [second]
+    assert optimizer.report(1)['original_version'] == second
+    with open(optimizer.slot_path(1), 'rb') as f:
+        assert f.read().endswith(b'%optimized\n')
+
+
+def test_waiting_job_is_cancelled_for_newer_upload(optimizer):
+    # Slot 2 belegt den einzigen Worker, der Auftrag für Slot 1 wartet im Pool
+    assert optimizer.submit(2, upload(optimizer, 2, b'%PDF-1.4 anderer Slot\n'))
+    wait_for(lambda: optimizer.started)
+    first = upload(optimizer, 1, b'%PDF-1.4 erste Fassung\n')
+    assert optimizer.submit(1, first)
+    second = upload(optimizer, 1, b'%PDF-1.4 zweite Fassung\n')
+    assert optimizer.submit(1, second)
+
+    optimizer.release.set()
+    wait_for(lambda: len(optimizer.finished) == 2)
+    wait_for(lambda: not optimizer.is_pending(1))
+
+    assert first not in optimizer.started
+    assert optimizer.report(1)['original_version'] == second
+    assert not [name for name in os.listdir(optimizer.pdf_dir) if name.startswith('.optimize-')]
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import RESULT_KEY, RUNNING_KEY, RefreshJob, RefreshScheduler
+from shared_state import FileLock, SQLiteStore
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Zwei Scheduler wie in zwei Gunicorn-Workern: gemeinsamer Store, gemeinsame Sperrdateien."""
+    release = threading.Event()
+    calls = []
+
+    def task():
+        calls.append(threading.get_ident())
+        release.wait(5)
+
+    def scheduler():
+        return RefreshScheduler(task, interval=3600, is_enabled=lambda: True,
+                                store=SQLiteStore(str(tmp_path / 'shared_state.db')),
+                                leader=FileLock(str(tmp_path / 'weather_scheduler.leader')),
+                                run_lock=FileLock(str(tmp_path / 'weather_refresh.lock')))
+    first, second = scheduler(), scheduler()
+    first.release, first.calls = release, calls
+    yield first, second
+    release.set()
+    first.leader.release()
+    second.leader.release()
+
+
+def test_concurrent_triggers_share_one_job(workers):
+    first, second = workers
+    job = first.trigger('manual')
+    wait_for(lambda: first.calls)
+
+    assert second.trigger('manual').id == job.id
+    assert first.trigger('schedule').id == job.id
+    assert second.status()['running_job']['job_id'] == job.id
+
+    first.release.set()
+    wait_for(lambda: second.running_job() is None)
+    assert len(first.calls) == 1
+    assert second.get_job(job.id).state == 'succeeded'
+    assert second.status()['last_success'] == second.get_job(job.id).finished_at
+
+
+def test_only_running_job_writes_result(workers):
+    first, _ = workers
+    first.store.set(RUNNING_KEY, 'anderer-job')
+    first.store.set(RESULT_KEY, {'last_success': 1.0})
+
+    def failing():
+        raise RuntimeError('kaputt')
+    first.task = failing
+    first.run_lock = None
+    first._run(RefreshJob('manual'))
+
+    assert first.store.get(RESULT_KEY) == {'last_success': 1.0}
+    assert first.store.get(RUNNING_KEY) == 'anderer-job'
+
+
+def test_leader_election(workers):
+    first, second = workers
+    assert first.is_leader()
+    assert first.is_leader()  # erneuter Takt: Sperre bleibt beim selben Worker
+    assert not second.is_leader()
+
+    first.leader.release()
+    assert second.is_leader()
+    assert not first.is_leader()
+
+
+def test_status_does_not_take_leader_lock(workers):
+    first, second = workers
+    first.store.set('weather_refresh:last_attempt', time.time())
+    first._thread = second._thread = threading.current_thread()  # wie nach start()
+
+    status = second.status()
+    assert not status['leader']
+    assert status['next_run'] is None
+    assert not second.leader.held
+    assert first.is_leader()
+
+    assert first.status()['leader']
+    assert first.status()['next_run'] is not None
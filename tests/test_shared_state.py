@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+from limits import parse
+from limits.strategies import FixedWindowRateLimiter
+
+from shared_state import FileLock, MemoryStore, SQLiteLimiterStorage, SQLiteStore
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def stores(request, tmp_path):
+    """Zwei Sichten auf denselben Store (SQLite: zwei Verbindungen wie zwei Worker)."""
+    if request.param == 'memory':
+        store = MemoryStore()
+        return store, store
+    path = str(tmp_path / 'shared_state.db')
+    return SQLiteStore(path), SQLiteStore(path)
+
+
+def test_add_sets_only_missing_key(stores):
+    first, second = stores
+    assert first.add('running', 'a', ttl=60)
+    assert not second.add('running', 'b', ttl=60)
+    assert second.get('running') == 'a'
+
+    first.delete('running')
+    assert second.add('running', 'b', ttl=60)
+    assert first.get('running') == 'b'
+
+
+def test_add_replaces_expired_key(stores):
+    first, second = stores
+    assert first.add('running', 'a', ttl=0.05)
+    time.sleep(0.1)
+    assert second.add('running', 'b', ttl=60)
+    assert first.get('running') == 'b'
+
+
+def test_add_without_ttl_never_expires(stores):
+    first, second = stores
+    first.set('running', 'a')
+    assert not second.add('running', 'b', ttl=60)
+
+
+def test_file_lock_excludes_other_threads(tmp_path):
+    lock = FileLock(str(tmp_path / 'weather_refresh.lock'))
+    assert lock.acquire()
+    assert lock.acquire()  # derselbe Thread hält sie bereits
+
+    result = []
+    other = threading.Thread(target=lambda: result.append(lock.acquire(blocking=False)))
+    other.start()
+    other.join()
+    assert result == [False]
+
+    # Freigeben darf nur der haltende Thread
+    other = threading.Thread(target=lock.release)
+    other.start()
+    other.join()
+    assert lock.held
+    assert not FileLock(lock.path).acquire(blocking=False)
+
+    lock.release()
+    assert not lock.held
+
+
+def test_file_lock_serializes_threads(tmp_path):
+    lock = FileLock(str(tmp_path / 'weather_refresh.lock'))
+    inside = []
+    overlaps = []
+
+    def run():
+        for _ in range(20):
+            with lock:
+                inside.append(1)
+                overlaps.append(len(inside))
+                time.sleep(0.001)
+                inside.pop()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(overlaps) == 1
+    assert len(overlaps) == 80
+
+
+def test_limiter_storage_counts_across_workers(tmp_path):
+    uri = f'sqlite://{tmp_path}/shared_state.db'
+    first = FixedWindowRateLimiter(SQLiteLimiterStorage(uri))
+    second = FixedWindowRateLimiter(SQLiteLimiterStorage(uri))
+    limit = parse('3 per minute')
+
+    assert first.hit(limit, '127.0.0.1')
+    assert second.hit(limit, '127.0.0.1')
+    assert first.hit(limit, '127.0.0.1')
+    assert not second.hit(limit, '127.0.0.1')
+    assert second.get_window_stats(limit, '127.0.0.1')[1] == 0
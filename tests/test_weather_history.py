@@ -0,0 +1,62 @@
+import sqlite3
+
+from weather_history import AUTO_VACUUM_INCREMENTAL, DAY, WeatherHistory
+
+HOUR = 3600
+START = 1_780_000_000 // DAY * DAY
+
+
+def observation(ts):
+    return {'dt': ts, 'timezone': 7200, 'main': {'temp': 12.3, 'humidity': 60, 'pressure': 1012},
+            'wind': {'speed': 3.4, 'gust': 7.8}, 'clouds': {'all': 40}, 'rain': {'1h': 0.2}}
+
+
+def fill(store, days):
+    for hour in range(days * 24):
+        ts = START + hour * HOUR
+        store.record('berlin', 'Berlin', observation(ts), now=ts)
+
+
+def auto_vacuum(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_new_file_uses_incremental_auto_vacuum(tmp_path):
+    path = str(tmp_path / 'history.db')
+    WeatherHistory(path)
+    assert auto_vacuum(path) == AUTO_VACUUM_INCREMENTAL
+
+
+def test_existing_file_is_converted_once(tmp_path):
+    path = str(tmp_path / 'history.db')
+    # Wie vor der Korrektur angelegt: WAL und Tabellen vor dem Pragma
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('CREATE TABLE legacy (x)')
+    conn.close()
+    assert auto_vacuum(path) == 0
+
+    store = WeatherHistory(path)
+    fill(store, 2)
+    assert auto_vacuum(path) == AUTO_VACUUM_INCREMENTAL
+    assert store.stats()['observations'] == 48
+
+
+def test_compaction_returns_pages_to_the_file_system(tmp_path):
+    store = WeatherHistory(str(tmp_path / 'history.db'), raw_days=10 ** 6, retention_days=10 ** 6)
+    fill(store, 180)
+    before = store.stats()['file_bytes']
+
+    # Ein halbes Jahr Rohdaten auf einmal verdichten: viele Seiten werden frei
+    store.raw_days, store.retention_days = 2, 5
+    store.compact(now=START + 180 * DAY)
+
+    stats = store.stats()
+    assert stats['auto_vacuum'] == AUTO_VACUUM_INCREMENTAL
+    assert stats['file_bytes'] == stats['bytes']  # keine freien Seiten mehr in der Datei
+    assert stats['file_bytes'] < before / 2
@@ -0,0 +1,299 @@
+"""
+Nachrichten für den Lauftext (output/ticker.db, SQLite im WAL-Modus).
+
+Jede Änderung (anlegen, ändern, löschen) wird an die Tabelle ``history``
+angehängt; deren fortlaufende Nummer ist die Version des Stores und der
+Nachricht. ``messages`` hält den aktuellen Stand jeder Nachricht, gelöschte
+bleiben als Grabstein stehen, damit ``changes(since)`` auch Löschungen
+meldet. Nachrichten haben Priorität sowie optional Start und Ende; aktiv ist,
+was gerade im Zeitfenster liegt. ``next_change_at`` nennt den nächsten Start
+oder das nächste Ende, damit Bildschirme genau dann neu laden.
+
+Gelöschte und abgelaufene Nachrichten werden nach TICKER_RETENTION_DAYS
+entfernt; ``since`` älter als die dabei entfernten Versionen liefert
+``resync``. Der Lauftext aus /update_infos ist die Nachricht mit dem
+Schlüssel ``lauftext`` (beim ersten Start aus output/infos.json übernommen).
+"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, '
+    'text TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0, starts_at REAL, ends_at REAL, '
+    'created_at REAL NOT NULL, updated_at REAL NOT NULL, version INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)',
+    'CREATE INDEX IF NOT EXISTS messages_version ON messages (version)',
+    'CREATE TABLE IF NOT EXISTS history (version INTEGER PRIMARY KEY AUTOINCREMENT, message_id INTEGER NOT NULL, '
+    'op TEXT NOT NULL, text TEXT, priority INTEGER, starts_at REAL, ends_at REAL, at REAL NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+)
+
+COLUMNS = ('id', 'key', 'text', 'priority', 'starts_at', 'ends_at', 'created_at', 'updated_at', 'version', 'deleted')
+DEFAULT_KEY = 'lauftext'
+SEPARATOR = '   +++   '
+MAX_TEXT_LENGTH = 1000
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Unix-Zeit oder ISO-8601 (ohne Zeitzone = lokale Zeit); leer = offen."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f'Ungültige Zeitangabe: {value!r}')
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f'Ungültige Zeitangabe: {value!r}') from None
+
+
+def is_active(message: Dict[str, Any], now: float) -> bool:
+    return (message['starts_at'] is None or message['starts_at'] <= now) and \
+        (message['ends_at'] is None or now < message['ends_at'])
+
+
+class TickerStore:
+    def __init__(self, path: str, retention_days: float = 30, timeout: float = 5.0) -> None:
+        self.path = path
+        self.retention = retention_days * 86400
+        self.timeout = timeout
+        self._local = threading.local()
+        # Nicht gelöschte Nachrichten zur zuletzt gesehenen Version (alle Threads)
+        self._cache: Tuple[int, List[Dict[str, Any]]] = (-1, [])
+        self._cache_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Eine Verbindung pro Thread und Prozess (nach fork nicht wiederverwenden)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ----- Schreiben -----
+
+    def _change(self, conn: sqlite3.Connection, message_id: int, op: str, now: float) -> int:
+        """Hängt die Änderung an die Historie an und vergibt die neue Version."""
+        row = conn.execute('SELECT text, priority, starts_at, ends_at FROM messages WHERE id = ?',
+                           (message_id,)).fetchone()
+        version = conn.execute(
+            'INSERT INTO history (message_id, op, text, priority, starts_at, ends_at, at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (message_id, op) + tuple(row) + (now,)
+        ).lastrowid
+        conn.execute('UPDATE messages SET version = ?, updated_at = ? WHERE id = ?', (version, now, message_id))
+        return version
+
+    def _transaction(self, work) -> Dict[str, Any]:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            message_id = work(conn, time.time())
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return self.get(message_id)
+
+    @staticmethod
+    def _validate(text: str, starts_at: Optional[float], ends_at: Optional[float]) -> None:
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError('Text darf nicht leer sein')
+        if len(text) > MAX_TEXT_LENGTH:
+            raise ValueError(f'Text zu lang (max {MAX_TEXT_LENGTH} Zeichen)')
+        if starts_at is not None and ends_at is not None and ends_at <= starts_at:
+            raise ValueError('Ende muss nach dem Start liegen')
+
+    def create(self, text: str, priority: int = 0, starts_at: Any = None, ends_at: Any = None) -> Dict[str, Any]:
+        starts_at, ends_at = parse_time(starts_at), parse_time(ends_at)
+        self._validate(text, starts_at, ends_at)
+
+        def work(conn: sqlite3.Connection, now: float) -> int:
+            message_id = conn.execute(
+                'INSERT INTO messages (text, priority, starts_at, ends_at, created_at, updated_at, version) '
+                'VALUES (?, ?, ?, ?, ?, ?, 0)', (text.strip(), int(priority), starts_at, ends_at, now, now)
+            ).lastrowid
+            self._change(conn, message_id, 'create', now)
+            self._prune(conn, now)
+            return message_id
+
+        return self._transaction(work)
+
+    def update(self, message_id: int, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Ändert text/priority/starts_at/ends_at; None, wenn es die Nachricht nicht (mehr) gibt."""
+        current = self.get(message_id)
+        if current is None or current['deleted']:
+            return None
+        values = {key: current[key] for key in ('text', 'priority', 'starts_at', 'ends_at')}
+        for key in ('starts_at', 'ends_at'):
+            if key in fields:
+                values[key] = parse_time(fields[key])
+        if 'text' in fields:
+            values['text'] = fields['text']
+        if 'priority' in fields:
+            values['priority'] = int(fields['priority'])
+        self._validate(values['text'], values['starts_at'], values['ends_at'])
+
+        def work(conn: sqlite3.Connection, now: float) -> int:
+            conn.execute('UPDATE messages SET text = ?, priority = ?, starts_at = ?, ends_at = ? WHERE id = ?',
+                         (values['text'].strip(), values['priority'], values['starts_at'], values['ends_at'], message_id))
+            self._change(conn, message_id, 'update', now)
+            return message_id
+
+        return self._transaction(work)
+
+    def delete(self, message_id: int) -> bool:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            found = conn.execute('UPDATE messages SET deleted = 1 WHERE id = ? AND deleted = 0',
+                                 (message_id,)).rowcount > 0
+            if found:
+                now = time.time()
+                self._change(conn, message_id, 'delete', now)
+                self._prune(conn, now)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return found
+
+    def set_text(self, text: str, key: str = DEFAULT_KEY) -> Optional[Dict[str, Any]]:
+        """Dauerhafte Nachricht unter festem Schlüssel setzen (Lauftext aus /update_infos); leer = löschen."""
+        if isinstance(text, str) and not text.strip():
+            row = self._conn().execute('SELECT id FROM messages WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                self.delete(row[0])
+            return None
+        self._validate(text, None, None)
+
+        def work(conn: sqlite3.Connection, now: float) -> int:
+            row = conn.execute('SELECT id FROM messages WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                message_id = conn.execute(
+                    'INSERT INTO messages (key, text, created_at, updated_at, version) VALUES (?, ?, ?, ?, 0)',
+                    (key, text.strip(), now, now)
+                ).lastrowid
+                op = 'create'
+            else:
+                message_id = row[0]
+                conn.execute('UPDATE messages SET text = ?, starts_at = NULL, ends_at = NULL, deleted = 0 WHERE id = ?',
+                             (text.strip(), message_id))
+                op = 'update'
+            self._change(conn, message_id, op, now)
+            return message_id
+
+        return self._transaction(work)
+
+    def import_legacy(self, infos_path: str) -> bool:
+        """Übernimmt output/infos.json einmalig als Lauftext."""
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone() is not None:
+            return False
+        imported = False
+        try:
+            with open(infos_path, 'r', encoding='utf-8') as f:
+                text = json.load(f).get('infos')
+            if isinstance(text, str) and text.strip() and \
+                    conn.execute('SELECT 1 FROM messages WHERE key = ?', (DEFAULT_KEY,)).fetchone() is None:
+                self.set_text(text[:MAX_TEXT_LENGTH])
+                imported = True
+        except (OSError, ValueError, AttributeError):
+            pass
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', 1)")
+        return imported
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        """Entfernt gelöschte/abgelaufene Nachrichten und alte Historie nach der Aufbewahrungszeit."""
+        cutoff = now - self.retention
+        row = conn.execute(
+            'SELECT MAX(version) FROM messages WHERE (deleted = 1 AND updated_at < ?) OR ends_at < ?', (cutoff, cutoff)
+        ).fetchone()
+        if row[0] is None:
+            return
+        conn.execute('DELETE FROM messages WHERE (deleted = 1 AND updated_at < ?) OR ends_at < ?', (cutoff, cutoff))
+        conn.execute('DELETE FROM history WHERE at < ?', (cutoff,))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('pruned_version', ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (row[0],))
+
+    # ----- Lesen -----
+
+    @property
+    def version(self) -> int:
+        row = self._conn().execute("SELECT seq FROM sqlite_sequence WHERE name = 'history'").fetchone()
+        return row[0] if row is not None else 0
+
+    def get(self, message_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(f"SELECT {', '.join(COLUMNS)} FROM messages WHERE id = ?", (message_id,)).fetchone()
+        return _message(row) if row is not None else None
+
+    def messages(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """(Version, nicht gelöschte Nachrichten); neu gelesen wird nur bei neuer Version."""
+        version = self.version
+        with self._cache_lock:
+            if self._cache[0] == version:
+                return self._cache
+        rows = self._conn().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM messages WHERE deleted = 0 ORDER BY priority DESC, starts_at, id"
+        ).fetchall()
+        cache = (version, [_message(row) for row in rows])
+        with self._cache_lock:
+            self._cache = cache
+        return cache
+
+    def active(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Aktuell sichtbare Nachrichten samt Zeitpunkt der nächsten geplanten Änderung."""
+        now = time.time() if now is None else now
+        version, messages = self.messages()
+        active = [m for m in messages if is_active(m, now)]
+        upcoming = [t for m in messages for t in (m['starts_at'], m['ends_at']) if t is not None and t > now]
+        return {
+            'version': version,
+            'messages': active,
+            'next_change_at': min(upcoming) if upcoming else None
+        }
+
+    def changes(self, since: int) -> Dict[str, Any]:
+        """Änderungen nach Version ``since`` (auch gelöschte); ``resync``, wenn dazwischen aufgeräumt wurde."""
+        conn = self._conn()
+        version = self.version
+        pruned = conn.execute("SELECT value FROM meta WHERE key = 'pruned_version'").fetchone()
+        if since > version or (pruned is not None and since < pruned[0]):
+            _, messages = self.messages()
+            return {'version': version, 'resync': True, 'changes': messages}
+        if since == version:
+            return {'version': version, 'changes': []}
+        rows = conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM messages WHERE version > ? ORDER BY version", (since,)
+        ).fetchall()
+        return {'version': version, 'changes': [_message(row) for row in rows]}
+
+    def history(self, limit: int = 100) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            'SELECT version, message_id, op, text, priority, starts_at, ends_at, at FROM history '
+            'ORDER BY version DESC LIMIT ?', (limit,)
+        ).fetchall()
+        keys = ('version', 'message_id', 'op', 'text', 'priority', 'starts_at', 'ends_at', 'at')
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def _message(row: tuple) -> Dict[str, Any]:
+    message = dict(zip(COLUMNS, row))
+    message['deleted'] = bool(message['deleted'])
+    return message
@@ -0,0 +1,216 @@
+"""
+HTTP-Client für die OpenWeatherMap API.
+
+- ein gepoolter requests.Session (Keep-Alive statt neuer TCP/TLS-Verbindung)
+- Connect-/Read-Timeouts, damit kein Gunicorn-Worker ewig hängt
+- Wiederholungen mit exponentiellem Backoff und Jitter (Netzwerkfehler, 429, 5xx)
+- Circuit Breaker: nach mehreren Fehlschlägen in Folge wird die API für eine
+  Weile gar nicht mehr angefragt
+- Aktuelles Wetter und Vorhersage (auch mehrerer Orte) werden mit begrenzter
+  Parallelität abgerufen, frische Antworten kommen aus einem TTL-Cache pro Ort
+  (über shared_state gemeinsam für alle Worker)
+
+Der Transport ist austauschbar (alles mit ``get(url, params=..., timeout=...)``)
+und die Basis-URL über OPENWEATHER_BASE_URL konfigurierbar, so dass Tests und
+Benchmarks gegen einen lokalen Stub-Server laufen können.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+from shared_state import MemoryStore, get_shared_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://api.openweathermap.org/data/2.5'
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 300.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        return self.state != 'open'
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                # Auch ein fehlgeschlagener Versuch im half-open Zustand öffnet erneut
+                self.opened_at = time.monotonic()
+
+
+class WeatherClient:
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 retries: int = 2, backoff: float = 0.5,
+                 transport: Optional[Any] = None, breaker: Optional[CircuitBreaker] = None,
+                 lang: str = 'de', units: str = 'metric',
+                 max_concurrency: int = 2, cache_ttl: float = 0.0, cache: Optional[Any] = None) -> None:
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv('OPENWEATHER_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.lang = lang
+        self.units = units
+        self.transport = transport or self._create_session(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='weather')
+        # TTL-Cache pro (Endpoint, Ort); mit SQLiteStore gemeinsam für alle Worker
+        self.cache_ttl = cache_ttl
+        self.cache_hits = 0
+        self.cache = cache if cache is not None else MemoryStore()
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(pool_size, 2))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _sleep_backoff(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), 30.0)
+        else:
+            # "Full Jitter": verteilt Wiederholungen mehrerer Clients zeitlich
+            delay = random.uniform(0, self.backoff * (2 ** attempt))
+        time.sleep(delay)
+
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not self.breaker.allow():
+            logger.warning(f"OpenWeatherMap Circuit Breaker offen, überspringe /{endpoint}")
+            metrics.inc('dashboard_weather_fetch_total', endpoint=endpoint, outcome='circuit_open')
+            return None
+        started = time.perf_counter()
+        data, outcome = self._request(endpoint, params)
+        metrics.observe('dashboard_weather_fetch_duration_seconds', time.perf_counter() - started, endpoint=endpoint)
+        metrics.inc('dashboard_weather_fetch_total', endpoint=endpoint, outcome=outcome)
+        return data
+
+    def _request(self, endpoint: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Abruf mit Wiederholungen; liefert Daten und Ergebnis für die Metriken."""
+        query = dict(params, appid=self.api_key, units=self.units, lang=self.lang)
+        url = f"{self.base_url}/{endpoint}"
+        last_error: Optional[str] = None
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                response = self.transport.get(url, params=query, timeout=self.timeout)
+                if response.status_code in RETRY_STATUS:
+                    retry_after = response.headers.get('Retry-After')
+                    last_error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.breaker.record_success()
+                    return data, 'ok' if attempt == 0 else 'ok_after_retry'
+            except requests.exceptions.HTTPError as err:
+                # 4xx (z.B. falscher API-Key): Wiederholen bringt nichts
+                logger.error(f"OpenWeatherMap /{endpoint}: {err}")
+                self.breaker.record_failure()
+                return None, 'client_error'
+            except (requests.exceptions.RequestException, ValueError) as err:
+                last_error = str(err)
+
+            if attempt < self.retries:
+                self._sleep_backoff(attempt, retry_after)
+
+        logger.error(f"OpenWeatherMap /{endpoint} fehlgeschlagen: {last_error}")
+        self.breaker.record_failure()
+        return None, 'error'
+
+    @staticmethod
+    def location_params(location: str) -> Dict[str, Any]:
+        """Ort als Name ("Glienicke,DE") oder als Koordinaten ("52.63,13.32")."""
+        parts = [p.strip() for p in location.split(',')]
+        if len(parts) == 2:
+            try:
+                return {'lat': float(parts[0]), 'lon': float(parts[1])}
+            except ValueError:
+                pass
+        return {'q': location}
+
+    def _cached_get(self, endpoint: str, location: str) -> Optional[Dict[str, Any]]:
+        key = f'owm:{endpoint}:{location}'
+        if self.cache_ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                metrics.inc('dashboard_weather_cache_hits_total', endpoint=endpoint)
+                return cached
+        data = self._get(endpoint, self.location_params(location))
+        if data is not None and self.cache_ttl > 0:
+            self.cache.set(key, data, ttl=self.cache_ttl)
+        return data
+
+    def current(self, location: str) -> Optional[Dict[str, Any]]:
+        return self._cached_get('weather', location)
+
+    def forecast(self, location: str) -> Optional[Dict[str, Any]]:
+        return self._cached_get('forecast', location)
+
+    def fetch_all(self, location: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Aktuelles Wetter und Vorhersage parallel abrufen."""
+        return self.fetch_many([location])[location]
+
+    def fetch_many(self, locations: List[str]) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """
+        Alle Orte gebündelt abrufen. Die Parallelität ist durch den Thread-Pool
+        (max_concurrency) begrenzt, frische Einträge kommen aus dem TTL-Cache.
+        """
+        futures = {
+            location: (self._executor.submit(self.current, location), self._executor.submit(self.forecast, location))
+            for location in locations
+        }
+        return {location: (current.result(), forecast.result()) for location, (current, forecast) in futures.items()}
+
+
+_clients: Dict[str, WeatherClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> WeatherClient:
+    """Ein Client (und damit ein Verbindungs-Pool) pro API-Key und Prozess."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = WeatherClient(
+                api_key,
+                connect_timeout=float(os.getenv('OPENWEATHER_CONNECT_TIMEOUT', 3.05)),
+                read_timeout=float(os.getenv('OPENWEATHER_READ_TIMEOUT', 10)),
+                retries=int(os.getenv('OPENWEATHER_RETRIES', 2)),
+                max_concurrency=int(os.getenv('OPENWEATHER_MAX_CONCURRENCY', 4)),
+                cache_ttl=float(os.getenv('OPENWEATHER_CACHE_TTL', 600)),
+                cache=get_shared_store()
+            )
+            _clients[api_key] = client
+        return client
@@ -0,0 +1,410 @@
+"""
+Verlauf von Wetter und Vorhersage (output/weather_history.db, SQLite im WAL-Modus).
+
+wetterdaten.main() hängt jede abgerufene Beobachtung (/weather) und jede
+Vorhersage (/forecast, 3-Stunden-Werte) an. Messwerte liegen als skalierte
+Ganzzahlen vor (z.B. Temperatur in 1/10 °C), die Tabellen haben keine rowid
+und den Primärschlüssel (Ort, Zeit); eine Beobachtung belegt so rund 30
+Bytes. Eine aus dem Cache wiederholte Beobachtung (gleiches ``dt``) oder eine
+unveränderte Vorhersage wird nicht erneut gespeichert.
+
+Aufräumen (höchstens einmal täglich beim Schreiben, danach incremental_vacuum):
+
+- Beobachtungen älter als ``raw_days`` werden zu Tageswerten verdichtet
+  (min/max/Summe/Anzahl je Messwert, Tage in Ortszeit)
+- von älteren Vorhersagen bleibt je Zielzeit nur die letzte Ausgabe pro
+  Vorlauf-Tag (am Tag selbst, einen Tag vorher, ...)
+- alles älter als ``retention_days`` wird gelöscht
+
+``series`` liefert einen Zeitraum in Buckets (min/max/avg, Buckets ab
+Mitternacht Ortszeit) als Spalten-Arrays, ``compare`` stellt Vorhersagen mit
+festem Vorlauf den Beobachtungen gegenüber.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# PRAGMA auto_vacuum: 2 = INCREMENTAL (freie Seiten per incremental_vacuum zurückgeben)
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Messwert -> Faktor der gespeicherten Ganzzahl
+SCALE = {
+    'temperature': 10,
+    'humidity': 1,
+    'pressure': 1,
+    'wind_speed': 10,
+    'wind_gust': 10,
+    'precipitation': 100,
+    'clouds': 1,
+    'pop': 100
+}
+UNITS = {
+    'temperature': '°C',
+    'humidity': '%',
+    'pressure': 'hPa',
+    'wind_speed': 'm/s',
+    'wind_gust': 'm/s',
+    'precipitation': 'mm/h',
+    'clouds': '%',
+    'pop': '0..1'
+}
+OBSERVED = ('temperature', 'humidity', 'pressure', 'wind_speed', 'wind_gust', 'precipitation', 'clouds')
+FORECAST = OBSERVED + ('pop',)
+SOURCES = ('observed', 'forecast')
+BUCKETS = (600, 1800, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400)
+DAY = 86400
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS locations (id INTEGER PRIMARY KEY, slug TEXT UNIQUE NOT NULL, '
+    'name TEXT NOT NULL, tz_offset INTEGER NOT NULL DEFAULT 0)',
+    f"CREATE TABLE IF NOT EXISTS observations (location INTEGER NOT NULL, ts INTEGER NOT NULL, "
+    f"{', '.join(f'{m} INTEGER' for m in OBSERVED)}, PRIMARY KEY (location, ts)) WITHOUT ROWID",
+    # day: Beginn des Tages (Mitternacht Ortszeit) als Unix-Zeit
+    f"CREATE TABLE IF NOT EXISTS observations_daily (location INTEGER NOT NULL, day INTEGER NOT NULL, "
+    f"{', '.join(f'{m}_min INTEGER, {m}_max INTEGER, {m}_sum INTEGER, {m}_n INTEGER' for m in OBSERVED)}, "
+    f"PRIMARY KEY (location, day)) WITHOUT ROWID",
+    f"CREATE TABLE IF NOT EXISTS forecasts (location INTEGER NOT NULL, ts INTEGER NOT NULL, issued INTEGER NOT NULL, "
+    f"{', '.join(f'{m} INTEGER' for m in FORECAST)}, PRIMARY KEY (location, ts, issued)) WITHOUT ROWID",
+    'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)'
+)
+
+
+def _scaled(values: Dict[str, Any], names: Sequence[str]) -> Tuple[Optional[int], ...]:
+    return tuple(round(float(values[m]) * SCALE[m]) if values.get(m) is not None else None for m in names)
+
+
+def _precipitation(entry: Dict[str, Any]) -> float:
+    """Regen plus Schnee in mm/h (/weather meldet 1h, /forecast 3h)."""
+    total = 0.0
+    for key in ('rain', 'snow'):
+        amounts = entry.get(key) or {}
+        if '1h' in amounts:
+            total += amounts['1h']
+        elif '3h' in amounts:
+            total += amounts['3h'] / 3
+    return total
+
+
+def observation_values(data: Dict[str, Any]) -> Dict[str, Any]:
+    main, wind = data['main'], data.get('wind', {})
+    return {
+        'temperature': main.get('temp'),
+        'humidity': main.get('humidity'),
+        'pressure': main.get('pressure'),
+        'wind_speed': wind.get('speed'),
+        'wind_gust': wind.get('gust'),
+        'precipitation': _precipitation(data),
+        'clouds': data.get('clouds', {}).get('all')
+    }
+
+
+def forecast_values(entry: Dict[str, Any]) -> Dict[str, Any]:
+    values = observation_values(entry)
+    values['pop'] = entry.get('pop')
+    return values
+
+
+def choose_bucket(span: float, points: int) -> int:
+    """Kleinste übliche Bucket-Größe, mit der ``span`` Sekunden in ``points`` Punkte passen."""
+    for bucket in BUCKETS:
+        if span / bucket <= points:
+            return bucket
+    return -(-int(span) // points // DAY) * DAY
+
+
+class WeatherHistory:
+    def __init__(self, path: str, raw_days: float = 30, retention_days: float = 730, timeout: float = 5.0) -> None:
+        self.path = path
+        self.raw_days = raw_days
+        self.retention_days = retention_days
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            # Datei ohne auto_vacuum (vor dieser Einstellung angelegt): einmalig umbauen
+            conn.execute('VACUUM')
+        for statement in SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Eine Verbindung pro Thread und Prozess (nach fork nicht wiederverwenden)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            # Vor WAL und der ersten Tabelle, sonst bleibt eine neue Datei bei auto_vacuum=0;
+            # bei bestehenden Dateien wirkt es erst mit VACUUM (siehe __init__)
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ----- Schreiben -----
+
+    def _location(self, conn: sqlite3.Connection, slug: str, name: str, tz_offset: int) -> int:
+        conn.execute('INSERT INTO locations (slug, name, tz_offset) VALUES (?, ?, ?) '
+                     'ON CONFLICT(slug) DO UPDATE SET name = excluded.name, tz_offset = excluded.tz_offset',
+                     (slug, name, tz_offset))
+        return conn.execute('SELECT id FROM locations WHERE slug = ?', (slug,)).fetchone()[0]
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection) -> None:
+        conn.execute("INSERT INTO meta (key, value) VALUES ('version', 1) "
+                     "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+
+    def record(self, slug: str, name: str, weather: Optional[Dict[str, Any]] = None,
+               forecast: Optional[Dict[str, Any]] = None, now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Speichert Beobachtung (Antwort von /weather) und Vorhersage (/forecast)
+        eines Ortes; liefert die Zahl neu gespeicherter Zeilen.
+        """
+        now = time.time() if now is None else now
+        tz_offset = int((weather or {}).get('timezone', (forecast or {}).get('city', {}).get('timezone', 0)))
+        stored = {'observations': 0, 'forecasts': 0}
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            location = self._location(conn, slug, name, tz_offset)
+            if weather is not None:
+                stored['observations'] = conn.execute(
+                    f"INSERT OR IGNORE INTO observations (location, ts, {', '.join(OBSERVED)}) "
+                    f"VALUES (?, ?{', ?' * len(OBSERVED)})",
+                    (location, int(weather['dt'])) + _scaled(observation_values(weather), OBSERVED)
+                ).rowcount
+            if forecast is not None:
+                stored['forecasts'] = self._record_forecast(conn, location, forecast, int(now))
+            if stored['observations'] or stored['forecasts']:
+                self._bump(conn)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        if self._compaction_due(now):
+            self.compact(now)
+        return stored
+
+    def _record_forecast(self, conn: sqlite3.Connection, location: int, data: Dict[str, Any], issued: int) -> int:
+        rows = {int(entry['dt']): _scaled(forecast_values(entry), FORECAST) for entry in data['list']}
+        last = conn.execute('SELECT value FROM meta WHERE key = ?', (f'issued:{location}',)).fetchone()
+        if last is not None:
+            previous = {row[0]: tuple(row[1:]) for row in conn.execute(
+                f"SELECT ts, {', '.join(FORECAST)} FROM forecasts WHERE location = ? AND issued = ?",
+                (location, last[0])
+            )}
+            if all(previous.get(ts) == values for ts, values in rows.items()):
+                return 0  # unverändert (z.B. aus dem TTL-Cache des Clients)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO forecasts (location, ts, issued, {', '.join(FORECAST)}) "
+            f"VALUES (?, ?, ?{', ?' * len(FORECAST)})",
+            [(location, ts, issued) + values for ts, values in rows.items()]
+        )
+        conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (f'issued:{location}', issued))
+        return len(rows)
+
+    def _compaction_due(self, now: float) -> bool:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'compacted_at'").fetchone()
+        return row is None or now - row[0] >= DAY
+
+    def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Verdichtet alte Beobachtungen und Vorhersagen und löscht, was älter als die Aufbewahrung ist."""
+        now = time.time() if now is None else now
+        raw_cutoff = int(now - self.raw_days * DAY)
+        cutoff = int(now - self.retention_days * DAY)
+        removed = {'observations': 0, 'forecasts': 0, 'days': 0}
+        merge = ', '.join(
+            f'{m}_min = COALESCE(MIN({m}_min, excluded.{m}_min), {m}_min, excluded.{m}_min), '
+            f'{m}_max = COALESCE(MAX({m}_max, excluded.{m}_max), {m}_max, excluded.{m}_max), '
+            f'{m}_sum = COALESCE({m}_sum, 0) + COALESCE(excluded.{m}_sum, 0), '
+            f'{m}_n = {m}_n + excluded.{m}_n'
+            for m in OBSERVED
+        )
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for location, tz_offset in conn.execute('SELECT id, tz_offset FROM locations').fetchall():
+                # Nur ganze Tage (Ortszeit) verdichten
+                day_cutoff = (raw_cutoff + tz_offset) // DAY * DAY - tz_offset
+                conn.execute(
+                    f"INSERT INTO observations_daily (location, day, "
+                    f"{', '.join(f'{m}_min, {m}_max, {m}_sum, {m}_n' for m in OBSERVED)}) "
+                    f"SELECT location, (ts + ?) / {DAY} * {DAY} - ?, "
+                    f"{', '.join(f'MIN({m}), MAX({m}), SUM({m}), COUNT({m})' for m in OBSERVED)} "
+                    f"FROM observations WHERE location = ? AND ts < ? GROUP BY 2 "
+                    f"ON CONFLICT(location, day) DO UPDATE SET {merge}",
+                    (tz_offset, tz_offset, location, day_cutoff)
+                )
+                removed['observations'] += conn.execute(
+                    'DELETE FROM observations WHERE location = ? AND ts < ?', (location, day_cutoff)).rowcount
+            # Je Zielzeit und Vorlauf-Tag nur die letzte Ausgabe behalten
+            removed['forecasts'] += conn.execute(
+                f'DELETE FROM forecasts WHERE ts < ? AND issued NOT IN ('
+                f'SELECT MAX(g.issued) FROM forecasts g WHERE g.location = forecasts.location AND g.ts = forecasts.ts '
+                f'GROUP BY (g.ts - g.issued) / {DAY})', (raw_cutoff,)
+            ).rowcount
+            removed['forecasts'] += conn.execute('DELETE FROM forecasts WHERE ts < ?', (cutoff,)).rowcount
+            removed['observations'] += conn.execute('DELETE FROM observations WHERE ts < ?', (cutoff,)).rowcount
+            removed['days'] = conn.execute('DELETE FROM observations_daily WHERE day < ?', (cutoff,)).rowcount
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('compacted_at', ?)", (int(now),))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        # executescript läuft bis zum Ende; execute() gäbe nur eine Seite pro Schritt frei
+        conn.executescript('PRAGMA incremental_vacuum;')
+        return removed
+
+    # ----- Lesen -----
+
+    @property
+    def version(self) -> int:
+        """Steigt mit jeder Speicherung (für ETags)."""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row is not None else 0
+
+    def locations(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute('SELECT slug, name, tz_offset FROM locations ORDER BY id').fetchall()
+        return [{'slug': slug, 'name': name, 'tz_offset': tz_offset} for slug, name, tz_offset in rows]
+
+    def _location_row(self, slug: str) -> Optional[Tuple[int, int]]:
+        return self._conn().execute('SELECT id, tz_offset FROM locations WHERE slug = ?', (slug,)).fetchone()
+
+    def series(self, slug: str, start: float, end: float, bucket: int, metrics: Iterable[str] = ('temperature',),
+               source: str = 'observed', lead: float = 0) -> Optional[Dict[str, Any]]:
+        """
+        Werte eines Ortes in [start, end) je Bucket (Sekunden). ``source``
+        'forecast' nimmt je Zielzeit die letzte Vorhersage, die mindestens
+        ``lead`` Sekunden vorher ausgegeben wurde. Liegen im Zeitraum schon
+        verdichtete Tage, werden die Buckets auf ganze Tage vergrößert.
+        None, wenn der Ort unbekannt ist.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+        metrics = list(metrics)
+        allowed = OBSERVED if source == 'observed' else FORECAST
+        unknown = [m for m in metrics if m not in allowed]
+        if unknown or not metrics:
+            raise ValueError(f"metrics must be a subset of {', '.join(allowed)}")
+        if end <= start or bucket <= 0:
+            raise ValueError('end must be after start and bucket positive')
+        row = self._location_row(slug)
+        if row is None:
+            return None
+        location, tz_offset = row
+        conn = self._conn()
+        start, end, bucket = int(start), int(end), int(bucket)
+
+        if source == 'observed':
+            daily = conn.execute('SELECT 1 FROM observations_daily WHERE location = ? AND day > ? AND day < ? LIMIT 1',
+                                 (location, start - DAY, end)).fetchone() is not None
+            if daily and bucket % DAY:
+                bucket = -(-bucket // DAY) * DAY
+            raw = ', '.join(f'{m} AS {m}_lo, {m} AS {m}_hi, {m} AS {m}_sum, {m} IS NOT NULL AS {m}_n' for m in metrics)
+            inner = f"SELECT ts AS t, {raw} FROM observations WHERE location = :location AND ts >= :start AND ts < :end"
+            if daily:
+                inner += (f" UNION ALL SELECT day AS t, "
+                          f"{', '.join(f'{m}_min, {m}_max, {m}_sum, {m}_n' for m in metrics)} "
+                          f"FROM observations_daily WHERE location = :location AND day > :start - {DAY} AND day < :end")
+        else:
+            raw = ', '.join(f'{m} AS {m}_lo, {m} AS {m}_hi, {m} AS {m}_sum, {m} IS NOT NULL AS {m}_n' for m in metrics)
+            # Mit MAX() liefert SQLite die übrigen Spalten aus der Zeile der letzten Ausgabe
+            inner = (f"SELECT ts AS t, MAX(issued), {raw} FROM forecasts WHERE location = :location "
+                     f"AND ts >= :start AND ts < :end AND issued <= ts - :lead GROUP BY ts")
+
+        columns = ', '.join(f'MIN({m}_lo), MAX({m}_hi), SUM({m}_sum), SUM({m}_n)' for m in metrics)
+        rows = conn.execute(
+            f"SELECT (t + :tz) / :bucket * :bucket - :tz AS b, {columns} FROM ({inner}) GROUP BY b ORDER BY b",
+            {'location': location, 'start': start, 'end': end, 'bucket': bucket, 'tz': tz_offset, 'lead': int(lead)}
+        ).fetchall()
+
+        result: Dict[str, Any] = {
+            'location': slug,
+            'source': source,
+            'start': start,
+            'end': end,
+            'bucket': bucket,
+            'units': {m: UNITS[m] for m in metrics},
+            't': [row[0] for row in rows],
+            'count': [max(row[4 + 4 * i] for i in range(len(metrics))) for row in rows]
+        }
+        if source == 'forecast':
+            result['lead'] = int(lead)
+        for i, m in enumerate(metrics):
+            scale = SCALE[m]
+            low, high, total, count = (1 + 4 * i + k for k in range(4))
+            result[m] = {
+                'min': [_unscale(row[low], scale) for row in rows],
+                'max': [_unscale(row[high], scale) for row in rows],
+                'avg': [round(row[total] / row[count] / scale, 2) if row[count] else None for row in rows]
+            }
+        return result
+
+    def compare(self, slug: str, start: float, end: float, bucket: int, metrics: Iterable[str] = ('temperature',),
+                lead: float = 0) -> Optional[Dict[str, Any]]:
+        """Mittelwerte von Vorhersage (Vorlauf ``lead`` Sekunden) und Beobachtung je Bucket samt Abweichung."""
+        metrics = list(metrics)
+        observed = self.series(slug, start, end, bucket, metrics, 'observed')
+        if observed is None:
+            return None
+        # Gleiche Buckets wie die Beobachtung (ggf. auf Tage vergrößert)
+        forecast = self.series(slug, start, end, observed['bucket'], metrics, 'forecast', lead)
+        times = sorted(set(observed['t']) & set(forecast['t']))
+        result: Dict[str, Any] = {
+            'location': slug,
+            'start': observed['start'],
+            'end': observed['end'],
+            'bucket': observed['bucket'],
+            'lead': int(lead),
+            'units': observed['units'],
+            't': times,
+            'summary': {}
+        }
+        observed_index = {t: i for i, t in enumerate(observed['t'])}
+        forecast_index = {t: i for i, t in enumerate(forecast['t'])}
+        for m in metrics:
+            seen = [observed[m]['avg'][observed_index[t]] for t in times]
+            predicted = [forecast[m]['avg'][forecast_index[t]] for t in times]
+            errors = [round(p - o, 2) if p is not None and o is not None else None for o, p in zip(seen, predicted)]
+            valid = [e for e in errors if e is not None]
+            result[m] = {'observed': seen, 'forecast': predicted, 'error': errors}
+            result['summary'][m] = {
+                'n': len(valid),
+                'bias': round(sum(valid) / len(valid), 2) if valid else None,
+                'mae': round(sum(abs(e) for e in valid) / len(valid), 2) if valid else None
+            }
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('observations', 'observations_daily', 'forecasts')}
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        pages = conn.execute('PRAGMA page_count').fetchone()[0]
+        free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        counts['bytes'] = page_size * (pages - free)
+        counts['file_bytes'] = page_size * pages
+        counts['auto_vacuum'] = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        counts['version'] = self.version
+        return counts
+
+
+def _unscale(value: Optional[int], scale: int) -> Optional[float]:
+    return round(value / scale, 2) if value is not None else None
+
+
+_stores: Dict[str, WeatherHistory] = {}
+_stores_lock = threading.Lock()
+
+
+def get_history(path: str, **kwargs: Any) -> WeatherHistory:
+    """Gemeinsamer Store pro Datei (Scheduler und Requests eines Prozesses)."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = WeatherHistory(path, **kwargs)
+        return store
@@ -1,37 +1,29 @@
-import requests
 import json
+import logging
 import os
+import re
+import sqlite3
 import time
-import shutil
 import datetime as dt
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from snapshot_cache import snapshot_cache
+from events import event_broker
+from icon_assets import get_icon_registry
+from weather_history import get_history
+from shared_state import configure_shared_store
 
+logger = logging.getLogger(__name__)
 
+
+# weather_client (und damit requests) erst beim ersten Abruf importieren:
+# API_backend braucht beim Start nur die Pfad- und Status-Helfer dieses Moduls
 def get_weather_data(api_key: str, city: str) -> Optional[Dict[str, Any]]:
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric&lang=de"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print(err)
-        return None
-    except requests.exceptions.RequestException as err:
-        print(err)
-        return None
-    return response.json()
+    from weather_client import get_client
+    return get_client(api_key).current(city)
 
 def get_weather_forecast(api_key: str, city: str) -> Optional[Dict[str, Any]]:
-    url = f"http://api.openweathermap.org/data/2.5/forecast?q={city}&appid={api_key}&units=metric&lang=de"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-    except requests.exceptions.HTTPError as err:
-        print(err)
-        return None
-    except requests.exceptions.RequestException as err:
-        print(err)
-        return None
-    return response.json()
+    from weather_client import get_client
+    return get_client(api_key).forecast(city)
 
 def save_weather_data(data: Dict[str, Any], filename: str) -> None:
     temp_akut = round(data['main']['temp'])
@@ -46,116 +38,214 @@ def save_weather_data(data: Dict[str, Any], filename: str) -> None:
         'max_temperature': f"{temp_max}°C",
         'humidity': f"{humidity}%",
         'weather': data['weather'][0]['description'],
-        'icon': data['weather'][0]['icon']
+        'icon': data['weather'][0]['icon'],
+        'icon_url': get_icon_registry().url(data['weather'][0]['icon'], data['weather'][0]['description'])
     }
-    with open(filename, 'w') as json_file:
-        json.dump(save, json_file, indent=4)
-    print(f"Wetterdaten wurden in {filename} gespeichert.")
+    snapshot_cache.write_json(filename, save)
+    logger.info(f"Wetterdaten wurden in {filename} gespeichert.")
 
-def save_weather_forecast(data: Dict[str, Any], filename: str) -> None:
-    forecast_data = {}
-    day_conter = 0
-    daily_forecast = []
+EPOCH_DATE = dt.date(1970, 1, 1)
+
+def aggregate_forecast(data: Dict[str, Any], days: int = 3, now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Fasst die 3-Stunden-Einträge von /forecast in einem Durchlauf zu Tageswerten zusammen.
+
+    Die Tage werden in der Ortszeit der Stadt gebildet (city.timezone, Sekunden
+    Versatz zu UTC), der heutige Tag wird übersprungen. Beschreibung und Icon
+    stammen vom Eintrag, der 12:00 Uhr Ortszeit am nächsten liegt.
+    """
+    tz_offset = data.get('city', {}).get('timezone', 0)
+    reference = time.time() if now is None else now
+    # Tage als ganzzahliger Index (Sekunden Ortszeit // 86400): kein datetime pro Eintrag
+    today = int(reference + tz_offset) // 86400
+
+    buckets: Dict[int, Dict[str, Any]] = {}
     for entry in data['list']:
-        date, time = entry['dt_txt'].split(' ')
-        if date == dt.datetime.now().strftime('%Y-%m-%d'):
+        local_seconds = entry['dt'] + tz_offset
+        date = local_seconds // 86400
+        if date <= today:
             continue
-        if date not in forecast_data:
-            forecast_data[date] = {
-            'min_temperature': entry['main']['temp_min'],
-            'max_temperature': entry['main']['temp_max'],
-            'weather': entry['weather'][0]['description'],
-            'icon': entry['weather'][0]['icon']
+        bucket = buckets.get(date)
+        if bucket is None:
+            if len(buckets) == days:
+                break  # Einträge sind zeitlich sortiert: alle gewünschten Tage vollständig
+            bucket = buckets[date] = {
+                'min': entry['main']['temp_min'],
+                'max': entry['main']['temp_max'],
+                'noon_distance': 24,
+                'weather': None,
+                'icon': None,
+                'precipitation': 0.0,
+                'pop': 0.0,
+                'wind': 0.0,
+                'gust': 0.0,
+                'humidity_sum': 0,
+                'count': 0
             }
         else:
-            forecast_data[date]['min_temperature'] = min(forecast_data[date]['min_temperature'], entry['main']['temp_min'])
-            forecast_data[date]['max_temperature'] = max(forecast_data[date]['max_temperature'], entry['main']['temp_max'])
-            if time == '12:00:00':  # Aktualisiere die Wetterbeschreibung und das Icon um 12:00 Uhr
-                forecast_data[date]['weather'] = entry['weather'][0]['description']
-                forecast_data[date]['icon'] = entry['weather'][0]['icon']
-                source_folder = 'Datenback_images'
-                output_folder = 'output'
-                os.makedirs(output_folder, exist_ok=True)
-                copy_and_rename_image(source_folder, entry['weather'][0]['icon'], output_folder, f"{date}.png")
-                day_conter += 1
-
-        daily_forecast = []
-        for date, data in forecast_data.items():
-            daily_forecast.append({
-            'date': date,
-            'min_temperature': f"{round(data['min_temperature'])}°C",
-            'max_temperature': f"{round(data['max_temperature'])}°C",
-            'weather': data['weather'],
-            'icon': data['icon']
-        })
-        
-        if day_conter == 3:
-            break
-    with open(filename, 'w') as json_file:
-        json.dump(daily_forecast, json_file, indent=4)
-
-    print(f"Wettervorhersage wurde in {filename} gespeichert.")
-
-def copy_and_rename_image(source_folder: str, icon_code: str, destination_folder: str, new_filename: str) -> None:
-    print(f"Kopiere Bild {icon_code}.png...")
-    source_file = os.path.join(source_folder, f"{icon_code}.png")
-    destination_file = os.path.join(destination_folder, new_filename)
-    if os.path.exists(source_file):
-        shutil.copy(source_file, destination_file)
-        print(f"Bild {source_file} wurde nach {destination_file} kopiert.")
-    else:
-        print(f"Bild {source_file} wurde nicht gefunden.")
+            bucket['min'] = min(bucket['min'], entry['main']['temp_min'])
+            bucket['max'] = max(bucket['max'], entry['main']['temp_max'])
 
-def auto_update_wetterdaten() -> None:
-    target_dir = os.getenv('zielverzeichnis')
+        noon_distance = abs(local_seconds % 86400 // 3600 - 12)
+        if noon_distance < bucket['noon_distance']:
+            bucket['noon_distance'] = noon_distance
+            bucket['weather'] = entry['weather'][0]['description']
+            bucket['icon'] = entry['weather'][0]['icon']
+
+        bucket['precipitation'] += entry.get('rain', {}).get('3h', 0.0) + entry.get('snow', {}).get('3h', 0.0)
+        bucket['pop'] = max(bucket['pop'], entry.get('pop', 0.0))
+        wind = entry.get('wind', {})
+        bucket['wind'] = max(bucket['wind'], wind.get('speed', 0.0))
+        bucket['gust'] = max(bucket['gust'], wind.get('gust', 0.0))
+        bucket['humidity_sum'] += entry['main']['humidity']
+        bucket['count'] += 1
+
+    return [
+        {
+            'date': (EPOCH_DATE + dt.timedelta(days=date)).isoformat(),
+            'min_temperature': f"{round(bucket['min'])}°C",
+            'max_temperature': f"{round(bucket['max'])}°C",
+            'weather': bucket['weather'],
+            'icon': bucket['icon'],
+            'precipitation': f"{bucket['precipitation']:.1f} mm",
+            'precipitation_probability': f"{round(bucket['pop'] * 100)}%",
+            'wind_speed': f"{round(bucket['wind'] * 3.6)} km/h",
+            'wind_gust': f"{round(bucket['gust'] * 3.6)} km/h",
+            'humidity': f"{round(bucket['humidity_sum'] / bucket['count'])}%"
+        }
+        for date, bucket in buckets.items()
+    ]
+
+def save_weather_forecast(data: Dict[str, Any], filename: str) -> None:
+    daily_forecast = aggregate_forecast(data, days=int(os.getenv('FORECAST_DAYS', 3)))
+    icons = get_icon_registry()
+    for day in daily_forecast:
+        day['icon_url'] = icons.url(day['icon'], day['weather'])
+    snapshot_cache.write_json(filename, daily_forecast)
+
+    logger.info(f"Wettervorhersage wurde in {filename} gespeichert.")
+
+def configured_locations() -> List[str]:
+    """
+    Orte aus WEATHER_LOCATIONS (mit ';' getrennt, Name wie "Glienicke,DE" oder
+    Koordinaten "52.63,13.32"); ohne Angabe WEATHER_CITY und WEATHER_COUNTRY.
+    Der erste Ort ist der Standardort.
+    """
+    locations = [l.strip() for l in os.getenv('WEATHER_LOCATIONS', '').split(';') if l.strip()]
+    if not locations:
+        city = os.getenv('WEATHER_CITY', 'Berlin')
+        country = os.getenv('WEATHER_COUNTRY')
+        locations = [f'{city},{country}' if country else city]
+    return locations
+
+def location_slug(location: str) -> str:
+    return re.sub(r'[\W_]+', '-', location.strip().lower()).strip('-')
+
+def weather_files(output_folder: str, location: str, default_location: str) -> Tuple[str, str]:
+    """Dateien für Wetter und Vorhersage eines Ortes; der Standardort behält die bisherigen Namen."""
+    if location_slug(location) == location_slug(default_location):
+        return (os.path.join(output_folder, 'wetterdaten.json'),
+                os.path.join(output_folder, 'wettervorhersage.json'))
+    slug = location_slug(location)
+    return (os.path.join(output_folder, f'wetterdaten_{slug}.json'),
+            os.path.join(output_folder, f'wettervorhersage_{slug}.json'))
+
+def weather_history(output_folder: str):
+    """Verlauf aller Orte (output/weather_history.db, siehe weather_history.py)."""
+    return get_history(
+        os.path.join(output_folder, 'weather_history.db'),
+        raw_days=float(os.getenv('WEATHER_HISTORY_RAW_DAYS', 30)),
+        retention_days=float(os.getenv('WEATHER_HISTORY_DAYS', 730))
+    )
+
+def record_history(output_folder: str, city: str, weather_data: Optional[Dict[str, Any]],
+                   weather_forecast: Optional[Dict[str, Any]]) -> None:
+    # Der Verlauf ist Zusatz: ein Fehler darf die Aktualisierung nicht abbrechen
+    try:
+        stored = weather_history(output_folder).record(location_slug(city), city, weather_data, weather_forecast)
+        logger.info(f"Wetterverlauf für {city}: {stored['observations']} Beobachtung(en), "
+                    f"{stored['forecasts']} Vorhersagewerte gespeichert.")
+    except (sqlite3.Error, KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Wetterverlauf für {city} konnte nicht gespeichert werden: {e}")
+
+def read_auto_update_status(target_dir: str) -> bool:
+    """Liest den Auto-Update-Schalter (output/auto_update_status.json)."""
+    snapshot = snapshot_cache.get(f'{target_dir}/output/auto_update_status.json')
+    return bool(snapshot.data.get('auto_update')) if snapshot is not None else False
+
+
+def auto_update_wetterdaten(target_dir: Optional[str] = None) -> None:
+    """Eigenständiger Update-Prozess (Alternative zum Scheduler im Backend)."""
+    target_dir = target_dir or os.getenv('zielverzeichnis')
     if not target_dir:
-        print("Zielverzeichnis nicht gesetzt!")
+        logger.error("Zielverzeichnis nicht gesetzt!")
         return
     
     status_file = f'{target_dir}/output/auto_update_status.json'
     if not os.path.exists(status_file):
-        print(f"Auto-update Status-Datei nicht gefunden: {status_file}")
+        logger.error(f"Auto-update Status-Datei nicht gefunden: {status_file}")
         return
-        
-    with open(status_file, 'r') as json_file:
-        data = json.load(json_file)
-        auto_update = data['auto_update']
-    while auto_update == True:
-        main()
-        time.sleep(3600)
+
+    interval = int(os.getenv('WEATHER_UPDATE_INTERVAL', 3600))
+    # Gleicher Wetter-Cache wie die Gunicorn-Worker
+    configure_shared_store(target_dir)
+    # Schalter vor jedem Lauf neu lesen, damit toggle_auto_update auch hier wirkt
+    while read_auto_update_status(target_dir):
+        try:
+            main(target_dir)
+        except Exception as e:
+            logger.error(f"Fehler bei der Wetter-Aktualisierung: {e}")
+        time.sleep(interval)
 
 
-def main() -> None:
+def main(target_dir: Optional[str] = None) -> None:
+    """
+    Ein Abruf aller Orte. Das Backend übergibt sein TARGET_DIR; nur der
+    eigenständige Aufruf fällt auf die Umgebungsvariable zielverzeichnis zurück.
+    """
+    from weather_client import get_client
+
     api_key = os.getenv('OPENWEATHER_API_KEY')
-    target_dir = os.getenv('zielverzeichnis')
+    target_dir = target_dir or os.getenv('zielverzeichnis')
     if not api_key:
         raise Exception("API-Key nicht gesetzt!")
-    city = 'Berlin'
+    if not target_dir:
+        raise Exception("Zielverzeichnis nicht gesetzt!")
+    locations = configured_locations()
     output_folder = f'{target_dir}/output'  # Ordner, in dem die Dateien gespeichert werden sollen
-    source_folder = 'Datenback_images'  # Ordner, in dem die Originalbilder gespeichert sind
     os.makedirs(output_folder, exist_ok=True)
-    weather_data = get_weather_data(api_key, city)
-    weather_forecast = get_weather_forecast(api_key, city)
-
-    if weather_data:            
-        weather_data_file = os.path.join(output_folder, 'wetterdaten.json')
-        weather_icon_file = os.path.join(output_folder, 'wetter_icon.png')
-        save_weather_data(weather_data, weather_data_file)
-        copy_and_rename_image(source_folder, weather_data['weather'][0]['icon'], output_folder, 'wetter_icon.png')
-        
-        print(f"Wetterdaten für {city} wurden in {weather_data_file} gespeichert.")
-        print(f"Wetter-Icon wurde als {weather_icon_file} gespeichert.")
-    
-    if weather_forecast:
-        print(f"Wettervorhersage für {city} wurde abgerufen.")
-        forecast_file = os.path.join(output_folder, 'wettervorhersage.json')
-        save_weather_forecast(weather_forecast, forecast_file)
+    # Alle Orte gebündelt über den gemeinsamen Client (begrenzte Parallelität, TTL-Cache)
+    results = get_client(api_key).fetch_many(locations)
+
+    updated = []
+    for city, (weather_data, weather_forecast) in results.items():
+        weather_data_file, forecast_file = weather_files(output_folder, city, locations[0])
+        if weather_data:
+            save_weather_data(weather_data, weather_data_file)
+            logger.info(f"Wetterdaten für {city} wurden in {weather_data_file} gespeichert.")
+
+        if weather_forecast:
+            logger.info(f"Wettervorhersage für {city} wurde abgerufen.")
+            save_weather_forecast(weather_forecast, forecast_file)
+
+        if weather_data or weather_forecast:
+            record_history(output_folder, city, weather_data, weather_forecast)
+            updated.append(location_slug(city))
+        else:
+            logger.warning(f"Wetterdaten für {city} konnten nicht abgerufen werden!")
+
+    if updated:
+        event_broker.publish('weather', {'city': locations[0], 'locations': updated})
+    else:
+        raise Exception(f"Wetterdaten für {', '.join(locations)} konnten nicht abgerufen werden!")
 
 
 if __name__ == "__main__":
+    # Eigenständiger Prozess: Meldungen wie bisher auf der Konsole
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     target_dir = os.getenv('zielverzeichnis')
     if not target_dir:
-        print("Zielverzeichnis nicht gesetzt!")
+        logger.error("Zielverzeichnis nicht gesetzt!")
         exit(1)
     
     status_file = f'{target_dir}/output/auto_update_status.json'
@@ -173,5 +263,5 @@ if __name__ == "__main__":
         with open(status_file, 'w') as json_file:
             json.dump(data, json_file, indent=4)
     
-    auto_update_wetterdaten()
-    # main()
\ No newline at end of file
+    auto_update_wetterdaten(target_dir)
+    # main(target_dir)
\ No newline at end of file
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """
 WSGI Entry Point für Gunicorn
+
+Empfohlen mit ``--preload``: create_app() und warm_up() laufen dann einmal im
+Master, die Worker erben Module, Templates und Icons per Copy-on-Write. Der
+Wetter-Scheduler startet in jedem Worker beim ersten Request (Threads überleben
+den Fork nicht); die Leader-Sperre lässt nur einen davon nach Zeitplan laufen.
 """
 
+import gc
 import os
 import sys
 from pathlib import Path
@@ -17,7 +23,13 @@ if os.path.exists('.env.production'):
     from dotenv import load_dotenv
     load_dotenv('.env.production')
 
-from API_backend import app
+from API_backend import create_app, warm_up
+
+app = create_app()
+warm_up(app)
+# Vorab geladene Objekte aus der Garbage Collection nehmen, damit deren
+# Referenzzähler-Seiten nach dem Fork nicht bei jedem GC-Lauf kopiert werden
+gc.freeze()
 
 if __name__ == "__main__":
     app.run()